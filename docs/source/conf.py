@@ -80,8 +80,6 @@ autodoc_mock_imports = [
     "base58",
     "socks",
     "scipy",
-    "pydub",
-    "matplotlib",
     "pdftotext",
     "PyPDF2",
     "OpenSSL",
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`ResultCache` saves the results of unit evaluation across runs of katana. Results are keyed by the
+content hash of the target, the unit name, the unit configuration and a hash of the unit source, so changing a
+unit or its configuration never replays stale results. The cache is disabled unless the ``cache-dir`` manager option
+is set. The ``cache-size`` option bounds the size of the cache (in megabytes), and the least recently used entries
+are evicted once it is exceeded.
+
+While a unit is evaluated, its ``manager`` reference is replaced with a :class:`CacheRecorder`. The recorder
+forwards everything to the real Manager, and records the data, artifacts, flags and targets produced by the unit.
+Once every case has been evaluated without error, the recorded calls are saved along with a copy of the unit output
+directory. On a later run, the Manager replays the recorded calls instead of evaluating the unit. Results are not
+saved if a program run by the unit was killed before it finished (see :mod:`katana.runner`).
+
+"""
+from __future__ import annotations
+from typing import Any, List, Tuple, Dict
+import collections
+import threading
+import hashlib
+import pickle
+import shutil
+import uuid
+import sys
+import os
+
+import katana.manager
+
+# Manager options which have no effect on the results of a unit
+MANAGER_OPTIONS = frozenset(
+    [
+        "units",
+        "threads",
+        "outdir",
+        "auto",
+        "recurse",
+        "force",
+        "exclude",
+        "min-data",
+        "download",
+        "template",
+        "timeout",
+        "prioritize",
+        "default-units",
+        "max-depth",
+        "executor",
+        "batch-time",
+        "max-batch",
+        "cache-dir",
+        "cache-size",
+        "http-connections",
+        "http-retries",
+        "http-backoff",
+        "http-timeout",
+        "http-cache-size",
+        "http-cache-ttl",
+        "http-cache-dir",
+        "async-limit",
+        "wordlist-range",
+        "process-limit",
+        "process-limits",
+        "process-timeout",
+        "process-cpu",
+        "process-memory",
+        "process-output",
+        "image-cache",
+        "imagegui",
+    ]
+)
+# Name of the recorded calls within a cache entry
+CALLS_NAME = "calls.pickle"
+# Name of the copy of the unit output directory within a cache entry
+OUTPUT_NAME = "output"
+
+
+class OutputPath(object):
+    """ A path within the unit output directory. The output directory differs
+    between runs, so the path is saved relative to it. """
+
+    def __init__(self, path: str, encoded: bool):
+        self.path = path
+        self.encoded = encoded
+
+    def resolve(self, output_dir: str) -> Any:
+        """ Rebuild the path within the given output directory """
+        path = os.path.join(output_dir, self.path)
+        return path.encode("utf-8") if self.encoded else path
+
+
+class CacheRecorder(object):
+    """ Stands in for the Manager as ``unit.manager`` while a unit is evaluated.
+    Results are recorded and then forwarded to the real Manager. Everything
+    else is forwarded untouched. The manager threads track the number of
+    batches in flight, so the results are only saved once all of them have
+    completed. """
+
+    def __init__(
+        self, manager: katana.manager.Manager, unit: katana.unit.Unit, key: str
+    ):
+        super(CacheRecorder, self).__init__()
+
+        # The real manager
+        self.manager = manager
+        # The unit being recorded
+        self.unit = unit
+        # Cache key for the results
+        self.key = key
+        # List of (method, args, kwargs) tuples to replay
+        self.calls: List[Tuple[str, tuple, dict]] = []
+        # Protects the batch tracking below
+        self.lock = threading.Lock()
+        # Number of batches being evaluated
+        self.pending = 0
+        # Whether the case generator has been exhausted
+        self.exhausted = False
+        # Whether any exception was raised by the unit
+        self.failed = False
+        # Whether the results were already saved
+        self.saved = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.manager, name)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.manager[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.manager
+
+    def register_data(self, unit: katana.unit.Unit, data: Any, recurse: bool = True):
+        """ Record the data and forward it to the manager """
+        self.calls.append(("register_data", (data,), {"recurse": recurse}))
+        self.manager.register_data(unit, data, recurse=recurse)
+
+    def register_artifact(
+        self, unit: katana.unit.Unit, path: str, recurse: bool = True
+    ) -> None:
+        """ Record the artifact and forward it to the manager """
+        self.calls.append(("register_artifact", (path,), {"recurse": recurse}))
+        self.manager.register_artifact(unit, path, recurse=recurse)
+
+    def register_flag(self, unit: katana.unit.Unit, flag: str) -> None:
+        """ Record the flag and forward it to the manager """
+        self.calls.append(("register_flag", (flag,), {}))
+        self.manager.register_flag(unit, flag)
+
+    def find_flag(self, unit: katana.unit.Unit, data: Any) -> bool:
+        """ Search for flags with the real implementation, so that any flags
+        found are recorded through ``register_flag``. """
+        return katana.manager.Manager.find_flag(self, unit, data)
+
+    def queue_target(self, upstream: bytes, parent: katana.unit.Unit = None, **kwargs):
+        """ Record the new target and forward it to the manager """
+        self.calls.append(("queue_target", (upstream,), {}))
+        return self.manager.queue_target(upstream, parent=parent, **kwargs)
+
+
+class ResultCache(object):
+    """ An on-disk cache of unit results, shared between runs of katana. Each
+    entry is a directory named by its key under ``cache-dir``. The entry
+    modification time tracks the last use for eviction. """
+
+    def __init__(self, manager: katana.manager.Manager):
+        super(ResultCache, self).__init__()
+
+        # The manager we cache results for
+        self.manager = manager
+        # Protects the entry index
+        self.lock = threading.Lock()
+        # Size of each entry in least recently used order (loaded on first use)
+        self.entries: collections.OrderedDict = None
+        # Total size of all entries
+        self.size = 0
+        # Hash of the source for each unit class
+        self.versions: Dict[type, str] = {}
+
+    @property
+    def path(self) -> str:
+        """ The cache directory, or an empty string if caching is disabled """
+        return os.path.expanduser(self.manager["manager"]["cache-dir"])
+
+    def cacheable(self, unit: katana.unit.Unit) -> bool:
+        """ Whether the results of this unit can be cached. Web targets are
+        never cached, since the content of the site may change. """
+        return self.path != "" and unit.CACHEABLE and not unit.target.is_url
+
+    def version(self, unit_class: type) -> str:
+        """ Hash the source of the module defining the given unit class. This
+        invalidates cached results whenever the unit is modified. """
+
+        if unit_class not in self.versions:
+            h = hashlib.md5(unit_class.__qualname__.encode("utf-8"))
+            try:
+                with open(sys.modules[unit_class.__module__].__file__, "rb") as f:
+                    h.update(f.read())
+            except (KeyError, AttributeError, TypeError, OSError):
+                pass
+            self.versions[unit_class] = h.hexdigest()
+
+        return self.versions[unit_class]
+
+    def key(self, unit: katana.unit.Unit) -> str:
+        """ Build the cache key for the given unit and its target """
+
+        config = unit.target.config
+        options = sorted(
+            (name, value)
+            for name, value in config.items(str(unit))
+            if name not in MANAGER_OPTIONS
+        )
+
+        h = hashlib.sha256()
+        h.update(unit.target.hash.digest())
+        h.update(
+            repr(
+                (
+                    str(unit),
+                    self.version(type(unit)),
+                    config["manager"].get("flag-format", ""),
+                    options,
+                )
+            ).encode("utf-8")
+        )
+
+        return h.hexdigest()
+
+    def lookup(self, unit: katana.unit.Unit) -> str:
+        """ Find the cache entry for this unit. Returns the path to the entry,
+        or None if there is no entry or the unit can't be cached. """
+
+        if not self.cacheable(unit):
+            return None
+
+        key = self.key(unit)
+        path = os.path.join(self.path, key)
+        if not os.path.isfile(os.path.join(path, CALLS_NAME)):
+            return None
+
+        # Mark this entry as the most recently used
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        with self.lock:
+            self._load()
+            if key in self.entries:
+                self.entries.move_to_end(key)
+
+        return path
+
+    def record(self, unit: katana.unit.Unit) -> None:
+        """ Begin recording the results of this unit for the cache """
+        if self.cacheable(unit):
+            unit.manager = CacheRecorder(unit.manager, unit, self.key(unit))
+
+    def begin(self, unit: katana.unit.Unit) -> None:
+        """ A batch of cases for this unit is about to be evaluated. This must
+        be called before the work item is requeued. """
+
+        if isinstance(unit.manager, CacheRecorder):
+            with unit.manager.lock:
+                unit.manager.pending += 1
+
+    def end(self, unit: katana.unit.Unit, exhausted: bool) -> None:
+        """ A batch of cases for this unit has been evaluated. The results are
+        saved once the case generator is exhausted and no batches remain. """
+
+        recorder = unit.manager
+        if not isinstance(recorder, CacheRecorder):
+            return
+
+        with recorder.lock:
+            recorder.pending -= 1
+            recorder.exhausted = recorder.exhausted or exhausted
+            if recorder.pending > 0 or not recorder.exhausted:
+                return
+            if recorder.failed or recorder.saved:
+                return
+            recorder.saved = True
+
+        self.save(recorder)
+
+    def fail(self, unit: katana.unit.Unit) -> None:
+        """ The unit raised an exception. Its results are not saved, since the
+        failure may not be repeatable. """
+
+        if isinstance(unit.manager, CacheRecorder):
+            unit.manager.failed = True
+
+    def save(self, recorder: CacheRecorder) -> None:
+        """ Save the recorded results and unit output directory """
+
+        output_dir = recorder.unit.output_dir
+
+        # Paths within the output directory are saved relative to it
+        calls = [
+            (name, tuple(self._relative(arg, output_dir) for arg in args), kwargs)
+            for name, args, kwargs in recorder.calls
+        ]
+        try:
+            calls = pickle.dumps(calls)
+        except Exception:
+            # Some units produce results which can't be saved
+            return
+
+        # Build the entry in a temporary directory, so that other runs never
+        # see a partial entry
+        path = os.path.join(self.path, recorder.key)
+        temp = os.path.join(self.path, ".tmp-{0}".format(uuid.uuid4()))
+
+        try:
+            os.makedirs(temp)
+            with open(os.path.join(temp, CALLS_NAME), "wb") as f:
+                f.write(calls)
+
+            if output_dir is not None and os.path.isdir(output_dir):
+                shutil.copytree(
+                    output_dir,
+                    os.path.join(temp, OUTPUT_NAME),
+                    symlinks=True,
+                    # Child targets are cached on their own
+                    ignore=lambda d, names: ["children"] if d == output_dir else [],
+                )
+
+            size = self._disk_usage(temp)
+            if size > self.limit:
+                raise OSError("entry exceeds cache-size")
+
+            os.rename(temp, path)
+        except OSError:
+            # Out of space, too large, or another run saved this entry first
+            shutil.rmtree(temp, ignore_errors=True)
+            return
+
+        with self.lock:
+            self._load()
+            self.entries[recorder.key] = size
+            self.size += size
+            self._evict()
+
+    def replay(self, unit: katana.unit.Unit, path: str) -> None:
+        """ Replay the results saved in a cache entry against the manager """
+
+        with open(os.path.join(path, CALLS_NAME), "rb") as f:
+            calls = pickle.load(f)
+
+        # Restore the unit output directory
+        output_dir = None
+        if os.path.isdir(os.path.join(path, OUTPUT_NAME)):
+            output_dir = unit.get_output_dir()
+            self._copy_into(os.path.join(path, OUTPUT_NAME), output_dir)
+
+        for name, args, kwargs in calls:
+
+            # Stop if a flag was found
+            if unit.is_complete():
+                break
+
+            args = tuple(
+                arg.resolve(output_dir) if isinstance(arg, OutputPath) else arg
+                for arg in args
+            )
+
+            if name == "queue_target":
+                self.manager.queue_target(*args, parent=unit, **kwargs)
+            else:
+                getattr(self.manager, name)(unit, *args, **kwargs)
+
+    @property
+    def limit(self) -> int:
+        """ Maximum size of the cache in bytes """
+        return int(self.manager["manager"].getfloat("cache-size") * 1024 * 1024)
+
+    def _relative(self, arg: Any, output_dir: str) -> Any:
+        """ Convert paths within the output directory to an OutputPath """
+
+        if output_dir is None:
+            return arg
+
+        if isinstance(arg, bytes):
+            try:
+                path = arg.decode("utf-8")
+            except UnicodeDecodeError:
+                return arg
+        elif isinstance(arg, str):
+            path = arg
+        else:
+            return arg
+
+        if not path.startswith(output_dir + os.sep):
+            return arg
+
+        return OutputPath(os.path.relpath(path, output_dir), isinstance(arg, bytes))
+
+    def _copy_into(self, source: str, destination: str) -> None:
+        """ Copy a directory into one which may already exist. Symbolic links
+        are copied as links. """
+
+        os.makedirs(destination, exist_ok=True)
+
+        for entry in os.scandir(source):
+            target = os.path.join(destination, entry.name)
+            if entry.is_symlink():
+                if os.path.lexists(target):
+                    os.unlink(target)
+                os.symlink(os.readlink(entry.path), target)
+            elif entry.is_dir():
+                self._copy_into(entry.path, target)
+            else:
+                shutil.copy2(entry.path, target)
+
+    def _disk_usage(self, path: str) -> int:
+        """ Total size of all files under the given directory """
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    size += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return size
+
+    def _load(self) -> None:
+        """ Build the entry index from the cache directory, if needed. The
+        lock must be held. """
+
+        if self.entries is not None:
+            return
+
+        entries = []
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            names = []
+
+        for name in names:
+            # Skip partial entries from other runs
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                entries.append((os.stat(path).st_mtime, name, self._disk_usage(path)))
+            except OSError:
+                continue
+
+        self.entries = collections.OrderedDict(
+            (name, size) for mtime, name, size in sorted(entries)
+        )
+        self.size = sum(self.entries.values())
+
+    def _evict(self) -> None:
+        """ Remove the least recently used entries until the cache fits within
+        ``cache-size``. The lock must be held. """
+
+        while self.size > self.limit and self.entries:
+            name, size = self.entries.popitem(last=False)
+            self.size -= size
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`AsyncEngine` drives units which are I/O bound. A unit opts in by declaring its evaluate method as a
+coroutine::
+
+    class Unit(WebUnit):
+
+        async def evaluate(self, case):
+            r = await self.manager.http.get_async(url)
+            self.manager.register_data(self, r.text)
+
+Instead of evaluating batches of cases within the Manager worker threads, the whole work item for such a unit is
+handed to a single event loop thread. The engine pulls cases from the unit and keeps up to ``async-limit`` cases in
+flight across all units, so the worker threads stay free for CPU bound units.
+
+Blocking calls made from a coroutine (e.g. :meth:`katana.httpclient.HttpClient.get_async`) run in a pool of I/O
+threads owned by the engine. The pool is sized to ``async-limit``, and each request still obeys the per-host
+connection limit of the HTTP client. Results registered by a coroutine are handled on the event loop, but the
+targets they create are built within the I/O pool, since building a target may block (e.g. downloading a URL).
+
+"""
+from typing import Coroutine, Set
+import concurrent.futures
+import threading
+import asyncio
+
+
+class IOPool(concurrent.futures.ThreadPoolExecutor):
+    """ Thread pool for blocking calls, which keeps the calls it has not
+    finished so they can be cancelled when the engine stops """
+
+    def __init__(self, *args, **kwargs):
+        super(IOPool, self).__init__(*args, **kwargs)
+        self.pending: Set[concurrent.futures.Future] = set()
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        future = super(IOPool, self).submit(fn, *args, **kwargs)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return future
+
+    def cancel(self) -> None:
+        """ Cancel every call which has not started yet """
+        for future in list(self.pending):
+            future.cancel()
+
+
+class AsyncEngine(object):
+    """ Event loop running in a dedicated thread, along with the I/O thread
+    pool used by coroutines for blocking calls.
+
+    :property limit: The maximum number of cases evaluated at once
+    :property loop: The event loop (while running)
+    :property slots: Semaphore limiting the number of cases in flight
+    """
+
+    def __init__(self, limit: int):
+        super(AsyncEngine, self).__init__()
+
+        self.limit = limit
+        self.loop: asyncio.AbstractEventLoop = None
+        self.slots: asyncio.Semaphore = None
+        self.thread: threading.Thread = None
+        self.io: IOPool = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None
+
+    def start(self) -> None:
+        """ Start the event loop thread """
+
+        if self.running:
+            return
+
+        self.loop = asyncio.new_event_loop()
+
+        # Blocking calls from coroutines end up here (see `run_in_executor`)
+        self.io = IOPool(max_workers=self.limit, thread_name_prefix="katana-io")
+        self.loop.set_default_executor(self.io)
+
+        # The semaphore must be created on the loop it is used from
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def stop(self) -> None:
+        """ Stop the event loop. Any coroutines still running are cancelled.
+        """
+
+        if not self.running:
+            return
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+        self.io.cancel()
+        self.io.shutdown(wait=True)
+        self.io = None
+
+    def in_loop(self) -> bool:
+        """ Whether the caller is running on the event loop thread """
+        return self.thread is not None and threading.current_thread() is self.thread
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """ Schedule a coroutine on the event loop from any thread """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def _run(self, ready: threading.Event) -> None:
+        """ Event loop thread """
+
+        asyncio.set_event_loop(self.loop)
+        self.slots = asyncio.Semaphore(self.limit)
+        ready.set()
+
+        self.loop.run_forever()
+
+        # Cancel anything left over (e.g. after an abort)
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+        self.loop.close()
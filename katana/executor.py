@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+
+Execution backends used by the :class:`katana.manager.Manager` to evaluate unit cases. The backend is selected with
+the ``executor`` manager option:
+
+- ``thread``: every case is evaluated within a Manager worker thread (the default).
+- ``process``: every case batch is shipped to a pool of worker processes.
+- ``hybrid``: only units which declare ``CPU_BOUND`` are shipped to the process pool. All other units are
+  evaluated within the worker threads.
+
+Units evaluated in a worker process do not have access to the real Manager. Instead, they are handed a
+:class:`RecordingManager` which records every result (data, artifacts, flags, etc). The recorded calls are sent back
+to the parent process and replayed against the real Manager, so the Monitor sees no difference between the backends.
+
+"""
+from __future__ import annotations
+from typing import Any, List, Tuple, Dict
+import configparser
+import pickle
+
+import katana.manager
+import katana.matcher
+import katana.httpclient
+import katana.runner
+import katana.images
+
+# Valid values for the `executor` manager option
+EXECUTORS = ["thread", "process", "hybrid"]
+
+# HTTP client shared by every batch evaluated within a worker process
+http_client: katana.httpclient.HttpClient = None
+# Process runner shared by every batch evaluated within a worker process
+process_runner: katana.runner.ProcessRunner = None
+# Decoded images shared by every batch evaluated within a worker process
+image_cache: katana.images.ImageCache = None
+
+
+class RecordingManager(configparser.ConfigParser):
+    """ A stand-in for the Manager within a worker process. Configuration
+    access works as normal, while calls which would modify the state of the
+    Manager are recorded in ``calls`` for later replay by the parent. """
+
+    def __init__(self, config: Dict[str, Dict[str, str]]):
+        super(RecordingManager, self).__init__(interpolation=None)
+
+        # Copy of the parent manager configuration
+        self.read_dict(config)
+
+        # List of (method, args, kwargs) tuples to replay in the parent
+        self.calls: List[Tuple[str, tuple, dict]] = []
+
+        # Compiled flag matchers for each flag format
+        self.matchers = {}
+
+        # Connections are pooled for the lifetime of the worker process
+        global http_client
+        if http_client is None:
+            http_client = katana.httpclient.HttpClient(self)
+        self.http = http_client
+
+        # Program concurrency is limited within each worker process
+        global process_runner
+        if process_runner is None:
+            process_runner = katana.runner.ProcessRunner(self)
+        self.runner = process_runner
+
+        # Images are decoded once within each worker process
+        global image_cache
+        if image_cache is None:
+            image_cache = katana.images.ImageCache(self)
+        self.images = image_cache
+
+        # Some units use the compiled flag pattern directly
+        self.flag_pattern = None
+        if "flag-format" in self["manager"]:
+            matcher = self.flag_matcher(self["manager"]["flag-format"])
+            self.flag_pattern = matcher.pattern
+
+    def register_data(self, unit: katana.unit.Unit, data: Any, recurse: bool = True):
+        """ Record the data for registration in the parent """
+        self.calls.append(("register_data", (data,), {"recurse": recurse}))
+
+    def register_artifact(
+        self, unit: katana.unit.Unit, path: str, recurse: bool = True
+    ) -> None:
+        """ Record the artifact for registration in the parent """
+        self.calls.append(("register_artifact", (path,), {"recurse": recurse}))
+
+    def register_flag(self, unit: katana.unit.Unit, flag: str) -> None:
+        """ Record the flag, and mark the origin completed so the remaining
+        cases in this batch are skipped """
+        if unit is not None:
+            unit.origin.completed = True
+        self.calls.append(("register_flag", (flag,), {}))
+
+    def merge(self, unit: katana.unit.Unit, result: Any) -> None:
+        """ Record the result for merging into the real unit in the parent """
+        self.calls.append(("merge", (result,), {}))
+
+    def complete(self, unit: katana.unit.Unit) -> None:
+        """ Record the completion for the real unit, and skip the remaining
+        cases in this batch """
+        unit.completed = True
+        self.calls.append(("complete", (), {}))
+
+    def incomplete(self, unit: katana.unit.Unit) -> None:
+        """ Record that the results of the real unit are incomplete """
+        self.calls.append(("incomplete", (), {}))
+
+    def find_flag(self, unit: katana.unit.Unit, data: Any) -> bool:
+        """ Flag matching happens locally, since units rely on the result.
+        Any flags found are recorded through ``register_flag``. """
+        return katana.manager.Manager.find_flag(self, unit, data)
+
+    def flag_matcher(self, flag_format: str) -> katana.matcher.FlagMatcher:
+        """ Matchers are compiled once per worker process """
+        return katana.manager.Manager.flag_matcher(self, flag_format)
+
+    def queue_target(self, upstream: bytes, parent: katana.unit.Unit = None, **kwargs):
+        """ Record the new target. It is queued under the real unit in the
+        parent. """
+        self.calls.append(("queue_target", (upstream,), {}))
+
+
+def evaluate_cases(
+    unit: katana.unit.Unit, cases: List[Any], config: Dict[str, Dict[str, str]]
+) -> List[Tuple[str, tuple, dict]]:
+    """ Evaluate a batch of cases for the given unit. This is the entrypoint
+    within the worker process. The list of recorded manager calls is returned
+    for replay in the parent. """
+
+    manager = RecordingManager(config)
+    unit.manager = manager
+
+    # Evaluate the whole batch at once if the unit supports it
+    if unit.has_evaluate_batch():
+        cases = [cases]
+        evaluate = unit.evaluate_batch
+    else:
+        evaluate = unit.evaluate
+
+    for case in cases:
+
+        # A flag was found by a previous case
+        if unit.is_complete():
+            break
+
+        try:
+            evaluate(case)
+        except Exception as e:
+            # The exception needs to make it back to the parent
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(repr(e))
+            manager.calls.append(("exception", (e,), {}))
+
+    return manager.calls
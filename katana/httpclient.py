@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`HttpClient` is the HTTP layer shared by the Manager, targets and units. It is available to units as
+``self.manager.http``, and provides the same ``get``/``post``/``request`` interface as the ``requests`` module::
+
+    r = self.manager.http.get(url, headers=headers)
+
+Every request goes through a single set of keep-alive connection pools, so thousands of cases against one challenge
+host reuse a handful of sockets instead of paying for a fresh TCP and TLS handshake each time. The client is
+configured with the following manager options:
+
+- ``http-connections``: the maximum number of open connections to a single host. Threads wait for a free connection
+  once this is reached.
+- ``http-retries``: the number of times a failed connection or a ``429``/``5xx`` response to an idempotent request is
+  retried.
+- ``http-backoff``: the backoff factor (in seconds) between retries.
+- ``http-timeout``: the default connect and read timeout (in seconds) for requests which don't specify one.
+
+Units with an ``async def evaluate`` (see :mod:`katana.engine`) should use the ``*_async`` variants, which run the
+request in an I/O thread rather than blocking the event loop::
+
+    r = await self.manager.http.get_async(url, headers=headers)
+
+Cookies are never shared between requests made through the client, just like the ``requests`` module functions.
+Units which need a cookie jar (e.g. to stay logged in) can create a session with :meth:`HttpClient.session`, which
+still uses the shared connection pools.
+
+``GET`` and ``HEAD`` responses are kept in a :class:`ResponseCache`, keyed by the method, URL, body and headers
+(including cookies) of the request. The same page is often requested by the target download and several units, and
+all but the first request are answered from the cache. Concurrent requests for the same key wait for a single fetch.
+Only successful responses (``200``, ``203``, ``301`` and ``304``) are stored, so a page which doesn't exist yet (e.g.
+an uploaded file) is requested again. Responses marked ``no-store``, ``no-cache``, ``private`` or ``max-age=0`` by
+their ``Cache-Control`` header are never stored, and a smaller ``max-age`` shortens the time a response is used. The
+cache is configured with the following manager options:
+
+- ``http-cache-size``: the size of the in-memory cache (in megabytes). Zero disables the cache.
+- ``http-cache-ttl``: the number of seconds a response is used without asking the server again. Once expired, a
+  response with an ``ETag`` or ``Last-Modified`` header is revalidated with a conditional request, so an unchanged
+  page costs a ``304 Not Modified`` response.
+- ``http-cache-dir``: if set, responses evicted from memory are spilled to this directory (up to
+  ``http-cache-size`` megabytes), and are available to later runs once revalidated.
+
+Streaming requests (e.g. target downloads) are answered from the cache when possible. Their responses are only
+stored if the server reports a ``Content-Length`` below ``ResponseCache.STREAM_LIMIT``, in which case the content is
+read up front. Larger responses are left to the caller.
+
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Callable
+import collections
+import functools
+import threading
+import hashlib
+import asyncio
+import pickle
+import time
+import uuid
+import os
+
+import requests
+import requests.adapters
+from urllib3.util.retry import Retry
+
+# Responses which are worth retrying
+RETRY_STATUS = [429, 500, 502, 503, 504]
+# Request methods which are answered from the response cache
+CACHE_METHODS = ["GET", "HEAD"]
+# Response status codes which are stored in the response cache
+CACHE_STATUS = [200, 203, 301, 304]
+# Cache-Control directives which keep a response out of the response cache
+UNCACHEABLE_DIRECTIVES = ["no-store", "no-cache", "private"]
+# Request arguments which make a request uncacheable
+UNCACHEABLE_ARGS = ["files", "auth", "hooks"]
+
+
+def cache_control(response: requests.Response) -> Dict[str, Any]:
+    """ Parse the ``Cache-Control`` header of a response. Directives without
+    a value map to True, and ``max-age`` maps to a number of seconds. """
+
+    directives = {}
+    for directive in response.headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().lower().partition("=")
+        if not name:
+            continue
+        if name == "max-age":
+            try:
+                directives[name] = max(0, int(value.strip('"')))
+            except ValueError:
+                # A malformed max-age means the response is stale
+                directives[name] = 0
+        else:
+            directives[name] = value or True
+
+    return directives
+
+
+@dataclass
+class CachedResponse(object):
+    """ The parts of a response needed to rebuild it later """
+
+    url: str
+    status_code: int
+    reason: str
+    headers: Dict[str, str]
+    content: bytes
+    encoding: str
+    # When the response was received (or last revalidated)
+    stored: float = field(default_factory=time.time)
+    # Seconds the server allows the response to be used (from max-age)
+    max_age: float = float("inf")
+
+    @classmethod
+    def from_response(cls, response: requests.Response) -> CachedResponse:
+        return cls(
+            response.url,
+            response.status_code,
+            response.reason,
+            dict(response.headers),
+            response.content,
+            response.encoding,
+            max_age=cache_control(response).get("max-age", float("inf")),
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    def validators(self) -> Dict[str, str]:
+        """ Headers for a conditional request revalidating this response """
+
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+
+        return headers
+
+    def response(self) -> requests.Response:
+        """ Build a new response object. Each caller gets its own copy. """
+
+        response = requests.Response()
+        response.url = self.url
+        response.status_code = self.status_code
+        response.reason = self.reason
+        response.headers = requests.structures.CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response._content = self.content
+        response._content_consumed = True
+
+        return response
+
+
+class ResponseCache(object):
+    """ In-memory least recently used cache of HTTP responses, with an
+    optional spill directory.
+
+    :property manager: The manager (or any configuration) holding the cache
+                       options
+    :property entries: Cached responses in least recently used order
+    :property size: The size of all responses in memory
+    :property pending: Events signalled when an in-flight fetch completes
+    :property spilled: Size of each spilled response in least recently used
+                       order (loaded on first use)
+    """
+
+    # Largest streamed response which is read up front and stored
+    STREAM_LIMIT: int = 1024 * 1024
+
+    def __init__(self, manager: Any):
+        super(ResponseCache, self).__init__()
+
+        self.manager = manager
+        self.lock = threading.Lock()
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.size = 0
+        self.pending: Dict[str, threading.Event] = {}
+        self.spilled: collections.OrderedDict = None
+        self.spilled_size = 0
+
+    @property
+    def limit(self) -> int:
+        """ Maximum size of the cache in bytes """
+        return int(self.manager["manager"].getfloat("http-cache-size") * 1024 * 1024)
+
+    @property
+    def ttl(self) -> float:
+        """ Seconds a response is used before revalidating it """
+        return self.manager["manager"].getfloat("http-cache-ttl")
+
+    @property
+    def path(self) -> str:
+        """ The spill directory, or an empty string if spilling is disabled """
+        return os.path.expanduser(self.manager["manager"]["http-cache-dir"])
+
+    def cacheable(self, method: str, kwargs: Dict[str, Any]) -> bool:
+        """ Whether a request with these arguments may use the cache """
+
+        if self.limit <= 0 or method.upper() not in CACHE_METHODS:
+            return False
+
+        return not any(kwargs.get(name) for name in UNCACHEABLE_ARGS)
+
+    def key(
+        self,
+        method: str,
+        url: str,
+        kwargs: Dict[str, Any],
+        session: requests.Session = None,
+    ) -> str:
+        """ Build the cache key for a request. The request is prepared in
+        order to normalize the URL parameters, body, headers and cookies. If
+        a session is given, its cookies and default headers are included the
+        same way as when the request is sent. """
+
+        request = requests.Request(
+            method.upper(),
+            url,
+            params=kwargs.get("params"),
+            data=kwargs.get("data"),
+            json=kwargs.get("json"),
+            headers=kwargs.get("headers"),
+            cookies=kwargs.get("cookies"),
+        )
+        if session is not None:
+            request = session.prepare_request(request)
+        else:
+            request = request.prepare()
+
+        h = hashlib.sha256()
+        h.update(request.method.encode("utf-8") + b"\0")
+        h.update(request.url.encode("utf-8") + b"\0")
+        for name, value in sorted(request.headers.items()):
+            h.update("{0}: {1}\0".format(name.lower(), value).encode("utf-8"))
+        body = request.body or b""
+        h.update(body if isinstance(body, bytes) else body.encode("utf-8"))
+        h.update(b"\0" + repr(kwargs.get("allow_redirects", True)).encode("utf-8"))
+
+        return h.hexdigest()
+
+    def fetch(
+        self,
+        key: str,
+        send: Callable[[Dict[str, str]], requests.Response],
+        stream: bool = False,
+    ) -> requests.Response:
+        """ Answer a request from the cache, or send it. ``send`` is called
+        with any extra headers for the request (used for revalidation). Only
+        one thread sends a request for a given key at a time. Other threads
+        wait for it, and then use the cached response. """
+
+        while True:
+            with self.lock:
+                entry = self._get(key)
+                if entry is not None and time.time() - entry.stored < min(
+                    self.ttl, entry.max_age
+                ):
+                    return entry.response()
+
+                event = self.pending.get(key)
+                if event is None:
+                    # We are responsible for fetching this key
+                    event = self.pending[key] = threading.Event()
+                    break
+
+            # Someone else is fetching this. Check the cache again afterwards.
+            event.wait()
+
+        try:
+            headers = entry.validators() if entry is not None else {}
+            response = send(headers)
+
+            # Our copy is still valid
+            if response.status_code == 304 and entry is not None and headers:
+                response.close()
+                entry.stored = time.time()
+                with self.lock:
+                    self._put(key, entry)
+                return entry.response()
+
+            # Large streamed content belongs to the caller
+            if stream and not self._small(response):
+                return response
+
+            if self._storable(response):
+                with self.lock:
+                    self._put(key, CachedResponse.from_response(response))
+
+            return response
+        finally:
+            with self.lock:
+                del self.pending[key]
+            event.set()
+
+    def _small(self, response: requests.Response) -> bool:
+        """ Whether a streamed response is small enough to read up front """
+
+        try:
+            length = int(response.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return False
+
+        return length <= self.STREAM_LIMIT
+
+    def _storable(self, response: requests.Response) -> bool:
+        """ Whether the response may be saved in the cache """
+
+        # Errors are likely temporary, and missing pages may appear later
+        if response.status_code not in CACHE_STATUS:
+            return False
+
+        # The server asked us not to
+        directives = cache_control(response)
+        if any(name in directives for name in UNCACHEABLE_DIRECTIVES):
+            return False
+        if directives.get("max-age", 1) <= 0:
+            return False
+
+        return len(response.content) <= self.limit
+
+    def _get(self, key: str) -> CachedResponse:
+        """ Find a response in memory or on disk. The lock must be held. """
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.path == "":
+            return None
+
+        # Bring a spilled response back into memory
+        self._load()
+        if key not in self.spilled:
+            return None
+
+        try:
+            with open(os.path.join(self.path, key), "rb") as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+
+        self._put(key, entry)
+
+        return entry
+
+    def _put(self, key: str, entry: CachedResponse) -> None:
+        """ Save a response in memory, evicting (and maybe spilling) the least
+        recently used responses as needed. The lock must be held. """
+
+        if key in self.entries:
+            self.size -= self.entries.pop(key).size
+
+        self.entries[key] = entry
+        self.size += entry.size
+
+        while self.size > self.limit and self.entries:
+            old_key, old_entry = self.entries.popitem(last=False)
+            self.size -= old_entry.size
+            self._spill(old_key, old_entry)
+
+    def _spill(self, key: str, entry: CachedResponse) -> None:
+        """ Write an evicted response to the spill directory. The lock must be
+        held. """
+
+        if self.path == "":
+            return
+
+        self._load()
+
+        # Write to a temporary file, so partial files are never loaded
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            temp = os.path.join(self.path, "." + uuid.uuid4().hex)
+            with open(temp, "wb") as f:
+                pickle.dump(entry, f)
+            os.replace(temp, os.path.join(self.path, key))
+        except OSError:
+            return
+
+        if key in self.spilled:
+            self.spilled_size -= self.spilled.pop(key)
+        self.spilled[key] = entry.size
+        self.spilled_size += entry.size
+
+        # Remove the least recently spilled responses
+        while self.spilled_size > self.limit and self.spilled:
+            old_key, size = self.spilled.popitem(last=False)
+            self.spilled_size -= size
+            try:
+                os.unlink(os.path.join(self.path, old_key))
+            except OSError:
+                pass
+
+    def _load(self) -> None:
+        """ Build the index of spilled responses, if needed. The lock must be
+        held. """
+
+        if self.spilled is not None:
+            return
+
+        entries = []
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            names = []
+
+        for name in names:
+            # Skip partial files from other runs
+            if name.startswith("."):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+
+        self.spilled = collections.OrderedDict(
+            (name, size) for mtime, name, size in sorted(entries)
+        )
+        self.spilled_size = sum(self.spilled.values())
+
+
+class HttpClient(object):
+    """ Pooled HTTP client shared by every unit of a Manager. The connection
+    pools are created on first use, so the configuration may be changed
+    before that point.
+
+    :property manager: The manager (or any configuration) holding the client
+                       options
+    :property adapter: The transport adapter holding the connection pools
+    """
+
+    # Number of distinct hosts with cached connection pools
+    POOLS: int = 32
+
+    def __init__(self, manager: Any):
+        super(HttpClient, self).__init__()
+
+        self.manager = manager
+        self.adapter: requests.adapters.HTTPAdapter = None
+        self.cache = ResponseCache(manager)
+
+        # Protects creation of the adapter
+        self.lock = threading.Lock()
+        # Thread-local sessions using the shared adapter
+        self.local = threading.local()
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """ Make a request with the shared connection pools. This accepts the
+        same arguments as ``requests.request``. ``GET`` and ``HEAD`` requests
+        may be answered from the response cache. """
+
+        if not self.cache.cacheable(method, kwargs):
+            return self._send(method, url, kwargs)
+
+        def send(headers: Dict[str, str]) -> requests.Response:
+            if headers:
+                args = dict(kwargs)
+                args["headers"] = dict(kwargs.get("headers") or {}, **headers)
+            else:
+                args = kwargs
+            return self._send(method, url, args)
+
+        key = self.cache.key(method, url, kwargs, self._session())
+        return self.cache.fetch(key, send, kwargs.get("stream", False))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """ Make a GET request (see ``requests.get``) """
+        kwargs.setdefault("allow_redirects", True)
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """ Make a POST request (see ``requests.post``) """
+        return self.request("POST", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """ Make a HEAD request (see ``requests.head``) """
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    async def request_async(
+        self, method: str, url: str, **kwargs
+    ) -> requests.Response:
+        """ Make a request (see ``HttpClient.request``) from a coroutine. The
+        request runs in the I/O threads of the event loop. """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.request, method, url, **kwargs)
+        )
+
+    async def get_async(self, url: str, **kwargs) -> requests.Response:
+        """ Make a GET request from a coroutine """
+        kwargs.setdefault("allow_redirects", True)
+        return await self.request_async("GET", url, **kwargs)
+
+    async def post_async(self, url: str, **kwargs) -> requests.Response:
+        """ Make a POST request from a coroutine """
+        return await self.request_async("POST", url, **kwargs)
+
+    def session(self) -> requests.Session:
+        """ Create a new session with its own cookie jar, which makes requests
+        through the shared connection pools. Unlike ``HttpClient.request``,
+        the session has no default timeout. """
+
+        adapter = self._adapter()
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def close(self) -> None:
+        """ Close all pooled connections. The client may still be used
+        afterwards, and will open new connections as needed. """
+
+        with self.lock:
+            if self.adapter is not None:
+                self.adapter.close()
+
+    def _send(
+        self, method: str, url: str, kwargs: Dict[str, Any]
+    ) -> requests.Response:
+        """ Send a request through the thread-local session """
+
+        session = self._session()
+
+        kwargs = dict(kwargs)
+        kwargs.setdefault("timeout", self.manager["manager"].getfloat("http-timeout"))
+
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            # Don't leak cookies into the next request
+            session.cookies.clear()
+
+    def _session(self) -> requests.Session:
+        """ The session of the current thread """
+
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.session()
+
+        return session
+
+    def _adapter(self) -> requests.adapters.HTTPAdapter:
+        """ Create the shared adapter based on the current configuration """
+
+        with self.lock:
+            if self.adapter is None:
+                config = self.manager["manager"]
+                retry = Retry(
+                    total=config.getint("http-retries"),
+                    backoff_factor=config.getfloat("http-backoff"),
+                    status_forcelist=RETRY_STATUS,
+                    raise_on_status=False,
+                )
+                self.adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=self.POOLS,
+                    pool_maxsize=config.getint("http-connections"),
+                    pool_block=True,
+                    max_retries=retry,
+                )
+
+        return self.adapter
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`ImageCache` decodes each image target once, and shares the decoded pixels between every unit working on
+the target (e.g. ``stegsolve``, ``zsteg``, ``qrcode`` and ``tesseract``). It is available to units as
+``self.manager.images``::
+
+    image = self.manager.images.get(self.target)
+    if image is None:
+        raise NotApplicable("cannot read image")
+
+    for row in image.pixels:
+        ...
+
+The pixels are held in a read-only array with the shape (height, width, channels), which is handed to every unit
+without a copy. Images with modes other than ``L``, ``LA``, ``RGB`` and ``RGBA`` (e.g. palettes or 16-bit images)
+are converted to ``RGB`` or ``RGBA``. Units needing a PIL image (e.g. to pass to another library) can use
+:meth:`DecodedImage.image`, which is much cheaper than decoding the file again.
+
+Entries are keyed by the hash of the target content. The image of a target is released once the target is
+completed, and the ``image-cache`` manager option bounds the size of the cache (in megabytes). Once it is exceeded,
+the least recently used images are released. Images larger than the whole cache are decoded for each request
+instead. Targets which are not images are remembered as well, so they are only opened once.
+
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import collections
+import threading
+
+from PIL import Image
+import numpy as np
+
+# Modes which are kept as they are when decoding
+MODES = ("L", "LA", "RGB", "RGBA")
+
+
+def decode(img: Image.Image) -> Tuple[np.ndarray, str]:
+    """ Decode an image into an array of 8-bit channels.
+
+    :param img: The Python PIL image object
+    :return: An array with the shape (height, width, channels), and the name
+             of each channel (e.g. "RGBA")
+    """
+
+    # Other modes (e.g. palettes or 16-bit images) are converted to colors
+    if img.mode not in MODES:
+        if "A" in img.mode or "transparency" in img.info:
+            img = img.convert("RGBA")
+        else:
+            img = img.convert("RGB")
+
+    pixels = np.asarray(img)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+
+    return pixels, img.mode
+
+
+@dataclass
+class DecodedImage(object):
+    """ The decoded pixels of an image target """
+
+    # Read-only array with the shape (height, width, channels)
+    pixels: np.ndarray
+    # The name of each channel (e.g. "RGBA")
+    mode: str
+
+    @property
+    def size(self) -> int:
+        """ The size of the pixels in bytes """
+        return self.pixels.nbytes
+
+    def image(self) -> Image.Image:
+        """ Create a PIL image from the decoded pixels """
+        if self.pixels.shape[2] == 1:
+            return Image.fromarray(self.pixels[:, :, 0])
+        return Image.fromarray(self.pixels)
+
+
+class ImageCache(object):
+    """ Decoded images shared by every unit, bounded by the ``image-cache``
+    option
+
+    :property manager: The manager (or any configuration) holding the options
+    :property entries: The decoded image for each target hash (or None if the
+                       target is not an image), from least to most recently
+                       used
+    :property loading: A lock for each target hash being decoded
+    :property size: The total size of the cached images in bytes
+    :property hits: The number of requests served from the cache
+    :property misses: The number of images decoded
+    :property evictions: The number of images released to respect the limit
+    """
+
+    def __init__(self, manager: Any):
+        super(ImageCache, self).__init__()
+
+        self.manager = manager
+        self.entries: Dict[str, Optional[DecodedImage]] = collections.OrderedDict()
+        self.loading: Dict[str, threading.Lock] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Protects the entries, the loading locks and the statistics
+        self.lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """ The maximum size of the cache in bytes """
+        return self.manager["manager"].getint("image-cache") * 1024 * 1024
+
+    def get(self, target: Any) -> Optional[DecodedImage]:
+        """ Get the decoded image for a target, decoding it if needed. If
+        several units request the same image at once, it is only decoded by
+        the first of them.
+
+        :param target: The target to decode
+        :return: The decoded image, or None if the target is not an image
+        """
+
+        if not target.is_file:
+            return None
+
+        key = target.hash.hexdigest()
+
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            loading = self.loading.setdefault(key, threading.Lock())
+
+        with loading:
+
+            # Another unit may have decoded it while we waited
+            with self.lock:
+                if key in self.entries:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    return self.entries[key]
+
+            image = self._decode(target.path)
+
+            with self.lock:
+                self.misses += 1
+                self.loading.pop(key, None)
+
+                # Images larger than the cache, or of targets which were
+                # already released, are not kept
+                if target.completed or (image is not None and image.size > self.limit):
+                    return image
+
+                self.entries[key] = image
+                self.size += image.size if image is not None else 0
+                self._evict()
+
+        return image
+
+    def release(self, target: Any) -> None:
+        """ Release the decoded image of a completed target
+
+        :param target: The completed target
+        """
+
+        # The target may be completed before it was hashed
+        if not hasattr(target, "hash"):
+            return
+
+        with self.lock:
+            image = self.entries.pop(target.hash.hexdigest(), None)
+            if image is not None:
+                self.size -= image.size
+
+    def clear(self) -> None:
+        """ Release every decoded image """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _decode(self, path: str) -> Optional[DecodedImage]:
+        """ Decode the image at the given path, or return None if it is not
+        an image """
+
+        try:
+            with Image.open(path) as img:
+                pixels, mode = decode(img)
+        except Exception:
+            return None
+
+        # Every unit shares the same array, so it must not be modified
+        pixels.flags.writeable = False
+
+        return DecodedImage(pixels, mode)
+
+    def _evict(self) -> None:
+        """ Release the least recently used images until the cache fits
+        within the limit. The lock must be held. """
+
+        limit = self.limit
+        while self.size > limit and self.entries:
+            _, image = self.entries.popitem(last=False)
+            if image is not None:
+                self.size -= image.size
+                self.evictions += 1
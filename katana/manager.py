@@ -3,22 +3,31 @@
 units against an arbitrary number of Targets of varying types in a
 multithreaded manner and reporting results to a Monitor object """
 from dataclasses import dataclass, field
-from typing import List, Any, Generator, Dict, Callable, Tuple
+from typing import List, Any, Generator, Dict, Callable, Set, Tuple, Type
+import concurrent.futures
 import configparser
+import pickle
+import asyncio
 import threading
-import queue
 import time
 import os
 import sys
-import regex as re
 import shutil
 import requests
 
 
 # katana imports
 from katana.target import Target, BadTarget
-from katana.unit import Unit, Finder
+from katana.unit import Unit, Finder, NotApplicable
 from katana.monitor import Monitor
+from katana.scheduler import Scheduler
+from katana.matcher import FlagMatcher
+import katana.executor
+import katana.cache
+import katana.httpclient
+import katana.runner
+import katana.images
+import katana.engine
 import katana.util
 
 
@@ -50,12 +59,22 @@ class Manager(configparser.ConfigParser):
         work queue maintains the state of the case generator and priority for
         the unit. Priority is taken directly from the unit. `generator` is the
         result of `unit.evaluate` and will be called when the first thread
-        begins evaluating the unit. """
+        begins evaluating the unit. `batch` is the number of cases pulled from
+        the generator per dequeue, and is adapted based on `latency` (the
+        average seconds per case). For the "replay" action, `entry` is the
+        path to the cached results which are replayed instead. For the
+        "construct" action, `unit` is None until a thread constructs an
+        instance of `unit_class` for `target`. """
 
         priority: float
         action: str = field(compare=False)
         unit: Unit = field(compare=False)
         generator: Generator[Any, None, None] = field(compare=False)
+        batch: int = field(default=10, compare=False)
+        latency: float = field(default=None, compare=False)
+        entry: str = field(default=None, compare=False)
+        unit_class: Type[Unit] = field(default=None, compare=False)
+        target: Target = field(default=None, compare=False)
 
     def __init__(self, monitor: Monitor = None, config_path=None, default_units=True):
 
@@ -81,6 +100,27 @@ class Manager(configparser.ConfigParser):
             "prioritize": True,
             "default-units": True,
             "max-depth": 10,
+            "executor": "thread",
+            "batch-time": 0.1,
+            "max-batch": 65536,
+            "cache-dir": "",
+            "cache-size": 1024,
+            "http-connections": 8,
+            "http-retries": 2,
+            "http-backoff": 0.2,
+            "http-timeout": 10,
+            "http-cache-size": 64,
+            "http-cache-ttl": 300,
+            "http-cache-dir": "",
+            "async-limit": 64,
+            "wordlist-range": 10000,
+            "process-limit": 4,
+            "process-limits": "",
+            "process-timeout": 120,
+            "process-cpu": 120,
+            "process-memory": 4096,
+            "process-output": 64,
+            "image-cache": 512,
         }
 
         if "manager" not in self:
@@ -105,15 +145,31 @@ class Manager(configparser.ConfigParser):
 
         # Create the unit finder for matching targets to units
         self.finder = Finder(self, use_default=default_units)
-        # This is the work queue
-        self.work = queue.PriorityQueue()
-        # This is the barrier which signals wait on and signals completion of
-        # evaluation. It is initialized in the `start` method
-        self.barrier: threading.Barrier = None
+        # This is the work queue. It also tracks outstanding work in order to
+        # signal completion of evaluation.
+        self.work = Scheduler()
         # Array of threads (also initialized in `start`)
         self.threads = []
+        # Process pool for the process/hybrid executors (created in `start`)
+        self.pool: concurrent.futures.ProcessPoolExecutor = None
+        # Unit classes which could not be shipped to the process pool
+        self.local_units = set()
+        # Cases submitted to the process pool which are not done yet
+        self.futures: Set[concurrent.futures.Future] = set()
+        # On-disk cache of unit results from previous runs
+        self.cache = katana.cache.ResultCache(self)
         # Flag pattern will be compiled upon running `start`
         self.flag_pattern = None
+        # Compiled flag matchers for each flag format
+        self.matchers: Dict[str, FlagMatcher] = {}
+        # Pooled HTTP client for targets and units
+        self.http = katana.httpclient.HttpClient(self)
+        # Runner for the external programs used by units
+        self.runner = katana.runner.ProcessRunner(self)
+        # Decoded images shared by the image units
+        self.images = katana.images.ImageCache(self)
+        # Event loop for units with a coroutine evaluate (started in `start`)
+        self.engine: katana.engine.AsyncEngine = None
 
         # This is dumb, and I don't know why we need it
         if "flag-format" in self["manager"]:
@@ -128,8 +184,8 @@ class Manager(configparser.ConfigParser):
         self.target_hash: Dict[str, Target] = {}
         # Number of cases completed (for stats)
         self.cases_completed = 0
-        # This might be a bad idea
-        self.lock: threading.Lock = threading.Lock()
+        # Number of cases evaluated in the process pool (for stats)
+        self.cases_remote = 0
         # Downloads that are in progress
         self.downloads: List[Download] = []
 
@@ -144,9 +200,7 @@ class Manager(configparser.ConfigParser):
 
         # Flag Format needs to be compiled
         if option == "flag-format":
-            self.flag_pattern = re.compile(
-                bytes(value, "utf-8"), re.IGNORECASE | re.MULTILINE | re.DOTALL
-            )
+            self.flag_pattern = self.flag_matcher(value).pattern
         elif option == "threads":
             if self.running:
                 # We cannot modify the thread count after starting the manager
@@ -158,7 +212,7 @@ class Manager(configparser.ConfigParser):
         self,
         url: str,
         blocksize: int = 512,
-        method: Callable = requests.get,
+        method: Callable = None,
         *args,
         **kwargs,
     ) -> Tuple[requests.Request, Generator[bytes, None, None]]:
@@ -168,12 +222,16 @@ class Manager(configparser.ConfigParser):
         :type url: str
         :param blocksize: The size of each block of data to return
         :type blocksize: int
-        :param method: The method used to request the page, defaults to ``requests.get``
+        :param method: The method used to request the page, defaults to ``Manager.http.get``
         :type method: Callable
         :returns: A tuple of the request object and a generator returning the chunks
         :rtype: Tuple[requests.Request, Generator[bytes, None, None]]
         """
 
+        # Requests go through the pooled HTTP client by default
+        if method is None:
+            method = self.http.get
+
         # Initiate the connection
         request: requests.Request = method(url, stream=True, *args, **kwargs)
 
@@ -239,8 +297,11 @@ class Manager(configparser.ConfigParser):
     def register_data(self, unit: Unit, data: Any, recurse: bool = True) -> None:
         """ Register arbitrary data results with the manager """
 
-        # Sometimes units do weird things
-        if len(data) < int(self["manager"]["min-data"]):
+        # Sometimes units do weird things. Containers (e.g. a dictionary of
+        # results) aren't subject to the minimum size.
+        if isinstance(data, (str, bytes)) and len(data) < int(
+            self["manager"]["min-data"]
+        ):
             return
 
         # Notify the monitor of the data
@@ -264,6 +325,23 @@ class Manager(configparser.ConfigParser):
         # Notify the monitor
         self.monitor.on_flag(self, unit, flag)
 
+    def merge(self, unit: Unit, result: Any) -> None:
+        """ Merge the result of a case into the state of the unit (see
+        ``Unit.merge``). A case evaluated in a worker process only has a copy
+        of the unit, so this is replayed against the real unit here. """
+        unit.merge(result)
+
+    def complete(self, unit: Unit) -> None:
+        """ Mark the unit completed, so no further cases are evaluated. Units
+        which may be evaluated in a worker process use this instead of setting
+        ``completed`` on their copy. """
+        unit.completed = True
+
+    def incomplete(self, unit: Unit) -> None:
+        """ The results of the unit are incomplete (e.g. a program it ran was
+        killed), so they are not saved in the result cache. """
+        self.cache.fail(unit)
+
     def find_flag(self, unit: Unit, data: Any) -> bool:
         """ Search arbitrary data for flags matching the given flag format in
         the manager configuration """
@@ -282,43 +360,27 @@ class Manager(configparser.ConfigParser):
                 found += self.find_flag(unit, item)
             return found > 0
 
-        # We deal with bytes here
-        if isinstance(data, str):
-            data = data.encode("utf-8")
-
-        # CALEB: this is a hack to remove XML from flags, and check that as
-        # well. It was observed to be needed for some weird XML challenges.
-        no_xml = re.sub(b"<[^<]+>", b"", data)
-        if no_xml != data:
-            self.find_flag(unit, no_xml)
-
-        # Search the data for flags
-        match = re.search(
-            bytes(unit.target.config["manager"]["flag-format"], "utf-8"),
-            data,
-            re.DOTALL | re.MULTILINE | re.IGNORECASE,
-        )
-        if match:
-            # Flags should be printable
-            try:
-                found = match.group().decode("utf-8")
-            except UnicodeDecodeError:
-                pass
-            else:
-                if katana.util.isprintable(found):
-                    # Strict flags means that the flag will be alone in the output
-                    if (
-                        unit is not None
-                        and unit.STRICT_FLAGS
-                        and len(found) == len(data)
-                    ):
-                        self.register_flag(unit, found)
-                        return True
-                    elif unit is None or not unit.STRICT_FLAGS:
-                        self.register_flag(unit, found)
-                        return True
-
-        return False
+        # Search the data for flags with the matcher for this configuration
+        if unit is not None:
+            matcher = self.flag_matcher(unit.target.config["manager"]["flag-format"])
+        else:
+            matcher = self.flag_matcher(self["manager"]["flag-format"])
+
+        # Strict flags means that the flag will be alone in the output
+        flags = matcher.search(data, strict=unit is not None and unit.STRICT_FLAGS)
+        for flag in flags:
+            self.register_flag(unit, flag)
+
+        return len(flags) > 0
+
+    def flag_matcher(self, flag_format: str) -> FlagMatcher:
+        """ Find the compiled flag matcher for the given flag format. Matchers
+        are shared by every unit using the same flag format. """
+
+        try:
+            return self.matchers[flag_format]
+        except KeyError:
+            return self.matchers.setdefault(flag_format, FlagMatcher(flag_format))
 
     def target(
         self,
@@ -339,6 +401,14 @@ class Manager(configparser.ConfigParser):
         if "flag-format" not in self["manager"]:
             raise RuntimeError("manager: flag-format not specified")
 
+        # Ensure the execution backend is known
+        if self["manager"]["executor"] not in katana.executor.EXECUTORS:
+            raise RuntimeError(
+                "manager: executor: expected one of: {0}".format(
+                    ", ".join(katana.executor.EXECUTORS)
+                )
+            )
+
         self.finder.validate()
 
     def queue_target(
@@ -418,9 +488,9 @@ class Manager(configparser.ConfigParser):
             if target.completed:
                 return
 
-            # Enumerate valid units
-            for unit in self.finder.match(target, scale=scale):
-                self.queue(unit)
+            # Enumerate possibly valid units. They are constructed later.
+            for unit_class in self.finder.candidates(target, scale=scale):
+                self.defer(unit_class, target)
 
             # Tell the unit we are done adding units
             target.building = False
@@ -429,9 +499,29 @@ class Manager(configparser.ConfigParser):
             if target.units_left <= 0:
                 target.completed = True
 
+        def _do_queue_held():
+
+            try:
+                _do_queue()
+            except Exception as e:
+                self.monitor.on_manager_exception(self, e)
+            finally:
+                if parent is not None:
+                    parent.origin.rem_unit()
+                self.work.task_done()
+
         if background:
             # Queue the target at a later time, so we can continue (e.g. w/ REPL)
             t = threading.Thread(target=_do_queue, daemon=True).start()
+        elif self.engine is not None and self.engine.in_loop():
+            # Building the target blocks (e.g. downloading a URL or running
+            # libmagic), which would stall every coroutine on the event loop,
+            # so it is built in an I/O thread instead. Until then, the work is
+            # outstanding and the origin target is not completed.
+            self.work.hold()
+            if parent is not None:
+                parent.origin.add_unit()
+            self.engine.io.submit(_do_queue_held)
         else:
             _do_queue()
 
@@ -453,18 +543,75 @@ class Manager(configparser.ConfigParser):
             unit.PRIORITY,  # Unit priority
             "init",  # Initialization of work item
             unit,  # The unit itself
-            unit.enumerate(),
-        )  # The generator to get the next case
+            None,  # The generator to get the next case (see `_prepare`)
+            unit.BATCH_SIZE or 10,  # Initial number of cases per dequeue
+        )
+        self._prepare(item)
 
         # Increment unit count for target
         unit.origin.add_unit()
 
-        # Queue the item for usage
+        # Queue the item for usage (this wakes a sleeping thread)
+        self.work.put(item)
+
+    def defer(self, unit_class: Type[Unit], target: Target) -> None:
+        """ Queue the given unit class to be constructed and evaluated against
+        the target. Constructing a unit may be expensive (e.g. parsing the
+        target or making network requests), so this is done by the first
+        thread to dequeue the item rather than while matching units. A unit
+        which raises ``NotApplicable`` at that point is silently dropped. """
+
+        # Check if we are completed
+        if target.origin.completed:
+            return
+
+        item = Manager.WorkItem(
+            unit_class.PRIORITY,
+            "construct",
+            None,
+            None,
+            unit_class.BATCH_SIZE or 10,
+            unit_class=unit_class,
+            target=target,
+        )
+
+        # Increment unit count for target
+        target.origin.add_unit()
+
+        # Queue the item for usage (this wakes a sleeping thread)
         self.work.put(item)
 
-        # Ensure sleeping threads wake up
-        if self.barrier is not None:
-            self.barrier.reset()
+    def _prepare(self, item: WorkItem) -> None:
+        """ Decide how a newly queued unit is evaluated. Results are replayed
+        from a previous run if possible, otherwise the unit is evaluated and
+        the results recorded. """
+
+        # Replay the results from a previous run if possible
+        item.entry = self.cache.lookup(item.unit)
+        if item.entry is not None:
+            item.action = "replay"
+        else:
+            # Record the results of this unit for later runs
+            self.cache.record(item.unit)
+            item.action = "init"
+            item.generator = item.unit.enumerate()
+
+    def _construct(self, item: WorkItem) -> bool:
+        """ Construct the unit for a deferred work item. Returns False if the
+        unit is not applicable to the target. """
+
+        try:
+            item.unit = item.unit_class(self, item.target)
+        except NotApplicable:
+            return False
+        except Exception as e:
+            # Broken constructors shouldn't take down the thread
+            self.monitor.on_manager_exception(self, e)
+            return False
+
+        self._prepare(item)
+
+        return True
 
     def requeue(self, item: WorkItem) -> None:
         """ Requeue an item which has more cases left to evaluate """
@@ -479,9 +626,6 @@ class Manager(configparser.ConfigParser):
         # Requeue the item
         self.work.put(item)
 
-        if self.barrier is not None:
-            self.barrier.reset()
-
     def start(self) -> None:
         """ Start the needed threads and begin evaluation of units. You can
         still add units to the queue for evaluation after start is called up
@@ -499,10 +643,21 @@ class Manager(configparser.ConfigParser):
         # issues moving forward
         self.validate()
 
-        # Create the barrier object
-        self.barrier = threading.Barrier(self["manager"].getint("threads") + 1)
         self.threads = [None] * self["manager"].getint("threads")
         self.running = True
+        self.runner.start()
+
+        # Create the process pool for CPU-bound units
+        if self["manager"]["executor"] != "thread":
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self["manager"].getint("threads")
+            )
+            # Spin up the worker processes before any worker threads exist
+            self.pool.submit(int).result()
+
+        # Start the event loop for I/O bound units
+        self.engine = katana.engine.AsyncEngine(self["manager"].getint("async-limit"))
+        self.engine.start()
 
         # Start the threads (will automatically begin processing units)
         for n in range(len(self.threads)):
@@ -524,60 +679,33 @@ class Manager(configparser.ConfigParser):
         if not self.running:
             return True
 
-        # Record starting and expected ending time to comply with timeout
-        if timeout is not None:
-            join_time = time.time()
-            stop_time = join_time + timeout
-        # Indicates we have already requested threads to cleanly exit
-        aborting = True
         # Timeout was hit
         did_timeout = False
 
-        while True:
-
-            try:
-                # Wait for all threads to meet the barrier, which indicates all
-                # unit/case pairs are processed
-                if timeout is not None:
-                    self.barrier.wait(stop_time - time.time())
-                else:
-                    self.barrier.wait()
-            except threading.BrokenBarrierError:
-                pass
-            except KeyboardInterrupt:
-
-                # If we have already signaled, and we catch another
-                # Ctrl+C, just exit and let the user force quit at the
-                # threading `join` call below
-                if aborting is True:
-                    break
-                # Signal threads to exit cleanly after current unit/case pair
-                # evaluation is completed.
-                self._signal_complete()
-                aborting = True
-            else:
-                # Just in case, we signal completion, but all threads should
-                # exit when the barrier is reached successfully
-                self._signal_complete()
-                break
-
-            # Signal completion if our timeout has expired
-            if timeout is not None and time.time() >= stop_time:
-                did_timeout = True
-                self._signal_complete()
-                break
+        try:
+            # Wait for all outstanding unit/case pairs to be processed
+            did_timeout = not self.work.join(timeout)
+        except KeyboardInterrupt:
+            # Threads will exit cleanly after their current unit/case pair
+            # evaluation is completed.
+            pass
 
         # Make sure no one calls abort
         self.running = False
 
-        # Release all threads
-        self._signal_complete()
-        self.barrier.reset()
+        # Release all threads, and kill any programs they are waiting on
+        self.work.close()
+        self.runner.stop()
 
         # Wait on all threads to complete
         for thread in self.threads:
             thread.join()
 
+        self._shutdown_pool()
+        self.engine.stop()
+        self.http.close()
+        self.images.clear()
+
         # Notify the monitor that we are done
         self.monitor.on_completion(self, did_timeout)
 
@@ -591,25 +719,27 @@ class Manager(configparser.ConfigParser):
             return
 
         # Signal threads to exit, and then wait for it to happen
-        self._signal_complete()
+        self.work.close()
+        self.runner.stop()
         for thread in self.threads:
             thread.join()
 
+        self._shutdown_pool()
+        self.engine.stop()
+        self.http.close()
+        self.images.clear()
+
         self.monitor.on_completion(self, True)
 
-    def _signal_complete(self) -> None:
-        """ Send work items with high priority to signal closing down threads
-        """
+    def _shutdown_pool(self) -> None:
+        """ Shutdown the process pool, if one was started """
 
-        for thread in self.threads:
-            self.work.put(
-                Manager.WorkItem(
-                    -10000, "abort", None, None  # Priority  # Action  # Unit
-                )
-            )  # Generator
-
-        # Make all the workers wake up and grab these events
-        self.barrier.reset()
+        if self.pool is not None:
+            # Don't start evaluating cases which nobody is waiting on
+            for future in list(self.futures):
+                future.cancel()
+            self.pool.shutdown(wait=True)
+            self.pool = None
 
     def _thread(self, thread) -> None:
         """ This is the main method for each evaluator thread. It will monitor
@@ -618,65 +748,104 @@ class Manager(configparser.ConfigParser):
 
         while True:
 
-            try:
-                # Attempt to grab work from the queue
-                work: Manager.WorkItem = self.work.get(False)
-            except queue.Empty:
-                try:
-                    # Signal this thread is waiting for work
-                    # check again every 0.2 seconds, just in case
-                    self.monitor.on_work(self, thread, None, None)
-                    self.barrier.wait()
-                except threading.BrokenBarrierError:
-                    # A new unit was queued or the timeout happened
-                    # Check for new units
-                    continue
-                else:
-                    # All threads hit the barrier, we are free to exit
-                    break
+            # Attempt to grab work from the queue
+            work: Manager.WorkItem = self.work.get(block=False)
+            if work is None:
+                # Signal this thread is waiting for work, and sleep until a
+                # unit is queued or the manager is closed
+                self.monitor.on_work(self, thread, None, None)
+                work = self.work.get()
 
             # The parent is asking nicely to exit
-            if work.action == "abort":
-                self.work.task_done()
+            if work is None:
                 break
 
+            # Build the unit now that a thread is ready to evaluate it
+            if work.action == "construct" and (
+                work.target.origin.completed or not self._construct(work)
+            ):
+                work.target.origin.rem_unit()
+                self.work.task_done()
+                continue
+
             # Ignore the unit if it is already completed
             if work.unit.is_complete():
                 work.unit.origin.rem_unit()
                 self.work.task_done()
                 continue
 
-            # if work.action == "init":
-            # This is the first time the unit has run, so we need to
-            # initialize the generator for cases
-            #    work.generator = work.unit.enumerate()
+            # Replay cached results instead of evaluating the unit
+            if work.action == "replay":
+                try:
+                    self.cache.replay(work.unit, work.entry)
+                except OSError:
+                    # The entry was evicted after the unit was queued. Fall
+                    # back to evaluating the unit.
+                    self.cache.record(work.unit)
+                    work.action = "init"
+                    work.generator = work.unit.enumerate()
+                except Exception as e:
+                    self.monitor.on_exception(self, work.unit, e)
+
+                if work.action == "replay":
+                    work.unit.origin.rem_unit()
+                    self.work.task_done()
+                    continue
+
+            # I/O bound units are handed to the event loop, which now owns the
+            # work item until every case has been evaluated
+            if work.unit.has_async_evaluate():
+                self.monitor.on_work(self, thread, work.unit, None)
+                self.engine.submit(self._evaluate_async(work))
+                continue
 
-            # We have a unit to process, grab the next case
+            # We have a unit to process, grab the next cases. Only this thread
+            # holds the work item until it is requeued, so the generator is
+            # never advanced concurrently.
             cases = []
             empty = False
 
-            # This is a weird thing to do, since the queue is already protected by a lock...
-            # However, this ensures when we pull items off the queue and re-insert them that
-            # the priority will be maintained (otherwise another thread may grab a lower
-            # unit off the queue while this one is gone)
-            with self.lock:
+            try:
+                for i in range(work.batch):
+                    try:
+                        case = next(work.generator)
+                    except StopIteration:
+                        empty = True
+                        break
+                    cases.append(case)
+            except Exception as e:
+                self._on_exception(work.unit, e)
+                empty = True
+
+            # The cache needs to know about this batch before any other thread
+            # can pick up the requeued item
+            self.cache.begin(work.unit)
+
+            # Before we evaluate, place this case back on the queue in order to
+            # allow parallel processing of the cases
+            if not empty:
+                self.requeue(work)
+
+            # Time the batch in order to adapt the batch size
+            batch_start = time.time()
+            count = len(cases)
+
+            # Ship the cases off to the process pool if needed
+            if cases and self._is_remote(work.unit):
+                cases = self._evaluate_remote(thread, work.unit, cases)
+
+            # Prefer evaluating the whole batch at once if the unit supports it
+            if cases and work.unit.has_evaluate_batch():
+                self.monitor.on_work(self, thread, work.unit, cases[0])
+
                 try:
-                    for i in range(10):
-                        try:
-                            case = next(work.generator)
-                        except StopIteration:
-                            empty = True
-                            break
-                        cases.append(case)
+                    work.unit.evaluate_batch(cases)
                 except Exception as e:
-                    self.monitor.on_exception(self, work.unit, e)
-                    self.work.task_done()
-                    continue
+                    self._on_exception(work.unit, e)
 
-                # Before we evaluate, place this case back on the queue in order to
-                # allow parallel processing of the cases
-                if not empty:
-                    self.requeue(work)
+                for case in cases:
+                    self._case_completed(work.unit)
+                cases = []
 
             for case in cases:
                 # Notify the monitor of thread status (this should be a very short
@@ -688,19 +857,183 @@ class Manager(configparser.ConfigParser):
                     work.unit.evaluate(case)
                 except Exception as e:
                     # We got an exception, notify the monitor and continue
-                    self.monitor.on_exception(self, work.unit, e)
+                    self._on_exception(work.unit, e)
+
+                self._case_completed(work.unit)
+
+            if not empty and count > 0:
+                self._adjust_batch(work, time.time() - batch_start, count)
 
-                # Statistics
-                work.unit.origin.units_evaluated += 1
-                if work.unit.target is not work.unit.origin:
-                    work.unit.target.units_evaluated += 1
-                self.cases_completed += 1
+            # This may save the unit results to the cache
+            self.cache.end(work.unit, empty)
 
             if empty:
                 work.unit.origin.rem_unit()
 
+            # Cases from this batch are done. This may signal completion.
+            self.work.task_done()
+
+    async def _evaluate_async(self, work: WorkItem) -> None:
+        """ Evaluate every case of a unit with a coroutine ``evaluate``. This
+        runs on the event loop, and keeps as many cases in flight as the
+        engine allows. """
+
+        unit = work.unit
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        empty = False
+
+        # The whole work item is a single batch as far as the cache is concerned
+        await loop.run_in_executor(None, self.cache.begin, unit)
+
+        try:
+            while not unit.is_complete():
+
+                # Grab the next case. Generators may block (e.g. web units
+                # making requests), so this happens in an I/O thread.
+                try:
+                    case = await loop.run_in_executor(
+                        None, next, work.generator, StopIteration
+                    )
+                except Exception as e:
+                    self._on_exception(unit, e)
+                    empty = True
+                    break
+
+                if case is StopIteration:
+                    empty = True
+                    break
+
+                # Wait for room, then evaluate the case in the background
+                await self.engine.slots.acquire()
+                task = asyncio.ensure_future(self._evaluate_case_async(unit, case))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            # Wait for the cases still in flight
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            # This may save the unit results to the cache, which writes to disk
+            await loop.run_in_executor(None, self.cache.end, unit, empty)
+
+            unit.origin.rem_unit()
+
+            # The work item is done. This may signal completion.
             self.work.task_done()
 
+    async def _evaluate_case_async(self, unit: Unit, case: Any) -> None:
+        """ Evaluate a single case of a unit with a coroutine ``evaluate`` """
+
+        try:
+            await unit.evaluate(case)
+        except Exception as e:
+            # We got an exception, notify the monitor and continue
+            self._on_exception(unit, e)
+        finally:
+            self.engine.slots.release()
+
+        self._case_completed(unit)
+
+    def _on_exception(self, unit: Unit, exception: Exception) -> None:
+        """ Notify the monitor of an exception raised by a unit """
+        self.cache.fail(unit)
+        self.monitor.on_exception(self, unit, exception)
+
+    def _case_completed(self, unit: Unit) -> None:
+        """ Update statistics after evaluating a single case """
+        unit.origin.units_evaluated += 1
+        if unit.target is not unit.origin:
+            unit.target.units_evaluated += 1
+        self.cases_completed += 1
+
+    def _adjust_batch(self, work: WorkItem, elapsed: float, count: int) -> None:
+        """ Resize the batch for this work item so that a single dequeue
+        evaluates for roughly ``batch-time`` seconds. Slow cases (e.g. HTTP
+        requests) end up with small batches, while fast cases (e.g. hashing a
+        dictionary) are pulled in bulk. A ``batch-time`` of zero disables
+        adaptation. """
+
+        batch_time = self["manager"].getfloat("batch-time")
+        if batch_time <= 0:
+            return
+
+        # Smooth the per-case latency to avoid thrashing on outliers
+        latency = elapsed / count
+        if work.latency is None:
+            work.latency = latency
+        else:
+            work.latency = 0.75 * work.latency + 0.25 * latency
+
+        if work.latency <= 0:
+            batch = self["manager"].getint("max-batch")
+        else:
+            batch = int(batch_time / work.latency)
+
+        work.batch = max(1, min(batch, self["manager"].getint("max-batch")))
+
+    def _is_remote(self, unit: Unit) -> bool:
+        """ Decide whether cases for this unit are evaluated in the process pool
+        """
+
+        if self.pool is None or type(unit) in self.local_units:
+            return False
+        if self["manager"]["executor"] == "hybrid":
+            return unit.CPU_BOUND
+        return True
+
+    def _evaluate_remote(self, thread: int, unit: Unit, cases: List[Any]) -> List[Any]:
+        """ Evaluate the cases within the process pool, and replay the results
+        against this manager. If the unit cannot be shipped to another process,
+        the cases are returned so they can be evaluated locally. """
+
+        self.monitor.on_work(self, thread, unit, cases[0])
+
+        # Configuration snapshot for the worker process
+        config = {name: dict(self[name]) for name in self.sections()}
+
+        try:
+            future = self.pool.submit(
+                katana.executor.evaluate_cases, unit, cases, config
+            )
+            self.futures.add(future)
+            future.add_done_callback(self.futures.discard)
+            calls = future.result()
+        except concurrent.futures.process.BrokenProcessPool as e:
+            # The pool is useless now. Fall back to threads.
+            self.monitor.on_exception(self, unit, e)
+            self.pool = None
+            return cases
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # The unit holds something which can't be shipped to the pool
+            self.local_units.add(type(unit))
+            return cases
+        except concurrent.futures.CancelledError:
+            # The pool is shutting down
+            return []
+        except Exception as e:
+            # The unit failed outside of evaluate (e.g. while being pickled)
+            self._on_exception(unit, e)
+            for case in cases:
+                self._case_completed(unit)
+            return []
+
+        # Replay the results in the context of the real unit. This goes through
+        # the unit's manager reference so the result cache sees them.
+        for name, args, kwargs in calls:
+            if name == "exception":
+                self._on_exception(unit, *args)
+            elif name == "queue_target":
+                unit.manager.queue_target(*args, parent=unit, **kwargs)
+            else:
+                getattr(unit.manager, name)(unit, *args, **kwargs)
+
+        for case in cases:
+            self._case_completed(unit)
+        self.cases_remote += len(cases)
+
+        return []
+
     def _prepare_results(self) -> None:
         """ Prepare the results directory to house all artifacts and results
         from this run of katana. This is automatically called when `start` is
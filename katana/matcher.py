@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`FlagMatcher` searches data for flags. A matcher is compiled once for each distinct ``flag-format``, and
+shared by every unit and thread using that configuration (see :meth:`katana.manager.Manager.flag_matcher`).
+
+The ``flag-format`` option may hold multiple formats, one per line. They are combined into a single pattern, so the
+data is only scanned once regardless of the number of formats::
+
+    [manager]
+    flag-format = FLAG{.*?}
+                  picoCTF{.*?}
+
+Large data is scanned in fixed-size windows which overlap by ``FlagMatcher.OVERLAP`` bytes, so a flag crossing the
+boundary between two windows is still found as long as it is shorter than the overlap. Anything supporting the
+buffer protocol (e.g. an ``mmap``) or a file-like object can be scanned, and only a single window is held in memory
+at a time.
+
+"""
+from typing import Any, List, Tuple, Generator
+import threading
+import regex as re
+
+import katana.util
+
+# XML/HTML tags, which are stripped in order to find flags split up by markup
+MARKUP_PATTERN = re.compile(rb"<[^<]+>")
+
+
+class FlagMatcher(object):
+    """ Compiled flag search for a single ``flag-format`` configuration.
+
+    :property pattern: The compiled pattern combining all flag formats
+    :property hits: The number of flags found by this matcher
+    :property scanned: The number of bytes searched by this matcher
+    """
+
+    # Size of each window when scanning large data
+    WINDOW: int = katana.util.WINDOW_SIZE
+    # Bytes shared by adjacent windows (the longest flag guaranteed to be found)
+    OVERLAP: int = katana.util.WINDOW_OVERLAP
+
+    def __init__(self, flag_format: str):
+        super(FlagMatcher, self).__init__()
+
+        # Each line is a separate flag format
+        formats = [line.strip() for line in flag_format.splitlines() if line.strip()]
+        if len(formats) == 1:
+            source = formats[0]
+        else:
+            source = "|".join("(?:{0})".format(f) for f in formats)
+
+        self.pattern = re.compile(
+            bytes(source, "utf-8"), re.IGNORECASE | re.MULTILINE | re.DOTALL
+        )
+
+        # Statistics (protected by the lock)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.scanned = 0
+
+    def search(self, data: Any, strict: bool = False) -> List[str]:
+        """ Search the data for a flag. This returns the first flag found
+        after stripping any markup from the data, followed by the first flag
+        found within the raw data (if they differ). The search stops at the
+        first window containing a flag. If ``strict`` is set, a flag must make
+        up the entire data. """
+
+        for offset, window, limit in self.windows(data):
+
+            # Strict flags can't be split across windows
+            if strict and (offset > 0 or limit < len(window)):
+                return []
+
+            flags = []
+
+            # CALEB: this is a hack to remove XML from flags, and check that
+            # as well. It was observed to be needed for some weird XML
+            # challenges.
+            if b"<" in window:
+                no_xml = MARKUP_PATTERN.sub(b"", window)
+                if no_xml != window:
+                    flags.append(self._first(no_xml, strict))
+
+            flags.append(self._first(window, strict))
+
+            # Remove empty and duplicate results
+            flags = [f for n, f in enumerate(flags) if f and f not in flags[:n]]
+            if flags:
+                self._count(hits=len(flags))
+                return flags
+
+        return []
+
+    def finditer(self, data: Any) -> Generator[Tuple[int, str], None, None]:
+        """ Yield a tuple of (offset, flag) for every flag in the data. Flags
+        within the overlap between windows are only reported once. """
+
+        for offset, window, limit in self.windows(data):
+            for match in self.pattern.finditer(window):
+
+                # The next window will report this match
+                if match.start() >= limit:
+                    break
+
+                flag = self._decode(match)
+                if flag is not None:
+                    self._count(hits=1)
+                    yield offset + match.start(), flag
+
+    def windows(self, data: Any) -> Generator[Tuple[int, Any, int], None, None]:
+        """ Split the data into overlapping windows (see
+        :func:`katana.util.windows`), and count the bytes scanned. """
+
+        for offset, window, limit in katana.util.windows(
+            data, self.WINDOW, self.OVERLAP
+        ):
+            self._count(scanned=limit)
+            yield offset, window, limit
+
+    def _first(self, data: Any, strict: bool) -> str:
+        """ Find the first printable flag within the data """
+
+        for match in self.pattern.finditer(data):
+            # Strict flags means that the flag will be alone in the output
+            if strict:
+                if match.start() != 0 or match.end() != len(data):
+                    return None
+                return self._decode(match)
+
+            flag = self._decode(match)
+            if flag is not None:
+                return flag
+
+        return None
+
+    def _decode(self, match: re.Match) -> str:
+        """ Flags should be printable. Returns None if the match is not. """
+
+        try:
+            flag = match.group().decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+        if not katana.util.isprintable(flag):
+            return None
+
+        return flag
+
+    def _count(self, hits: int = 0, scanned: int = 0) -> None:
+        """ Update the matcher statistics """
+        with self.lock:
+            self.hits += hits
+            self.scanned += scanned
@@ -384,7 +384,7 @@ class Repl(cmd2.Cmd):
     def generate_prompt(self, about_to_wait=False):
 
         # build a dynamic state
-        if self.manager.barrier.n_waiting == len(self.manager.threads) or about_to_wait:
+        if self.manager.work.waiting == len(self.manager.threads) or about_to_wait:
             state = f"{Fore.YELLOW}waiting{Style.RESET_ALL}"
         else:
             state = f"{Fore.GREEN}running{Style.RESET_ALL}"
@@ -472,8 +472,15 @@ class Repl(cmd2.Cmd):
         # Find total number of unit cases evaluated
         cases_completed = f"{Fore.CYAN}{self.manager.cases_completed} cases evaluated{Style.RESET_ALL}"
 
+        # Find total amount of data searched for flags
+        scanned = sum(m.scanned for m in list(self.manager.matchers.values()))
+        flags_scanned = f"{Fore.CYAN}{scanned / (1024 * 1024):.1f}MB searched for flags{Style.RESET_ALL}"
+
         # Initial status line
-        output = [f"{basic_status} - {items_queued} - {cases_completed}", ""]
+        output = [
+            f"{basic_status} - {items_queued} - {cases_completed} - {flags_scanned}",
+            "",
+        ]
 
         # Build list of thread statuses
         threads = [""] * self.manager["manager"].getint("threads")
@@ -513,6 +520,50 @@ class Repl(cmd2.Cmd):
                 for i, t in enumerate(threads)
             ]
 
+        # Build the table of external programs run so far
+        with self.manager.runner.lock:
+            programs = [
+                (
+                    name,
+                    f"{stats.running}/{stats.runs}",
+                    f"{stats.killed}/{stats.failed}",
+                    f"{stats.wall / max(stats.runs, 1):.2f}s",
+                    f"{stats.cpu:.2f}s",
+                    f"{stats.waited:.2f}s",
+                )
+                for name, stats in sorted(self.manager.runner.stats.items())
+            ]
+
+        if programs:
+            header = ("Program", "Running", "Killed/Failed", "Wall", "CPU", "Waited")
+            widths = [
+                max(len(row[i]) for row in programs + [header]) + 2
+                for i in range(len(header))
+            ]
+            output.append("")
+            output.append(
+                Style.BRIGHT
+                + "".join(f"{h:<{w}}" for h, w in zip(header, widths))
+                + Style.RESET_ALL
+            )
+            output += [
+                f"{Fore.MAGENTA}{row[0]:<{widths[0]}}{Fore.CYAN}"
+                + "".join(f"{c:<{w}}" for c, w in zip(row[1:], widths[1:]))
+                + Style.RESET_ALL
+                for row in programs
+            ]
+
+        # Summarize the decoded images shared by the image units
+        images = self.manager.images
+        with images.lock:
+            output.append("")
+            output.append(
+                f"{Style.BRIGHT}Images{Style.RESET_ALL}: "
+                f"{len(images.entries)} cached ({images.size / 2 ** 20:.1f}MB), "
+                f"{images.hits} hits, {images.misses} decoded, "
+                f"{images.evictions} evicted"
+            )
+
         # Print output
         self.poutput("\n".join(output))
 
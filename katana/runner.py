@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`ProcessRunner` runs every external program (e.g. ``binwalk``, ``exiftool`` or ``steghide``) started by a
+unit. It is available to units as ``self.manager.runner``, and returns a :class:`ProcessResult` holding the output
+once the process exits::
+
+    result = self.manager.runner.run(self, ["exiftool", self.target.path])
+    for line in result.stdout.split(b"\\n"):
+        ...
+
+Output is read as it arrives, and each line of standard output and standard error is searched for flags right away.
+A unit which needs to see each line as it arrives can pass an ``on_line`` callback, and a unit with a lot of output
+can pass ``keep=False`` to avoid holding the output in memory. The process is killed as soon as a flag is found for
+the origin target, when it runs out of time, or when the manager stops. Each process runs in its own session, so any
+children it started are killed along with it. The results of a unit whose process ran out of time or was stopped by
+the manager are incomplete, so they are not saved in the result cache.
+
+The runner is configured with the following manager options:
+
+- ``process-limit``: the maximum number of processes running a single program at once. Units wait for a free slot
+  once this is reached.
+- ``process-limits``: a comma separated list of ``program:limit`` pairs overriding ``process-limit`` for some programs
+  (e.g. ``apktool:1,binwalk:2``).
+- ``process-timeout``: the number of seconds a process may run before it is killed. Units may ask for a shorter
+  timeout. Zero disables the timeout.
+- ``process-cpu``: the number of seconds of CPU time a process may use. Zero disables the limit.
+- ``process-memory``: the size of the data segment (in megabytes) of a process. Zero disables the limit.
+- ``process-output``: the amount of each output stream (in megabytes) kept in the result. Lines past this limit are
+  still searched for flags.
+
+Resource limits are applied where the platform supports them. The runner keeps a :class:`ProcessStats` for each
+program, with the number of runs, the time spent waiting for a slot, and the wall clock and CPU time used. These are
+shown by the ``status`` command of the REPL.
+
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import subprocess
+import selectors
+import threading
+import signal
+import time
+import os
+
+try:
+    import resource
+except ImportError:
+    # Resource limits are not supported on this platform
+    resource = None
+
+# Seconds between checks of whether a process should be stopped
+POLL_INTERVAL = 0.1
+# Bytes read from an output stream at once
+READ_SIZE = 64 * 1024
+# Longest line kept before it is split, for output without newlines
+LINE_LIMIT = 1024 * 1024
+
+
+@dataclass
+class ProcessResult(object):
+    """ The output and status of a process """
+
+    args: List[Any]
+    # The exit status, or None if the process never started
+    returncode: Optional[int] = None
+    stdout: bytes = b""
+    stderr: bytes = b""
+    # Wall clock and CPU time in seconds
+    elapsed: float = 0.0
+    cpu: float = 0.0
+    # Why the process was stopped early ("timeout", "cpu", "completed" or
+    # "stopped")
+    killed: Optional[str] = None
+    # Whether output was dropped due to the output limit
+    truncated: bool = False
+
+
+@dataclass
+class ProcessStats(object):
+    """ Statistics for every process running a single program """
+
+    runs: int = 0
+    running: int = 0
+    killed: int = 0
+    failed: int = 0
+    # Total seconds spent waiting for a slot, running, and on the CPU
+    waited: float = 0.0
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+class OutputStream(object):
+    """ Splits the output of a process into lines, and keeps the output up
+    to a limit """
+
+    def __init__(self, name: str, keep: bool, limit: int):
+        super(OutputStream, self).__init__()
+
+        self.name = name
+        self.keep = keep
+        self.limit = limit
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.partial = b""
+        self.truncated = False
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """ Add output from the process, and return any completed lines """
+
+        if self.keep:
+            room = self.limit - self.size
+            if len(data) > room:
+                self.truncated = True
+            if room > 0:
+                self.chunks.append(data[:room])
+                self.size += min(len(data), room)
+
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+
+        # Binary output may never contain a newline
+        if len(self.partial) > LINE_LIMIT:
+            lines.append(self.partial)
+            self.partial = b""
+
+        return lines
+
+    def finish(self) -> List[bytes]:
+        """ Return the last line, if the output didn't end with a newline """
+
+        lines = [self.partial] if self.partial else []
+        self.partial = b""
+        return lines
+
+    @property
+    def output(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+class ProcessRunner(object):
+    """ Runs external programs for units with concurrency and resource limits
+
+    :property manager: The manager (or any configuration) holding the runner
+                       options
+    :property slots: A semaphore limiting the processes of each program
+    :property stats: The statistics for each program
+    :property processes: The processes currently running
+    :property stopped: Whether new processes are refused
+    """
+
+    def __init__(self, manager: Any):
+        super(ProcessRunner, self).__init__()
+
+        self.manager = manager
+        self.slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.stats: Dict[str, ProcessStats] = {}
+        self.processes: Dict[int, subprocess.Popen] = {}
+        self.stopped = False
+
+        # Protects the slots, statistics and running processes
+        self.lock = threading.Lock()
+
+    def run(
+        self,
+        unit: Any,
+        args: Sequence[Any],
+        input: bytes = None,
+        cwd: str = None,
+        timeout: float = None,
+        scan: bool = True,
+        keep: bool = True,
+        on_line: Callable[[str, bytes], None] = None,
+    ) -> ProcessResult:
+        """ Run a program to completion. This waits for a free slot for the
+        program, and returns early without running it if the origin target of
+        the unit is completed in the meantime.
+
+        :param unit: The unit running the program (or None)
+        :param args: The program and its arguments
+        :param input: Data written to the standard input of the process
+        :param cwd: The working directory of the process
+        :param timeout: Seconds before the process is killed, defaults to the
+                        ``process-timeout`` option
+        :param scan: Whether to search each line of output for flags
+        :param keep: Whether to keep the output in the result
+        :param on_line: Called with the stream name ("stdout" or "stderr") and
+                        each line of output as it arrives
+        :return: The output and status of the process
+        """
+
+        program = os.path.basename(os.fsdecode(args[0]))
+        result = ProcessResult(list(args))
+
+        if unit is not None:
+            config = unit.target.config["manager"]
+        else:
+            config = self.manager["manager"]
+
+        if timeout is None:
+            timeout = config.getfloat("process-timeout")
+
+        # Wait for a free slot for this program
+        start = time.perf_counter()
+        slot = self._slot(program, config)
+        while not slot.acquire(timeout=POLL_INTERVAL):
+            result.killed = self._stop_reason(unit)
+            if result.killed is not None:
+                self._incomplete(unit, result)
+                return result
+
+        try:
+            with self.lock:
+                stats = self.stats.setdefault(program, ProcessStats())
+                stats.waited += time.perf_counter() - start
+                stats.running += 1
+
+            self._execute(
+                unit, result, config, input, cwd, timeout, scan, keep, on_line
+            )
+        finally:
+            slot.release()
+
+            with self.lock:
+                stats.running -= 1
+                if result.returncode is not None:
+                    stats.runs += 1
+                    stats.wall += result.elapsed
+                    stats.cpu += result.cpu
+                    stats.killed += result.killed is not None
+                    stats.failed += result.killed is None and result.returncode != 0
+
+        self._incomplete(unit, result)
+
+        return result
+
+    def start(self) -> None:
+        """ Allow new processes after ``ProcessRunner.stop`` """
+        self.stopped = False
+
+    def stop(self) -> None:
+        """ Kill every running process, and refuse to start new ones """
+
+        with self.lock:
+            self.stopped = True
+            processes = list(self.processes.values())
+
+        for process in processes:
+            self._kill(process)
+
+    def _incomplete(self, unit: Any, result: ProcessResult) -> None:
+        """ Keep the results of the unit out of the result cache if the program
+        was stopped before it finished. Stopping once a flag is found doesn't
+        count, since the flag is part of the results. """
+        if unit is not None and result.killed not in (None, "completed"):
+            unit.manager.incomplete(unit)
+
+    def _slot(self, program: str, config: Any) -> threading.BoundedSemaphore:
+        """ Find the semaphore limiting processes of the given program """
+
+        with self.lock:
+            if program not in self.slots:
+                limit = config.getint("process-limit")
+                for entry in config["process-limits"].split(","):
+                    name, _, value = entry.strip().rpartition(":")
+                    if name == program:
+                        limit = int(value)
+                self.slots[program] = threading.BoundedSemaphore(max(limit, 1))
+
+            return self.slots[program]
+
+    def _stop_reason(self, unit: Any) -> Optional[str]:
+        """ The reason a process for this unit should be stopped, if any """
+
+        if self.stopped:
+            return "stopped"
+        if unit is not None and unit.origin.completed:
+            return "completed"
+
+        return None
+
+    def _execute(
+        self,
+        unit: Any,
+        result: ProcessResult,
+        config: Any,
+        input: Optional[bytes],
+        cwd: Optional[str],
+        timeout: float,
+        scan: bool,
+        keep: bool,
+        on_line: Optional[Callable[[str, bytes], None]],
+    ) -> None:
+        """ Start the process, and read its output until it exits """
+
+        # The process gets its own session, so its children can be killed too
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            result.args,
+            stdin=subprocess.DEVNULL if input is None else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            start_new_session=True,
+        )
+
+        with self.lock:
+            self.processes[process.pid] = process
+
+        try:
+            self._limit(process, config)
+
+            limit = int(config.getfloat("process-output") * 1024 * 1024)
+            streams = {
+                process.stdout: OutputStream("stdout", keep, limit),
+                process.stderr: OutputStream("stderr", keep, limit),
+            }
+
+            manager = unit.manager if unit is not None else self.manager
+
+            def deliver(stream: OutputStream, lines: List[bytes]) -> None:
+                for line in lines:
+                    if scan:
+                        manager.find_flag(unit, line)
+                    if on_line is not None:
+                        on_line(stream.name, line)
+
+            with selectors.DefaultSelector() as selector:
+                for pipe in streams:
+                    selector.register(pipe, selectors.EVENT_READ)
+                if input is not None:
+                    selector.register(process.stdin, selectors.EVENT_WRITE)
+                    pending = memoryview(input)
+
+                deadline = start + timeout if timeout and timeout > 0 else None
+
+                while selector.get_map():
+
+                    # Stop on a flag, a timeout, or when the manager stops
+                    result.killed = self._stop_reason(unit)
+                    if result.killed is None and deadline is not None:
+                        if time.perf_counter() > deadline:
+                            result.killed = "timeout"
+                    if result.killed is not None:
+                        self._kill(process)
+                        break
+
+                    for key, _ in selector.select(POLL_INTERVAL):
+
+                        # Feed the standard input a piece at a time
+                        if key.fileobj is process.stdin:
+                            try:
+                                written = os.write(key.fd, pending[:READ_SIZE])
+                                pending = pending[written:]
+                            except BrokenPipeError:
+                                pending = pending[:0]
+                            if not pending:
+                                selector.unregister(process.stdin)
+                                process.stdin.close()
+                            continue
+
+                        stream = streams[key.fileobj]
+                        data = os.read(key.fd, READ_SIZE)
+                        if not data:
+                            selector.unregister(key.fileobj)
+                            deliver(stream, stream.finish())
+                            continue
+
+                        deliver(stream, stream.feed(data))
+
+            result.stdout = streams[process.stdout].output
+            result.stderr = streams[process.stderr].output
+            result.truncated = any(stream.truncated for stream in streams.values())
+
+        finally:
+            # Make sure nothing is left running (including any children), even
+            # if a callback failed
+            if result.killed is None:
+                self._kill(process)
+            self._wait(process, result)
+            result.elapsed = time.perf_counter() - start
+
+            for pipe in (process.stdin, process.stdout, process.stderr):
+                if pipe is not None:
+                    pipe.close()
+
+            with self.lock:
+                self.processes.pop(process.pid, None)
+
+    def _limit(self, process: subprocess.Popen, config: Any) -> None:
+        """ Apply the CPU and memory limits to a new process """
+
+        if resource is None or not hasattr(resource, "prlimit"):
+            return
+
+        cpu = config.getint("process-cpu")
+        memory = config.getint("process-memory") * 1024 * 1024
+
+        try:
+            if cpu > 0:
+                resource.prlimit(process.pid, resource.RLIMIT_CPU, (cpu, cpu + 1))
+            if memory > 0:
+                resource.prlimit(process.pid, resource.RLIMIT_DATA, (memory, memory))
+        except (OSError, ValueError):
+            # The process already exited, or the limit is above the hard limit
+            pass
+
+    def _kill(self, process: subprocess.Popen) -> None:
+        """ Kill a process along with every process in its session """
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        except AttributeError:
+            # No process groups on this platform
+            process.kill()
+
+    def _wait(self, process: subprocess.Popen, result: ProcessResult) -> None:
+        """ Wait for the process to exit, recording its CPU time """
+
+        if not hasattr(os, "wait4"):
+            result.returncode = process.wait()
+            return
+
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            # Already reaped
+            result.returncode = process.wait()
+            return
+
+        # Negative for a signal, as with subprocess
+        if os.WIFSIGNALED(status):
+            result.returncode = -os.WTERMSIG(status)
+        else:
+            result.returncode = os.WEXITSTATUS(status)
+        process.returncode = result.returncode
+        result.cpu = usage.ru_utime + usage.ru_stime
+
+        # The kernel signals processes which use up their CPU time
+        if result.killed is None and result.returncode == -signal.SIGXCPU:
+            result.killed = "cpu"
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`Scheduler` is the work queue shared between the Manager and its worker threads. It is a priority queue
+which wakes idle workers with a condition variable when new work arrives, and tracks the amount of outstanding work so
+that the Manager can tell when evaluation has completed.
+
+Work is considered outstanding from the moment it is ``put`` on the queue until the worker which removed it calls
+``task_done``. A worker which requeues a partially evaluated item before evaluating its current batch of cases keeps
+the work outstanding until that batch has finished, so completion is never signalled while cases are in flight.
+
+"""
+from typing import Any, List
+import threading
+import heapq
+
+
+class Scheduler(object):
+    """ A priority work queue with condition variable wakeups and completion
+    tracking. Items must be orderable (e.g. ``Manager.WorkItem``). """
+
+    def __init__(self):
+        super(Scheduler, self).__init__()
+
+        # Heap of queued items
+        self.items: List[Any] = []
+        # Protects all state
+        self.lock = threading.RLock()
+        # Wakes threads waiting for work
+        self.condition = threading.Condition(self.lock)
+        # Wakes threads waiting for completion. This is separate so that `put`
+        # never wakes a joining thread in place of a worker.
+        self.finished = threading.Condition(self.lock)
+        # Number of items queued or still being evaluated
+        self.outstanding = 0
+        # Number of threads blocked waiting for work
+        self.waiting = 0
+        # Set when workers should exit
+        self.closed = False
+
+    def put(self, item: Any) -> None:
+        """ Queue an item and wake a single waiting worker """
+        with self.condition:
+            heapq.heappush(self.items, item)
+            self.outstanding += 1
+            self.condition.notify()
+
+    def hold(self) -> None:
+        """ Count work which is outstanding without being queued (e.g. a
+        target which is still being built). Release it with ``task_done``. """
+        with self.condition:
+            self.outstanding += 1
+
+    def get(self, block: bool = True) -> Any:
+        """ Remove the highest priority item from the queue. If ``block`` is
+        set, wait until an item is available. Returns None if the queue was
+        closed, or if it is empty and ``block`` is not set. """
+        with self.condition:
+            while not self.items and not self.closed:
+                if not block:
+                    return None
+                self.waiting += 1
+                try:
+                    self.condition.wait()
+                finally:
+                    self.waiting -= 1
+
+            if self.closed:
+                return None
+
+            return heapq.heappop(self.items)
+
+    def task_done(self) -> None:
+        """ Indicate that an item retrieved with ``get`` has been processed.
+        Waiters in ``join`` are woken once no work is outstanding. """
+        with self.condition:
+            self.outstanding -= 1
+            if self.outstanding <= 0:
+                self.finished.notify_all()
+
+    def join(self, timeout: float = None) -> bool:
+        """ Wait for all outstanding work to complete. Returns False if the
+        timeout expired first. """
+        with self.condition:
+            return self.finished.wait_for(
+                lambda: self.outstanding <= 0 or self.closed, timeout
+            )
+
+    def close(self) -> None:
+        """ Wake all workers and ask them to exit """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            self.finished.notify_all()
+
+    def qsize(self) -> int:
+        """ Number of items currently queued """
+        return len(self.items)
+
+    @property
+    def idle(self) -> bool:
+        """ Whether there is no outstanding work """
+        return self.outstanding <= 0
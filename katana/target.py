@@ -7,14 +7,16 @@ or URLs from the data.
 
 """
 from __future__ import annotations
-from typing import Any, List, BinaryIO
+from typing import Any, List, BinaryIO, Tuple
 from io import StringIO, BytesIO
+import collections
 import tempfile
 import requests
 import hashlib
 import enchant
 import string
 import magic
+import numpy
 import mmap
 import regex as re
 import os
@@ -42,6 +44,52 @@ DICTIONARY = enchant.Dict()
 DICTIONARY_THRESHOLD = 1
 PRINTABLE_BYTES = bytes(string.printable, "utf-8")
 BASE64_BYTES = bytes(string.ascii_letters + string.digits + "=", "utf-8")
+# Byte classes, indexed by byte value, applied to the target byte histogram
+NON_PRINTABLE = numpy.array([c not in PRINTABLE_BYTES for c in range(256)])
+NON_BASE64 = numpy.array([c not in BASE64_BYTES for c in range(256)])
+# Size of each block read while classifying the target
+CLASSIFY_CHUNK_SIZE = 1024 * 1024
+# Approximate number of bytes checked for english words. Larger targets are
+# sampled evenly across every block.
+ENGLISH_SAMPLE_SIZE = 256 * 1024
+
+
+def count_english_words(samples: List[bytes], trim: bool = False) -> Tuple[int, int]:
+    """ Count the words (longer than two letters) in the given samples and how
+    many of them are english. Each distinct word is only checked against the
+    dictionary once. If ``trim`` is set, words touching the edges of a sample
+    are ignored, since they may have been cut in half. """
+
+    words = collections.Counter()
+    for sample in samples:
+        for match in LETTER_REGEX.finditer(sample):
+            if trim and (match.start() == 0 or match.end() == len(sample)):
+                continue
+            if match.end() - match.start() > 2:
+                words[match.group()] += 1
+
+    english_words = sum(
+        count
+        for word, count in words.items()
+        if DICTIONARY.check(word.decode("utf-8"))
+    )
+
+    return sum(words.values()), english_words
+
+
+class FrozenHash(object):
+    """ A picklable snapshot of a finished hashlib object. This replaces
+    ``Target.hash`` when a target is shipped to a worker process. """
+
+    def __init__(self, hash):
+        self.name = hash.name
+        self._digest = hash.digest()
+
+    def digest(self) -> bytes:
+        return self._digest
+
+    def hexdigest(self) -> str:
+        return self._digest.hex()
 
 
 class BadTarget(Exception):
@@ -83,6 +131,9 @@ class Target(object):
                         True, and we were able to download the file as an artifact.
     :property magic: libmagic result for the data
     :property hash: A hashlib.md5 object representing the hash of the data
+    :property histogram: A numpy array with the number of occurrences of each byte value in the data
+    :property size: The size of the data in bytes
+    :property origin: The root target this target was recursively created from (or itself for root targets)
     :property start_time: The time in seconds that this target was started
     :property end_time: When this target completed
     :property units_evaluated: The total number of units evaluated under this target (only root targets)
@@ -109,6 +160,7 @@ class Target(object):
         self.is_english = True
         self.is_image = False
         self.is_base64 = False
+        self.size = 0
         self.path = False
         self._completed = False
         self.start_time = time.time()
@@ -208,7 +260,7 @@ class Target(object):
 
                 # CALEB: I don't know why we are ignoring the download
                 # option here...
-                self.request = requests.get(self.upstream, verify=False)
+                self.request = self.manager.http.get(self.upstream, verify=False)
                 self.content = self.request.content
                 # self.is_url = False # still necessary for URLs or web units
 
@@ -230,13 +282,6 @@ class Target(object):
         else:
             self.magic = magic.from_buffer(self.content)
 
-        # JOHN: Add a test to determine if this is in fact an image
-        if "image" in self.magic.lower():
-            # CALEB: Not sure how I want to handle this in the new version...
-            #             if self.path:
-            #                 katana.add_image(os.path.abspath(self.path))
-            self.is_image = True
-
         # CALEB: if we do this, do we need strings?
         # manager.find_flag(self.parent, self.raw)
 
@@ -245,60 +290,57 @@ class Target(object):
         # results? :?
         # katana.locate_flags(parent, self.magic)
 
-        all_words = 0
-        english_words = 0
+        # Find the size of the data in order to decide how much of each block
+        # is sampled for the english check
+        if self.content is not None:
+            size = len(self.content)
+        elif self.is_file:
+            size = os.path.getsize(self.path)
+        else:
+            size = len(self.upstream)
+        sample_ratio = min(1.0, ENGLISH_SAMPLE_SIZE / max(size, 1))
+        samples = []
 
         # Hash the target content for comparison to previous
         # targets by Katana. This prevents recursion on the
-        # same target type.
+        # same target type. The byte histogram is built in the
+        # same pass, and used to classify the content.
         self.hash = hashlib.md5()
+        self.histogram = numpy.zeros(256, dtype=numpy.int64)
         with self.stream as st:
-            for chunk in iter(lambda: st.read(4096), b""):
-                # Update the hash with this chunk
+            for chunk in iter(lambda: st.read(CLASSIFY_CHUNK_SIZE), b""):
+                # Update the hash and histogram with this chunk
                 self.hash.update(chunk)
+                self.histogram += katana.util.byte_histogram(chunk)
 
-                # Did we already rule out printable?
-                if not self.is_printable:
-                    continue
-
-                # Check if this chunk is printabale
-                for c in chunk:
-                    if c not in PRINTABLE_BYTES:
-                        self.is_printable = False
-                        self.is_base64 = False
-                        self.is_english = False
-                        break
-                    elif c not in BASE64_BYTES:
-                        self.is_base64 = False
-
-                # If we found a non-printable character, abort
-                if not self.is_printable or not self.is_english:
-                    continue
-
-                # Check how many english words this chunk contains
-                word_list = list(
-                    filter(lambda word: len(word) > 2, LETTER_REGEX.findall(chunk))
-                )
-                all_words += len(word_list)
-                english_words += len(
-                    list(
-                        filter(
-                            lambda word: len(word) > 2,
-                            [
-                                word
-                                for word in word_list
-                                if DICTIONARY.check(word.decode("utf-8"))
-                            ],
-                        )
-                    )
-                )
+                # Keep a sample for the english check, as long as the data is
+                # still printable
+                if not self.histogram[NON_PRINTABLE].any():
+                    samples.append(chunk[: max(1, int(len(chunk) * sample_ratio))])
 
-        # If we haven't already decided, check if we think this is english
-        if self.is_english:
+        # JOHN: Add a test to determine if this is in fact an image
+        if "image" in self.magic.lower():
+            # CALEB: Not sure how I want to handle this in the new version...
+            #             if self.path:
+            #                 katana.add_image(os.path.abspath(self.path))
+            self.is_image = True
+
+        # Classify the content by the byte values present
+        self.size = int(self.histogram.sum())
+        self.is_printable = not self.histogram[NON_PRINTABLE].any()
+        self.is_base64 = self.is_printable and not self.histogram[NON_BASE64].any()
+
+        # Check if we think this is english
+        if self.is_printable:
+            all_words, english_words = count_english_words(
+                samples, trim=sample_ratio < 1.0
+            )
             self.is_english = (
                 english_words >= (all_words - DICTIONARY_THRESHOLD)
                 and english_words != 0
             )
+        else:
+            self.is_english = False
 
         # JOHN: This is a patch to handle relative file paths, because apparently
         #       we didn't....
@@ -311,6 +353,13 @@ class Target(object):
         # Look for the flag in the raw data
         # manager.find_flag(self.parent, self.raw)
 
+    @property
+    def origin(self) -> Target:
+        """ The root target this target was recursively created from """
+        if self.parent is None:
+            return self
+        return self.parent.origin
+
     @property
     def completed(self) -> bool:
         return self._completed
@@ -322,6 +371,10 @@ class Target(object):
         self._completed = True
         self.end_time = time.time()
 
+        # No more units will need the decoded image
+        if self.manager is not None:
+            self.manager.images.release(self)
+
     def add_unit(self):
         """ Add a unit for tracking. This is called by Manager.queue """
         self.units_left += 1
@@ -332,6 +385,17 @@ class Target(object):
         if self.units_left <= 0 and not self.building:
             self.completed = True
 
+    def __getstate__(self) -> dict:
+        """ Targets are pickled along with their units when shipped to a worker
+        process. The manager and memory map cannot cross the process boundary.
+        """
+        state = self.__dict__.copy()
+        state["manager"] = None
+        state["mmap"] = None
+        if "hash" in state and not isinstance(state["hash"], FrozenHash):
+            state["hash"] = FrozenHash(state["hash"])
+        return state
+
     def __repr__(self):
         """ Create a representation of this object based on it's upstream path
         """
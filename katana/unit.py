@@ -12,8 +12,10 @@ You can also register unit classes manually with the Finder if needed.
 
 """
 from __future__ import annotations
-from typing import Any, List, Type, Tuple, IO, Generator
+from typing import Any, List, Type, Tuple, IO, Generator, Dict, Set
 import subprocess
+import itertools
+import asyncio
 import importlib
 import logging
 import pkgutil
@@ -24,9 +26,14 @@ import regex as re
 import os
 
 import katana
+import katana.util
+import katana.wordlist
 
 logger = logging.getLogger(__name__)
 
+# Target properties which units may require (see ``Unit.TARGET_FILE`` etc.)
+TARGET_FEATURES = ["is_file", "is_url", "is_image", "is_printable", "is_english"]
+
 
 class Unit(object):
     r"""
@@ -54,6 +61,25 @@ class Unit(object):
                         groups. By convention, this normally at least contains the package name (e.g. "crypto"
                         or "stego"). However, it can theoretically contain any name you would like.
     :property BLOCKED_GROUPS: a list of groups or unit names which this unit cannot recurse into.
+    :property CPU_BOUND: Indicates the unit spends its time in computation which holds the GIL (e.g. python loops, or
+                        hashing and translating short strings). With the ``hybrid`` executor, cases for these units
+                        are evaluated in a process pool rather than a worker thread, so they run in parallel.
+    :property BATCH_SIZE: The preferred number of cases evaluated per dequeue. The manager starts with this size, and
+                        then adapts it to the measured case latency (see the ``batch-time`` manager option).
+    :property CACHEABLE: Indicates the results of this unit only depend on the target and configuration, and may be
+                        saved in the result cache (see the ``cache-dir`` manager option) for later runs.
+    :property TARGET_FILE: If not None, ``target.is_file`` must equal this value. This, along with the other
+                        ``TARGET_*`` properties, ``KEYWORDS``, ``MIN_SIZE`` and ``MAX_SIZE``, is checked by
+                        ``Unit.is_applicable`` before the unit is constructed.
+    :property TARGET_URL: If not None, ``target.is_url`` must equal this value.
+    :property TARGET_IMAGE: If not None, ``target.is_image`` must equal this value.
+    :property TARGET_PRINTABLE: If not None, ``target.is_printable`` must equal this value.
+    :property TARGET_ENGLISH: If not None, ``target.is_english`` must equal this value.
+    :property KEYWORDS: If not empty, the libmagic type of the target must contain one of these keywords.
+    :property MIN_SIZE: If specified, the minimum size of the target data in bytes.
+    :property MAX_SIZE: If specified, the maximum size of the target data in bytes.
+    :property SKIP_GOOD_MAGIC: If True, files with a useful libmagic type (see ``katana.util.is_good_magic``) are
+                        skipped, so they are not mangled by decoders.
 
     Here's an example of a very basic unit class::
 
@@ -93,6 +119,25 @@ class Unit(object):
     GROUPS = []
     # Groups this unit is not allowed to recurse into
     BLOCKED_GROUPS = []
+    # Whether cases should be shipped to the process pool (hybrid executor)
+    CPU_BOUND: bool = False
+    # Initial number of cases per dequeue (None uses the manager default)
+    BATCH_SIZE: int = None
+    # Whether results may be replayed from the result cache
+    CACHEABLE: bool = True
+    # Required values for target properties (None means either is fine)
+    TARGET_FILE: bool = None
+    TARGET_URL: bool = None
+    TARGET_IMAGE: bool = None
+    TARGET_PRINTABLE: bool = None
+    TARGET_ENGLISH: bool = None
+    # Keywords, one of which must be in the target libmagic type
+    KEYWORDS: List[str] = []
+    # Skip files with a useful libmagic type (see katana.util.is_good_magic)
+    SKIP_GOOD_MAGIC: bool = False
+    # Bounds on the size of the target data in bytes
+    MIN_SIZE: int = None
+    MAX_SIZE: int = None
 
     def __init__(self, manager: katana.manager.Manager, target: katana.target.Target):
         """
@@ -144,12 +189,74 @@ class Unit(object):
         """ String representation will provide the unit name plus the target upstream """
         return f"{str(self)}({str(self.target)})"
 
+    def __getstate__(self) -> dict:
+        """ Units are pickled when shipped to a worker process. The manager
+        cannot cross the process boundary, and is replaced there. """
+        state = self.__dict__.copy()
+        state["manager"] = None
+        return state
+
     @classmethod
     def get_name(cls) -> str:
         """ By default, we assume the unit name is the same as the containing module. This can
         be overridden, but should not conflict with other units. """
         return cls.__module__.split(".")[-1]
 
+    @classmethod
+    def is_applicable(cls, target: katana.target.Target) -> bool:
+        """
+        Check the static requirements of this unit (e.g. ``TARGET_FILE`` or
+        ``KEYWORDS``) against an already built target. The Finder only calls
+        this for units already matched through its index of ``TARGET_*``
+        properties and keywords, but it must still be cheap. Construction of
+        the unit is deferred until a worker is ready to evaluate it, at which
+        point the constructor may still raise ``NotApplicable`` after more
+        expensive checks. Subclasses may override this to add cheap checks,
+        but must call the parent implementation.
+
+        :param target: The target to check
+        :return: False if the unit is certainly not applicable to the target
+        """
+
+        # Check each target property with a required value
+        if not cls.accepts_features(target_features(target)):
+            return False
+
+        # Don't mangle useful files (e.g. images or documents)
+        if cls.SKIP_GOOD_MAGIC and target.path:
+            if katana.util.is_good_magic(target.magic):
+                return False
+
+        # Check the size bounds
+        if cls.MIN_SIZE is not None and target.size < cls.MIN_SIZE:
+            return False
+        if cls.MAX_SIZE is not None and target.size > cls.MAX_SIZE:
+            return False
+
+        # Check keywords against magic type
+        if cls.KEYWORDS:
+            magic = target.magic.lower()
+            return any(k.lower() in magic for k in cls.KEYWORDS)
+
+        return True
+
+    @classmethod
+    def accepts_features(cls, features: Tuple[bool, ...]) -> bool:
+        """
+        Check the ``TARGET_*`` requirements of this unit against the values of
+        the target properties listed in ``TARGET_FEATURES``.
+
+        :param features: The value of each property in ``TARGET_FEATURES``
+        :return: True if every required property has the required value
+        """
+
+        for name, value in zip(TARGET_FEATURES, features):
+            required = getattr(cls, "TARGET_" + name[3:].upper())
+            if required is not None and value != required:
+                return False
+
+        return True
+
     @classmethod
     def validate(cls, manager):
         """ Checks that required configuration values are available in the
@@ -207,9 +314,39 @@ class Unit(object):
     def evaluate(self, case: Any):
         r""" Run unit tasks given `case` which was returned from
         `Unit.enumerate`. This could happen in any thread or process of
-        execution and should be stateless. """
+        execution and should be stateless. I/O bound units may implement this
+        as a coroutine (``async def evaluate``), in which case the cases are
+        evaluated concurrently on the event loop of ``katana.engine``. """
         raise RuntimeError("{0}: malformed unit: no evaluate".format(self))
 
+    def evaluate_batch(self, cases: List[Any]):
+        r""" Run unit tasks for a list of cases returned from `Unit.enumerate`.
+        This is optional. If a unit overrides this method, the manager will
+        prefer it over calling `Unit.evaluate` for each case, which allows
+        units with a data-parallel key space (e.g. single-byte XOR) to share
+        work between cases. An exception aborts the remainder of the batch. """
+        for case in cases:
+            self.evaluate(case)
+
+    def merge(self, result: Any):
+        r""" Merge the result of a case into the state of this unit (e.g.
+        statistics, or the items found so far). Units which keep such state
+        call ``self.manager.merge(self, result)`` from ``evaluate``. A case may
+        be evaluated against a copy of the unit in a worker process, but this
+        is always called on the real unit, possibly from several threads at
+        once. """
+        raise RuntimeError("{0}: malformed unit: no merge".format(self))
+
+    @classmethod
+    def has_evaluate_batch(cls) -> bool:
+        """ Whether this unit overrides `Unit.evaluate_batch` """
+        return cls.evaluate_batch is not Unit.evaluate_batch
+
+    @classmethod
+    def has_async_evaluate(cls) -> bool:
+        """ Whether `Unit.evaluate` is a coroutine function """
+        return asyncio.iscoroutinefunction(cls.evaluate)
+
     def get_output_dir(self):
         """ Find the output directory for this unit. This will return the directory where
          artifacts are expected to be stored in this context and also ensure it exists """
@@ -313,6 +450,28 @@ class Unit(object):
         """ same as get but returns an integer value """
         return self.target.config.getint(str(self), name, fallback=default)
 
+    def wordlist_ranges(
+        self, name: str = "dict"
+    ) -> Generator[katana.wordlist.WordRange, None, None]:
+        """
+        Yield contiguous ranges of the dictionary file given by the ``name``
+        parameter (see :mod:`katana.wordlist`). Nothing is yielded if the
+        parameter is not set. The size of each range is given by the
+        ``wordlist-range`` parameter.
+        :param name: name of the parameter holding the dictionary path
+        :return: generator of ranges, each iterating over the passwords
+        """
+
+        path = self.get(name)
+        if not path:
+            return
+
+        size = self.geti(
+            "wordlist-range",
+            default=self.target.config["manager"].getint("wordlist-range"),
+        )
+        yield from katana.wordlist.load(path).ranges(size)
+
     @classmethod
     def check_deps(cls):
         """ 
@@ -333,6 +492,11 @@ class Unit(object):
             raise MissingDependency(dep)
 
 
+def target_features(target: katana.target.Target) -> Tuple[bool, ...]:
+    """ The value of each property listed in ``TARGET_FEATURES`` """
+    return tuple(bool(getattr(target, name)) for name in TARGET_FEATURES)
+
+
 class Finder(object):
     r""" Utilize python dynamic introspection and loading to locate units
     either within the default unit list bundled with Katana or in a custom
@@ -351,6 +515,21 @@ class Finder(object):
         self.units: List[Type[Unit]] = []
         self.missing_deps: List[Tuple[str, str]] = []
 
+        # Units accepting each combination of target properties (indexed by
+        # the values of ``TARGET_FEATURES``)
+        self.index: Dict[Tuple[bool, ...], List[Type[Unit]]] = {
+            features: []
+            for features in itertools.product(
+                [False, True], repeat=len(TARGET_FEATURES)
+            )
+        }
+        # Units requiring each libmagic keyword
+        self.keywords: Dict[str, List[Type[Unit]]] = {}
+        # Units for each unit name and group
+        self.groups: Dict[str, List[Type[Unit]]] = {}
+        # Units matching each parsed `units` or `exclude` option
+        self.selections: Dict[str, Set[Type[Unit]]] = {}
+
         # Store manager reference for later
         self.manager: katana.manager.Manager = manager
 
@@ -415,65 +594,117 @@ class Finder(object):
         # Keep track of registered units
         self.units.append(unit)
 
+        # Index the unit by the target properties it accepts
+        for features in itertools.product([False, True], repeat=len(TARGET_FEATURES)):
+            if unit.accepts_features(features):
+                self.index[features].append(unit)
+
+        # Index the unit by libmagic keywords
+        for keyword in unit.KEYWORDS:
+            self.keywords.setdefault(keyword.lower(), []).append(unit)
+
+        # Index the unit by name and group for unit selection
+        for name in [unit.get_name()] + list(unit.GROUPS):
+            self.groups.setdefault(name, []).append(unit)
+
+        # The unit may belong to cached selections
+        self.selections = {}
+
     def match(
         self, target: katana.target.Target, scale: float = 1.0
     ) -> Generator[Unit, None, None]:
         """ Match the given target to one or more units that have previously
-        been enumerated with the ``Finder.find`` method. This tests that the
-        unit itself is applicable to the target in order to find specific
-        applicable units """
+        been enumerated with the ``Finder.find`` method. This constructs each
+        candidate unit (see ``Finder.candidates``) in order to find specific
+        applicable units. The Manager defers construction to the worker
+        threads instead. """
 
-        class Applicable(Exception):
-            """ Helper for aborting inner loops """
+        for unit_class in self.candidates(target, scale=scale):
+            try:
+                # Attempt to create a new unit for this target
+                unit = unit_class(self.manager, target)
+            except NotApplicable as e:
+                pass
+            else:
+                # unit.PRIORITY *= scale
+                yield unit
 
-            pass
+    def candidates(
+        self, target: katana.target.Target, scale: float = 1.0
+    ) -> Generator[Type[Unit], None, None]:
+        """ Find the unit classes which may be applicable to the given target.
+        This obeys the unit selection and recursion rules, and checks the
+        static requirements of each unit (see ``Unit.is_applicable``) without
+        constructing it. Units are looked up in the index built by
+        ``Finder.register``, so only units with matching requirements are
+        checked. """
+
+        config = target.config["manager"]
+
+        # Units which we have excluded
+        excluded = self.select(config["exclude"])
+
+        # Check if we are looking for specific units
+        # There are three modes:
+        # - pure auto: no units are specified. auto is set, and katana runs all applicable units.
+        # - manual: units are specified and auto is not set. katana runs all units within the specified set that
+        #   are applicable.
+        # - auto manual: root targets obey specified units. recursive targets run all applicable units.
+        selected = None
+        if not config.getboolean("auto") or (
+            target.parent is None and config["units"] != ""
+        ):
+            # We requested specific units, only match those
+            selected = self.select(config["units"])
+
+        # Units with a keyword in the libmagic type of the target
+        magic = target.magic.lower()
+        matched = set(
+            unit_class
+            for keyword, units in self.keywords.items()
+            if keyword in magic
+            for unit_class in units
+        )
+
+        for unit_class in self.index[target_features(target)]:
+
+            # Check if we have excluded this unit
+            if unit_class in excluded:
+                continue
 
-        for unit_class in self.units:
+            # Check if this unit was requested
+            if selected is not None and unit_class not in selected:
+                continue
 
-            try:
-                # Check if we have excluded this unit
-                if target.config["manager"]["exclude"] != "":
-                    for exclude in target.config["manager"]["exclude"].split(","):
-                        if (
-                            exclude == unit_class.get_name()
-                            or exclude in unit_class.GROUPS
-                        ):
-                            raise NotApplicable
-
-                # Check if we are looking for specific units
-                # There are three modes:
-                # - pure auto: no units are specified. auto is set, and katana runs all applicable units.
-                # - manual: units are specified and auto is not set. katana runs all units within the specified set that
-                #   are applicable.
-                # - auto manual: root targets obey specified units. recursive targets run all applicable units.
-                if not target.config["manager"].getboolean("auto") or (
-                    target.parent is None and target.config["manager"]["units"] != ""
-                ):
-                    # We requested specific units, only match those
-                    for unit in target.config["manager"]["units"].split(","):
-                        if unit == unit_class.get_name() or unit in unit_class.GROUPS:
-                            raise Applicable
-                    else:
-                        # No applicable units found
-                        continue
-            except NotApplicable:
-                # This unit is excluded
+            # Check the libmagic type of the target
+            if unit_class.KEYWORDS and unit_class not in matched:
                 continue
-            except Applicable:
-                pass
 
             # Obey recursion rules
             if target.parent is not None and not target.parent.can_recurse(unit_class):
                 continue
 
-            try:
-                # Attempt to create a new unit for this target
-                unit = unit_class(self.manager, target)
-            except NotApplicable as e:
-                pass
-            else:
-                # unit.PRIORITY *= scale
-                yield unit
+            # Check the remaining static requirements of the unit
+            if not unit_class.is_applicable(target):
+                continue
+
+            yield unit_class
+
+    def select(self, names: str) -> Set[Type[Unit]]:
+        """ Find the units matching a comma-separated list of unit names and
+        groups, as used by the ``units`` and ``exclude`` options. The result
+        is cached, since the same lists are used for every target. """
+
+        try:
+            return self.selections[names]
+        except KeyError:
+            pass
+
+        units = set()
+        for name in names.split(","):
+            units.update(self.groups.get(name, []))
+
+        return self.selections.setdefault(names, units)
 
 
 class NotApplicable(Exception):
@@ -497,17 +728,23 @@ class NoneUnit(Unit):
 class FileUnit(Unit):
     r""" This unit base class requires that the given target be a file, and also
     optionally have a libmagic signature which contains one of a specified set
-    of keywords. To use this unit, you simply pass a special `keywords`
-    argument to its constructor in your unit subclass:
+    of keywords. To use this unit, you simply set the `KEYWORDS` property in
+    your unit subclass. The keywords are checked before your unit is
+    constructed:
 
     .. code-block:: python
         
         # A unit that requires a file containing some sort of image
         class Unit(units.FileUnit):
-            def __init__(self, manager, target):
-                super(Unit, self).__init__(manager, target, keywords=['image'])
+            KEYWORDS = ["image"]
+
+    A `keywords` argument may also be passed to the constructor, which
+    overrides `KEYWORDS` for the constructor check only.
     """
 
+    # Targets must be files
+    TARGET_FILE = True
+
     def __init__(
         self,
         manager: katana.manager.Manager,
@@ -520,6 +757,8 @@ class FileUnit(Unit):
         if not self.target.is_file:
             raise NotApplicable("not a file")
 
+        if keywords is None:
+            keywords = self.KEYWORDS
         if keywords is None or keywords == []:
             return
 
@@ -536,6 +775,9 @@ class PrintableDataUnit(Unit):
     r""" This unit base class ensures that the target content contains only
     printable data (that is, data which is not binary/is readable). """
 
+    # Targets must be printable
+    TARGET_PRINTABLE = True
+
     def __init__(self, manager: katana.manager.Manager, target: katana.target.Target):
         super(PrintableDataUnit, self).__init__(manager, target)
 
@@ -547,6 +789,9 @@ class NotEnglishUnit(Unit):
     r""" This unit base class ensures that the target content contains mostly
     non-english text. """
 
+    # Targets must not be english
+    TARGET_ENGLISH = False
+
     def __init__(self, manager: katana.manager.Manager, target: katana.target.Target):
         super(NotEnglishUnit, self).__init__(manager, target)
 
@@ -558,6 +803,10 @@ class NotEnglishAndPrintableUnit(Unit):
     r""" This unit base class ensures that the target content is printable, and
     is also *not* english text (e.g. base64 data, white space, etc.) """
 
+    # Targets must be printable, but not english
+    TARGET_PRINTABLE = True
+    TARGET_ENGLISH = False
+
     def __init__(self, manager: katana.manager.Manager, target: katana.target.Target):
         super(NotEnglishAndPrintableUnit, self).__init__(manager, target)
 
@@ -575,13 +824,22 @@ class RegexUnit(Unit):
     def __init__(self, manager: katana.manager.Manager, target: katana.target.Target):
         super(RegexUnit, self).__init__(manager, target)
 
-        self.match_iter = self.PATTERN.finditer(target.raw)
+        # Large targets are matched in windows to bound memory usage
+        self.match_iter = katana.util.finditer(self.PATTERN, target.raw)
 
         try:
             self.first_match = next(self.match_iter)
         except StopIteration:
             raise NotApplicable("No matches found")
 
+    def __getstate__(self) -> dict:
+        """ Match objects cannot be pickled. They are only needed by
+        ``enumerate``, which always runs in the parent process. """
+        state = super(RegexUnit, self).__getstate__()
+        state["match_iter"] = None
+        state["first_match"] = None
+        return state
+
     def enumerate(self):
         """ Yield's all the match objects """
 
@@ -19,11 +19,8 @@ to recurse on.
 
 
 import os
-import subprocess
 from typing import Any
 
-from katana.manager import Manager
-from katana.target import Target
 from katana.unit import FileUnit
 
 
@@ -38,8 +35,7 @@ class Unit(FileUnit):
     # We depend on `apktool`
     DEPENDENCIES: list = ["apktool"]
 
-    def __init__(self, manager: Manager, target: Target):
-        super(Unit, self).__init__(manager, target, keywords=["archive"])
+    KEYWORDS = ["archive"]
 
     def evaluate(self, case: Any) -> None:
         """
@@ -59,16 +55,11 @@ class Unit(FileUnit):
         # Grab the location to save results
         path: str = self.get_output_dir()
 
-        # Run apktool
-        p = subprocess.Popen(
-            ["apktool", "decode", "-f", self.target.path, "-o", path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        # Run apktool, and wait for completion
+        self.manager.runner.run(
+            self, ["apktool", "decode", "-f", self.target.path, "-o", path]
         )
 
-        # Wait for completion
-        p.wait()
-
         # Loop through all the new files
         for (directory, dirs, files) in os.walk(os.path.join(path, "res")):
             dirs[:] = [d for d in dirs if d not in ["android"]]
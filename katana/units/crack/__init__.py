@@ -0,0 +1,223 @@
+"""
+Hash cracking units guess a lot of passwords, so the hashing itself needs
+to be quick.
+
+For this reason, the :class:`katana.units.crack.HashSet` finds every hash
+within a target up front, and checks a whole batch of candidate passwords
+(e.g. a range of the dictionary file) against all of them at once. Hashes
+are kept in a set of raw digests for each algorithm, so the cost of a
+batch does not grow with the number of hashes.
+
+The following hashes are recognized:
+
+- MD5 and NTLM (32 hex digits)
+- SHA1 (40 hex digits)
+- SHA256 (64 hex digits)
+- SHA512 (128 hex digits)
+- bcrypt (``$2a$``, ``$2b$`` or ``$2y$``), only if the ``bcrypt`` module is
+  installed. bcrypt is slow by design, so every password is checked against
+  each bcrypt hash individually.
+
+"""
+from typing import Callable, Dict, Iterable, List, Tuple
+import hashlib
+import struct
+import regex as re
+
+from Crypto.Hash import MD4
+import numpy as np
+
+try:
+    import bcrypt
+except ImportError:
+    # bcrypt hashes are ignored without the module
+    bcrypt = None
+
+HEX_PATTERN = re.compile(
+    rb"(?<![a-fA-F0-9])"
+    rb"(?:[a-fA-F0-9]{128}|[a-fA-F0-9]{64}|[a-fA-F0-9]{40}|[a-fA-F0-9]{32})"
+    rb"(?![a-fA-F0-9])"
+)
+BCRYPT_PATTERN = re.compile(rb"\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}")
+
+
+# MD4 constants (RFC 1320). Each round lists the message word and shift
+# for each of the 16 steps, along with the additive constant.
+MD4_ROUNDS = [
+    (
+        lambda x, y, z: (x & y) | (~x & z),
+        list(range(16)),
+        [3, 7, 11, 19],
+        0,
+    ),
+    (
+        lambda x, y, z: (x & y) | (x & z) | (y & z),
+        [0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15],
+        [3, 5, 9, 13],
+        0x5A827999,
+    ),
+    (
+        lambda x, y, z: x ^ y ^ z,
+        [0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15],
+        [3, 9, 11, 15],
+        0x6ED9EBA1,
+    ),
+]
+MD4_INIT = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+
+
+def md4_batch(messages: List[bytes]) -> List[bytes]:
+    """
+    MD4 digests of many messages of at most 55 bytes (a single block). Each
+    step of the compression function runs over the whole batch at once.
+    """
+
+    if not messages:
+        return []
+
+    # Pad each message into a single 64 byte block
+    blocks = b"".join(
+        message
+        + b"\x80"
+        + bytes(55 - len(message))
+        + struct.pack("<Q", len(message) * 8)
+        for message in messages
+    )
+    words = np.frombuffer(blocks, dtype="<u4").reshape(-1, 16).T
+
+    state = [np.full(len(messages), value, dtype=np.uint32) for value in MD4_INIT]
+
+    for function, order, shifts, constant in MD4_ROUNDS:
+        for step, index in enumerate(order):
+            # The registers rotate through the steps (a, d, c, b, ...)
+            r = -step % 4
+            x, y, z = state[(r + 1) % 4], state[(r + 2) % 4], state[(r + 3) % 4]
+            value = state[r] + function(x, y, z) + words[index] + np.uint32(constant)
+            shift = shifts[step % 4]
+            state[r] = (value << np.uint32(shift)) | (value >> np.uint32(32 - shift))
+
+    for register, value in zip(state, MD4_INIT):
+        register += np.uint32(value)
+
+    digests = np.stack(state, axis=1).astype("<u4").tobytes()
+    return [digests[i : i + 16] for i in range(0, len(digests), 16)]
+
+
+def ntlm(passwords: List[bytes]) -> List[bytes]:
+    """ NTLM is MD4 over the UTF-16 encoding of each password """
+
+    encoded = []
+    for password in passwords:
+        try:
+            encoded.append(password.decode("utf-8").encode("utf-16le"))
+        except UnicodeDecodeError:
+            encoded.append(password.decode("latin-1").encode("utf-16le"))
+
+    # Short passwords (almost all of them) fit in a single MD4 block
+    short = [i for i, message in enumerate(encoded) if len(message) <= 55]
+    digests = [None] * len(encoded)
+    for i, digest in zip(short, md4_batch([encoded[i] for i in short])):
+        digests[i] = digest
+
+    for i, message in enumerate(encoded):
+        if digests[i] is None:
+            digests[i] = MD4.new(message).digest()
+
+    return digests
+
+
+ALGORITHMS: Dict[str, Callable[[List[bytes]], List[bytes]]] = {
+    "md5": lambda passwords: [hashlib.md5(p).digest() for p in passwords],
+    "ntlm": ntlm,
+    "sha1": lambda passwords: [hashlib.sha1(p).digest() for p in passwords],
+    "sha256": lambda passwords: [hashlib.sha256(p).digest() for p in passwords],
+    "sha512": lambda passwords: [hashlib.sha512(p).digest() for p in passwords],
+}
+"""
+Functions returning the raw digest of each password in a batch for each
+algorithm
+"""
+
+HEX_ALGORITHMS: Dict[int, List[str]] = {
+    32: ["md5", "ntlm"],
+    40: ["sha1"],
+    64: ["sha256"],
+    128: ["sha512"],
+}
+"""
+Possible algorithms for hex encoded hashes of each length
+"""
+
+
+class HashSet(object):
+    """
+    The hashes found within some data, grouped by algorithm.
+
+    :property digests: For each algorithm, a dictionary mapping each raw
+                       digest to the hash as it was found
+    :property bcrypt: The bcrypt hashes found (if the module is available)
+    """
+
+    def __init__(self, data: bytes):
+        super(HashSet, self).__init__()
+
+        self.digests: Dict[str, Dict[bytes, bytes]] = {}
+        self.bcrypt: List[bytes] = []
+
+        # Hex hashes may match several algorithms of the same size
+        for match in HEX_PATTERN.findall(data):
+            for algorithm in HEX_ALGORITHMS[len(match)]:
+                digests = self.digests.setdefault(algorithm, {})
+                digests[bytes.fromhex(match.decode("utf-8"))] = match
+
+        if bcrypt is not None:
+            self.bcrypt = list(dict.fromkeys(BCRYPT_PATTERN.findall(data)))
+
+    def __len__(self) -> int:
+        """ The number of distinct hashes """
+        hashes = set(self.bcrypt)
+        for digests in self.digests.values():
+            hashes.update(digests.values())
+        return len(hashes)
+
+    @property
+    def algorithms(self) -> List[str]:
+        """ The algorithms which may have produced the hashes """
+        return list(self.digests) + (["bcrypt"] if self.bcrypt else [])
+
+    def crack(
+        self, passwords: Iterable[bytes]
+    ) -> Tuple[List[Tuple[str, bytes, bytes]], int]:
+        """
+        Check a batch of passwords against every hash.
+
+        :param passwords: The candidate passwords
+        :return: A list of (algorithm, hash, password) tuples for each cracked
+                 hash, and the number of hashes computed
+        """
+
+        passwords = list(passwords)
+        found = []
+        count = 0
+
+        for algorithm, digests in self.digests.items():
+
+            # Hash the whole batch, then look for any known digest
+            batch = ALGORITHMS[algorithm](passwords)
+            count += len(batch)
+
+            if digests.keys().isdisjoint(batch):
+                continue
+
+            for password, digest in zip(passwords, batch):
+                if digest in digests:
+                    found.append((algorithm, digests[digest], password))
+
+        for hashed in self.bcrypt:
+            for password in passwords:
+                count += 1
+                if bcrypt.checkpw(password, hashed):
+                    found.append(("bcrypt", hashed, password))
+                    break
+
+        return found, count
@@ -1,79 +1,109 @@
 """
 
-Attempt to crack an MD5 hash.
+Attempt to crack MD5 (and other) hashes.
 
-This unit finds potential MD5 hashes matching the defined regular expression:
+This unit finds potential hashes within the target using the
+:class:`katana.units.crack.HashSet`. Along with MD5, this recognizes NTLM,
+SHA1, SHA256, SHA512 and bcrypt hashes. Hex hashes are matched with the
+regular expression:
 
 .. code-block:: python
 
-    MD5_PATTERN = re.compile(rb"[a-fA-F0-9]{32}", re.DOTALL | re.MULTILINE)
+    HEX_PATTERN = re.compile(
+        rb"(?<![a-fA-F0-9])"
+        rb"(?:[a-fA-F0-9]{128}|[a-fA-F0-9]{64}|[a-fA-F0-9]{40}|[a-fA-F0-9]{32})"
+        rb"(?![a-fA-F0-9])"
+    )
 
-This unit cracks the MD5 hash by using a supplied password or dictionary
-file. Currently it does not support reaching out to an online cracker,
-though this would be ideal.
+This unit cracks the hashes by using a supplied password or dictionary
+file. Each range of the dictionary is hashed in one batch and checked
+against every hash at once. The number of hashes computed per second is
+reported whenever another hash is cracked. Currently it does not support
+reaching out to an online cracker, though this would be ideal.
+
+Hashing short passwords holds the GIL, so ranges are only cracked in
+parallel with the ``hybrid`` (or ``process``) executor, which ships them to
+the process pool. With the default ``thread`` executor, the worker threads
+take turns.
 
 """
 from typing import Generator, Any
-import hashlib
-import regex as re
+import threading
+import time
 
 from katana.manager import Manager
 from katana.target import Target
 from katana.unit import Unit as BaseUnit
 from katana.unit import NotApplicable
-
-MD5_PATTERN = re.compile(rb"[a-fA-F0-9]{32}", re.DOTALL | re.MULTILINE)
+from katana.units.crack import HashSet
 
 
 class Unit(BaseUnit):
 
     # Fill in your groups
-    GROUPS: list = ["crack", "bruteforce"]
+    GROUPS: list = ["crack", "bruteforce", "hash"]
 
     # Default priority is 50
     PRIORITY: int = 75
 
     # Disable all recursion
     NO_RECURSE: bool = True
+    # Hashing whole dictionary ranges is CPU bound
+    CPU_BOUND: bool = True
+    # A target can't contain a hash without at least 32 bytes
+    MIN_SIZE: int = 32
 
     def __init__(self, *args, **kwargs):
         super(Unit, self).__init__(*args, **kwargs)
 
-        # Find matches in the target
-        self.matches: list = MD5_PATTERN.findall(self.target.raw)
+        # Find hashes in the target
+        self.hashes: HashSet = HashSet(self.target.raw)
+
+        if len(self.hashes) == 0:
+            raise NotApplicable("No hashes found")
 
-        if self.matches is None or len(self.matches) == 0:
-            raise NotApplicable("No md5 hashes found")
+        # Hashes cracked so far, and throughput statistics
+        self.cracked: set = set()
+        self.hashed: int = 0
+        self.elapsed: float = 0.0
+        self.stats_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks can't be shipped to the process pool
+        state = super(Unit, self).__getstate__()
+        del state["stats_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stats_lock = threading.Lock()
 
     def enumerate(self) -> Generator[Any, None, None]:
         """
         Yield unit cases. This will read in the supplied password or
-        a given dictionary file to generate new MD5 hashes and test
-        them against the supplied MD5 hash target.
+        a given dictionary file to generate new hashes and test
+        them against the hashes in the target.
 
-        :return: Generator of target cases, in this case a byte string.
+        :return: Generator of target cases, in this case an iterable of byte
+                 strings (a list, or a range of the dictionary file).
 
         """
 
         # Manually specified passwords first
         passwords = self.manager.get(str(self), "password", fallback="")
         if passwords != "":
-            for p in passwords.split(","):
-                yield bytes(p, "utf-8")
+            yield [bytes(p, "utf-8") for p in passwords.split(",")]
 
         # Dictionary passwords next
-        dictionary = self.manager.get(str(self), "dict", fallback=None)
-        if dictionary is not None:
-            with open(dictionary, "rb") as f:
-                for line in f:
-                    yield line.rstrip(b"\n")
+        yield from self.wordlist_ranges()
 
     def evaluate(self, case: Any) -> None:
         """
-        Evaluate the target. This will take the current ``case`` supplied by
-        the ``enumerate`` function, generate an MD5 hash with it and compare
-        it to the supplied target. If it is a match, we have successfully
-        cracked the hash and that ``case`` value is registered as new data.
+        Evaluate the target. This will take each password in the current
+        ``case`` supplied by the ``enumerate`` function, hash it with each
+        possible algorithm and compare it to the hashes in the target. If
+        it is a match, we have successfully cracked the hash and that
+        password is registered as new data.
 
 
         :param case: A case returned by ``enumerate``
@@ -81,12 +111,61 @@ class Unit(BaseUnit):
         :return: None. This function should not return any data.
         """
 
-        new_hash: bytes = bytes(hashlib.md5(case).hexdigest(), "utf-8")
-        for match in self.matches:
-            if new_hash == match:
-                self.manager.register_data(
-                    self, {match.decode("utf-8"): repr(case)[2:-1]}, recurse=False
-                )
+        start = time.perf_counter()
+        found, count = self.hashes.crack(case)
+        elapsed = time.perf_counter() - start
+
+        # This may be a copy of the unit in a worker process, so the
+        # statistics are kept by the real unit
+        self.manager.merge(self, (found, count, elapsed))
+
+    def merge(self, result: Any) -> None:
+        """
+        Merge the hashes cracked by a case, and the time it took, into the
+        statistics of the unit. Each cracked hash is registered as new data
+        once, along with the throughput so far. When every hash is cracked,
+        the unit is stopped.
+
+        :param result: The cracked hashes, number of passwords hashed and
+                       elapsed time of a case
+
+        :return: None. This function should not return any data.
+        """
 
-                # Now that we have a match, stop this function
-                return
+        found, count, elapsed = result
+
+        with self.stats_lock:
+            self.hashed += count
+            self.elapsed += elapsed
+
+            # Only report each hash once
+            found = [item for item in found if item[1] not in self.cracked]
+            self.cracked.update(item[1] for item in found)
+            cracked, hashed, elapsed = len(self.cracked), self.hashed, self.elapsed
+
+        for algorithm, match, password in found:
+            self.manager.register_data(
+                self,
+                {
+                    "algorithm": algorithm,
+                    match.decode("utf-8"): repr(password)[2:-1],
+                },
+                recurse=False,
+            )
+
+        if not found:
+            return
+
+        # Report the throughput, even if some hashes are never cracked
+        rate = hashed / elapsed if elapsed else 0
+        self.manager.register_data(
+            self,
+            "cracked {0} of {1} hashes after {2} hashes ({3:.0f} hashes/sec)".format(
+                cracked, len(self.hashes), hashed, rate
+            ),
+            recurse=False,
+        )
+
+        # Now that we have every hash, stop this unit
+        if cracked >= len(self.hashes):
+            self.completed = True
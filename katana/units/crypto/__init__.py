@@ -12,8 +12,6 @@ useful file (like an image, document, or something else specific).
 
 from katana.unit import NotApplicable
 from katana.unit import Unit as BaseUnit
-from katana.util import is_good_magic
-import magic
 
 
 class CryptoUnit(BaseUnit):
@@ -22,6 +20,9 @@ class CryptoUnit(BaseUnit):
     unit is a URL or a potentially useful file.
     """
 
+    # Useful files (e.g. images or documents) are not mangled
+    SKIP_GOOD_MAGIC = True
+
     def __init__(self, *args, **kwargs):
 
         super(CryptoUnit, self).__init__(*args, **kwargs)
@@ -29,8 +30,3 @@ class CryptoUnit(BaseUnit):
         # if this is a URL, and we can reach it, don't try to mangle anything
         if self.target.is_url and not self.target.url_accessible:
             raise NotApplicable("this is a URL")
-
-        # if this is a given file, ensure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
@@ -16,7 +16,7 @@ this will bruteforce and use the range provided with the English alphabet,
 letters A-Z.
 """
 
-from typing import Generator, Any
+from typing import Generator, Any, List
 from math import gcd
 from string import ascii_uppercase
 from Crypto.Util.number import inverse
@@ -50,6 +50,15 @@ def affine(c: int, a: int, b: int, alphabet: bytes) -> str:
         return c
 
 
+def affine_table(a: int, b: int, alphabet: bytes) -> bytes:
+    """
+    Build a ``bytes.translate`` table which performs the affine cipher with
+    the given A and B values on every possible byte.
+    """
+
+    return bytes([affine(c, a, b, alphabet) for c in range(256)])
+
+
 class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
     GROUPS: list = ["crypto", "affine"]
@@ -77,6 +86,11 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
     infinite loop.
     """
 
+    CPU_BOUND: bool = True
+    """
+    Every A/B pair is applied to the whole target.
+    """
+
     def enumerate(self) -> Generator[Any, None, None]:
         """
         Yield unit cases. This will check if any given ``A`` or ``B`` 
@@ -106,57 +120,66 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
         if affine_a == -1 and affine_b == -1:
             for a in range(len(affine_alphabet)):
                 for b in range(len(affine_alphabet)):
-                    if gcd(a, len(affine_alphabet)):
+                    if gcd(a, len(affine_alphabet)) == 1:
                         yield (a, b)
 
         elif affine_a != -1 and affine_b == -1:
             for b in range(len(affine_alphabet)):
-                if gcd(affine_a, len(affine_alphabet)):
+                if gcd(affine_a, len(affine_alphabet)) == 1:
                     yield (affine_a % len(affine_alphabet), b)
 
         elif affine_b != -1 and affine_a == -1:
             for a in range(len(affine_alphabet)):
-                if gcd(a, len(affine_alphabet)):
+                if gcd(a, len(affine_alphabet)) == 1:
                     yield (a, affine_b % len(affine_alphabet))
         else:
             if affine_a != -1 and affine_b != -1:
-                if gcd(affine_a, len(affine_alphabet)):
+                if gcd(affine_a, len(affine_alphabet)) == 1:
                     yield affine_a, affine_b
 
     def evaluate(self, case: Any) -> None:
         """
-        Evaluate the target. This will perform
-        
+        Evaluate the target. This will perform the inverse affine cipher.
+
         :param case: A case returned by ``enumerate``, in this case a tuple of\
         ``A`` and ``B`` values.
-        
+
         :return: None. This function should not return any data.
 
         """
 
-        # Extract out the values from the given case
-        a, b = case
+        self.evaluate_batch([case])
+
+    def evaluate_batch(self, cases: List[Any]) -> None:
+        """
+        Evaluate the target for every ``A`` and ``B`` pair in the batch. Each
+        pair is applied to the whole target with a translation table.
+
+        :param cases: A list of cases returned by ``enumerate``.
+
+        :return: None. This function should not return any data.
+
+        """
 
         alphabet: bytes = bytes(self.get("alphabet", ascii_uppercase), "utf-8")
+        data: bytes = bytes(self.target.raw)
 
-        # Use an empty list to keep track of the new decrypted string
-        result: list = []
+        for a, b in cases:
 
-        # Perform the affine cipher operation to decrypt
-        new_b: int = abs(b - len(alphabet))
-        new_a: int = inverse(a, len(alphabet))
-        new_b: int = (new_a * new_b) % len(alphabet)
+            # Only values of A coprime to the alphabet length are invertible
+            if gcd(a, len(alphabet)) != 1:
+                continue
 
-        for letter in self.target.raw:
-            # Attempt to inverse the affine cipher
-            result.append(affine(letter, new_a, new_b, alphabet))
+            # Perform the affine cipher operation to decrypt
+            new_b: int = abs(b - len(alphabet))
+            new_a: int = inverse(a, len(alphabet))
+            new_b: int = (new_a * new_b) % len(alphabet)
 
-        # Put it back together
-        result: bytes = bytes(result)
+            result: bytes = data.translate(affine_table(new_a, new_b, alphabet))
 
-        # If we found a result that was not as we saw it before,
-        # register it as data and look for flags!
-        if result != self.target.raw:
-            self.manager.register_data(
-                self, {f"{a},{b}": result.decode("utf-8")}, recurse=False
-            )
+            # If we found a result that was not as we saw it before,
+            # register it as data and look for flags!
+            if result != data:
+                self.manager.register_data(
+                    self, {f"{a},{b}": result.decode("utf-8")}, recurse=False
+                )
@@ -17,13 +17,18 @@ with the key being the typical English alphabet, just reversed. Basically,
 A-Z maps to Z-A.
 
 """
-import io
 import string
 from typing import Any
 
 from katana.unit import NotEnglishAndPrintableUnit
 from katana.units.crypto import CryptoUnit
 
+# Translation table mapping A-Z to Z-A (and a-z to z-a)
+ATBASH_TABLE: bytes = bytes.maketrans(
+    bytes(string.ascii_uppercase + string.ascii_lowercase, "utf-8"),
+    bytes(string.ascii_uppercase[::-1] + string.ascii_lowercase[::-1], "utf-8"),
+)
+
 
 class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
@@ -62,32 +67,11 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
         :return: None. This function should not return any data.
         """
 
-        # Create a list to store the new information in.
-        new_string: list = []
-
-        # Reverse the alphabet, to be used as the mapping key
-        reverse_upper: str = string.ascii_uppercase[::-1]
-        reverse_lower: str = string.ascii_lowercase[::-1]
-
         # Perform the actual mapping translation/atbash cipher
-        with io.TextIOWrapper(self.target.stream, encoding="utf-8") as stream:
-            try:
-                for ch in iter(lambda: stream.read(1), ""):
-                    if ch in string.ascii_uppercase:
-                        new_string.append(
-                            reverse_upper[string.ascii_uppercase.index(ch)]
-                        )
-                    elif ch in string.ascii_lowercase:
-                        new_string.append(
-                            reverse_lower[string.ascii_lowercase.index(ch)]
-                        )
-                    else:
-                        new_string.append(ch)
-            except UnicodeDecodeError:
-                pass
-
-        # Join together the final result as a complete string
-        result: str = "".join(new_string)
+        try:
+            result: str = bytes(self.target.raw).translate(ATBASH_TABLE).decode("utf-8")
+        except UnicodeDecodeError:
+            return
 
         # Register the data!
         self.manager.register_data(self, result)
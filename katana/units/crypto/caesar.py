@@ -13,9 +13,8 @@ URL or potentially useful file.
 
 """
 
-from typing import Generator, Any
+from typing import Generator, Any, List
 import string
-import io
 
 from katana.manager import Manager
 from katana.target import Target
@@ -35,6 +34,20 @@ def shift_char(c: str, shift: int, alphabet: str) -> str:
     return alphabet[(idx + shift) % len(alphabet)]
 
 
+def shift_table(shift: int) -> bytes:
+    """
+    Build a ``bytes.translate`` table which shifts every ASCII letter by the
+    given amount, leaving all other bytes as-is.
+    """
+    upper = string.ascii_uppercase
+    lower = string.ascii_lowercase
+    shift %= len(upper)
+    return bytes.maketrans(
+        bytes(upper + lower, "utf-8"),
+        bytes(upper[shift:] + upper[:shift] + lower[shift:] + lower[:shift], "utf-8"),
+    )
+
+
 class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
     GROUPS = ["crypto", "caesar"]
@@ -91,21 +104,23 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
         """
 
-        # Create a variable to store the new data
-        result: list = []
+        self.evaluate_batch([case])
+
+    def evaluate_batch(self, cases: List[Any]) -> None:
+        """
+        Perform the caesar cipher on the target for every shift in the batch.
+
+        :param cases: A list of cases returned by ``enumerate``.
+
+        :return: None. This function should not return any data.
+
+        """
 
-        # Perform the caesar cipher operation, character by character
-        with io.TextIOWrapper(self.target.stream, encoding="utf-8") as stream:
-            for c in iter(lambda: stream.read(1), ""):
-                new_c = shift_char(c, case, string.ascii_uppercase)
-                if new_c is None:
-                    new_c = shift_char(c, case, string.ascii_lowercase)
-                if new_c is None:
-                    new_c = c
-                result.append(new_c)
+        data = bytes(self.target.raw)
 
-        # Join together the new data
-        result: str = "".join(result)
+        for case in cases:
+            # Perform the caesar cipher operation over the whole target
+            result: str = data.translate(shift_table(case)).decode("utf-8")
 
-        # Give the data to Katana!
-        self.manager.register_data(self, result)
+            # Give the data to Katana!
+            self.manager.register_data(self, result)
@@ -13,7 +13,7 @@ but not readable English. It also inherits from the
 URL or potentially useful file.
 
 """
-from typing import Generator, Any
+from typing import Generator, Any, List
 
 from katana.unit import NotEnglishAndPrintableUnit
 from katana.unit import NotApplicable
@@ -46,6 +46,11 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
     infinite loop.
     """
 
+    CPU_BOUND = True
+    """
+    All 255 shifts are applied to the whole target.
+    """
+
     def enumerate(self) -> Generator[Any, None, None]:
         """
         Yield unit cases. The end-user can either supply a ``shift`` value
@@ -74,15 +79,25 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
         """
 
-        # Create a variable to store the new data
-        result: list = []
+        self.evaluate_batch([shift])
+
+    def evaluate_batch(self, shifts: List[int]) -> None:
+        """
+        Perform the caesar cipher on the target for every shift in the
+        batch. Each shift is applied with a ``bytes.translate`` table, so the
+        target is only copied out of the file once per batch.
+
+        :param shifts: A list of cases returned by ``enumerate``.
+
+        :return: None. This function should not return any data.
+
+        """
+
+        data = bytes(self.target.raw)
 
-        # Perform the caesar cipher operation, character by character
-        for c in self.target.raw:
-            if type(c) is int:
-                result.append((c + shift) % 255)
-            elif type(c) is bytes:
-                result.append((ord(c) + shift) % 255)
+        for shift in shifts:
+            # Build the translation table for this shift
+            table = bytes([(c + shift) % 255 for c in range(256)])
 
-        # Register the data
-        self.manager.register_data(self, bytes(result))
+            # Register the data
+            self.manager.register_data(self, data.translate(table))
@@ -32,11 +32,11 @@ from katana.unit import NotEnglishAndPrintableUnit, NotApplicable
 from katana.units.crypto import CryptoUnit
 
 
-def decodeSubstitute(cipher: str, time=3, spaces=True) -> str:
+def decodeSubstitute(cipher: str, time=3, spaces=True, http=requests) -> str:
     """
     This is stolen from https://github.com/rallip/substituteBreaker
-    All it does is use the ``requests`` module to send the ciphertext to
-    quipqiup and returns the results as a string.
+    All it does is use the ``requests`` module (or the given HTTP client) to
+    send the ciphertext to quipqiup and returns the results as a string.
     """
     url = "https://6n9n93nlr5.execute-api.us-east-1.amazonaws.com/prod/solve"
     clues = ""
@@ -45,7 +45,7 @@ def decodeSubstitute(cipher: str, time=3, spaces=True) -> str:
         "Content-type": "application/x-www-form-urlencoded",
     }
 
-    return requests.post(url, data=json.dumps(data), headers=headers).text
+    return http.post(url, data=json.dumps(data), headers=headers).text
 
 
 class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
@@ -69,6 +69,12 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
     lower priority.
     """
 
+    CACHEABLE = False
+    """
+    Results come from the quipqiup web service, which may be unreachable or
+    give a different answer next time, so they are never cached.
+    """
+
     RECURSE_SELF = False
     """
     This unit **does not recurse**. It simply looks for flags in the output of
@@ -83,7 +89,7 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
             raise units.NotApplicable("unicode error, unlikely usable cryptogram")
 
         try:
-            requests.get(
+            self.manager.http.get(
                 "https://6n9n93nlr5.execute-api.us-east-1.amazonaws.com/prod/solve"
             )
         except requests.exceptions.ConnectionError:
@@ -101,7 +107,7 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
 
         with io.TextIOWrapper(self.target.stream, encoding="utf-8") as stream:
 
-            j = json.loads(decodeSubstitute(stream.read()))
+            j = json.loads(decodeSubstitute(stream.read(), http=self.manager.http))
 
             found_solution = ""
             best_score = -10
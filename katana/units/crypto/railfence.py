@@ -144,6 +144,11 @@ class Unit(NotEnglishAndPrintableUnit, CryptoUnit):
     This unit does not recurse into itself. That would be silly.
     """
 
+    CPU_BOUND = True
+    """
+    The fence is built and read in python for every rail count and offset.
+    """
+
     def __init__(self, *args, **kwargs):
         super(Unit, self).__init__(*args, **kwargs)
 
@@ -5,15 +5,28 @@ You can supply a ``key`` argument to use for the XOR operation.
 With the current implementation, if the key is not provided, this unit will
 attempt to bruteforce the XOR with a single-byte range (1-255).
 
+Single-byte keys are evaluated as a batch. Keys which would produce
+non-printable output are ruled out using only the distinct byte values
+present in the target, and the remaining keys are applied with
+``bytes.translate`` lookup tables.
+
 """
 
-import io
-from typing import Any
+from typing import Any, List
 
-import binascii
+import numpy
 
 from katana.unit import Unit as BaseUnit
 from katana.units.crypto import CryptoUnit
+from katana.util import byte_histogram
+
+# Lookup tables for every single-byte key
+XOR_TABLES: List[bytes] = [
+    (numpy.arange(256, dtype=numpy.uint8) ^ key).tobytes() for key in range(256)
+]
+
+# Byte values which decode (as latin-1) to printable characters
+PRINTABLE = numpy.array([chr(c).isprintable() for c in range(256)])
 
 
 def xor(data, key):
@@ -29,20 +42,16 @@ def xor(data, key):
 
     # Handle a single byte key gracefully
     if type(key) is int:
-        key = bytes([key])
+        return bytes(data).translate(XOR_TABLES[key])
     elif type(key) is str:
         key = key.encode("utf-8")
 
-    result = []
-
     # XOR with repeating key
-    for i, b in enumerate(data):
-        if type(b) is bytes:
-            b = b[0]
-        result.append(b ^ key[i % len(key)])
+    data = numpy.frombuffer(data, dtype=numpy.uint8)
+    key = numpy.frombuffer(key, dtype=numpy.uint8)
 
     # Return bytes result
-    return bytes(result)
+    return (data ^ numpy.tile(key, -(-len(data) // len(key)))[: len(data)]).tobytes()
 
 
 class Unit(CryptoUnit):
@@ -71,39 +80,67 @@ class Unit(CryptoUnit):
     Do not recurse into self.
     """
 
+    CPU_BOUND = True
+    """
+    Every key is applied to the whole target.
+    """
+
     # Inheriting from a CryptoUnit will ensure this will not run on URLs
     # or files that could be anything useful (image, document, audio, etc.)
 
-    def evaluate(self, case: Any) -> None:
+    def enumerate(self):
+        """
+        Yield unit cases. This is either the provided ``key`` argument, or
+        every single-byte key in the range of 1-255.
         """
-        Evaluate the target. Perform the XOR operation with the provided
-        ``key`` argument. If no key is provided, it will bruteforce a
-        single-byte XOR within the range of 1-255.
 
-        :param case: A case returned by ``enumerate``. For this unit, \
-        the ``enumerate`` function is not used.
+        if self.get("key"):
+            yield self.get("key")
+        else:
+            yield from range(1, 256)
 
+    def evaluate(self, case: Any) -> None:
+        """
+        Evaluate the target. Perform the XOR operation with a single key.
+
+        :param case: A case returned by ``enumerate``. This is the key.
 
         :return: None. This function should not return any data.
         """
 
-        # Get the value passed
-        xor_key = self.get("key")
+        self.evaluate_batch([case])
 
-        if xor_key:
-            # if a value was actually passed, use it in a loop
-            xor_key = [xor_key]
-        else:
-            # if a value is not supplied, bruteforce in the single-byte range
-            xor_key = range(1, 255)
+    def evaluate_batch(self, cases: List[Any]) -> None:
+        """
+        Evaluate the target with every key in ``cases``. Any printable
+        result is registered as new data.
+
+        :param cases: A list of keys returned by ``enumerate``.
 
-        for each_key in xor_key:
-            try:
-                result = xor(self.target.raw, each_key).decode("latin-1")
+        :return: None. This function should not return any data.
+        """
+
+        data = bytes(self.target.raw)
 
-                if result.isprintable():
+        # Every single-byte key is checked at once against the byte values
+        # present in the target
+        keys = [key for key in cases if type(key) is int]
+        if keys:
+            present = numpy.flatnonzero(byte_histogram(data))
+            printable = PRINTABLE[
+                present[None, :] ^ numpy.array(keys, dtype=numpy.uint8)[:, None]
+            ].all(axis=1)
+
+            for key, is_printable in zip(keys, printable):
+                if is_printable:
+                    result = data.translate(XOR_TABLES[key]).decode("latin-1")
                     self.manager.register_data(self, result)
 
-            except (UnicodeDecodeError, binascii.Error):
-                # if we cannot decode it, stop trying!
-                pass
+        # Multi-byte keys
+        for key in cases:
+            if type(key) is int:
+                continue
+
+            result = xor(data, key).decode("latin-1")
+            if result.isprintable():
+                self.manager.register_data(self, result)
@@ -149,6 +149,12 @@ class Unit(BaseUnit):
     priority.
     """
 
+    CPU_BOUND = True
+    """
+    Programs run in a python interpreter loop, which is also used by other
+    brainfuck variants.
+    """
+
     def evaluate(self, case: Any) -> None:
         """
         Evaluate the target. Run the target as Brainfuck code and
@@ -10,7 +10,6 @@ look for flags in the result.
 
 
 import os
-import subprocess
 import re
 from typing import Any
 
@@ -73,7 +72,8 @@ class Unit(NotEnglishUnit):
             jsfuck = jsfuck.decode("utf-8")
 
             try:
-                output = subprocess.Popen(
+                output = self.manager.runner.run(
+                    self,
                     [
                         "node",
                         "-e",
@@ -81,16 +81,12 @@ class Unit(NotEnglishUnit):
                             jsfuck_lib, jsfuck
                         ),
                     ],
-                    stderr=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
                 )
             except OSError:
                 # This cannot run the command. Stop trying this unit!!
                 return
 
-            response = output.communicate()
-
             # If we got anything, add it as data!
-            if response[0] != b"":
-                response = response[0].decode("utf-8")
+            if output.stdout != b"":
+                response = output.stdout.decode("utf-8")
                 self.manager.register_data(self, response)
@@ -196,6 +196,11 @@ class Unit(NotEnglishUnit):
     priority.
     """
 
+    CPU_BOUND = True
+    """
+    Programs run in a python interpreter loop.
+    """
+
     def evaluate(self, case: Any):
         """
         Evaluate the target. Run the target as Malbolge code and
@@ -84,6 +84,11 @@ class Unit(NotEnglishUnit):
     priority
     """
 
+    CPU_BOUND = True
+    """
+    Programs are translated to brainfuck and run by its interpreter.
+    """
+
     def __init__(self, *args, **kwargs):
         super(Unit, self).__init__(*args, **kwargs)
 
@@ -13,7 +13,6 @@ utility. The syntax is::
 """
 
 
-import subprocess
 from typing import Any
 
 from katana.unit import FileUnit, NotApplicable
@@ -44,12 +43,7 @@ class Unit(FileUnit):
     high priority due to speed and broadness of applicability
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact an image.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["image"])
+    KEYWORDS = ["image"]
 
     def evaluate(self, case: Any):
         """
@@ -62,20 +56,12 @@ class Unit(FileUnit):
         :return: None. This function should not return any data.
         """
 
-        # Run npiet against the image
-        p = subprocess.Popen(
-            ["npiet", "-e", "1000000", self.target.path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        # Run npiet against the image, and bail after 1 second. If the timeout
+        # happened, that's fine -- the output so far is still used
+        p = self.manager.runner.run(
+            self, ["npiet", "-e", "1000000", self.target.path], timeout=1
         )
 
-        # Wait for the program to finish, or bail after 1 seconds
-        try:
-            p.wait(timeout=1)
-        except subprocess.TimeoutExpired:
-            # if the timeout happened, that's fine -- stop the process and continue
-            p.kill()
-
         # Look for flags, add the results, and recurse on all output
-        for line in p.stdout:
+        for line in p.stdout.splitlines(keepends=True):
             self.manager.register_data(self, line)
@@ -53,6 +53,11 @@ class Unit(PrintableDataUnit):
     priority
     """
 
+    CPU_BOUND = True
+    """
+    Programs are run by the brainfuck interpreter.
+    """
+
     def __init__(self, *args, **kwargs):
         super(PrintableDataUnit, self).__init__(*args, **kwargs)
 
@@ -9,7 +9,6 @@ The syntax runs as::
 """
 
 from typing import Any
-import subprocess
 import zipfile
 import os
 import hashlib
@@ -91,10 +90,10 @@ class Unit(FileUnit):
             "--dd=.*",
             "-M",
         ]
-        p = subprocess.Popen(parms, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        p = self.manager.runner.run(self, parms)
 
-        # Wait for binwalk to finish
-        if p.wait() != 0:
+        # Check whether binwalk finished
+        if p.returncode != 0:
             # if it failed, clean and give up
             shutil.rmtree(binwalk_directory)
             return
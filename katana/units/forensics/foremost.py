@@ -9,7 +9,6 @@ The syntax runs as::
 """
 
 from typing import Any
-import subprocess
 import os
 import hashlib
 
@@ -80,16 +79,11 @@ class Unit(FileUnit):
         # Grab the directory to store results
         foremost_directory = self.get_output_dir()
 
-        # Run foremost on the given target
-        p = subprocess.Popen(
-            ["foremost", self.target.path, "-o", foremost_directory],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        # Run foremost on the given target, and wait for it to finish
+        self.manager.runner.run(
+            self, ["foremost", self.target.path, "-o", foremost_directory]
         )
 
-        # Wait for foremost to finish
-        p.wait()
-
         # Create a dictionary to keep track of the files
         results = {"extracted_files": []}
 
@@ -38,12 +38,7 @@ class Unit(FileUnit):
     high priority due to speed and broadness of applicability
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a GZIP archive.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["gzip compressed"])
+    KEYWORDS = ["gzip compressed"]
 
     def evaluate(self, case: str):
         """
@@ -8,7 +8,7 @@ This unit uses the Python library for Tesseract, which must be installed
 for this to run.
 """
 
-from typing import Generator, Any
+from typing import Generator, Any, Union
 
 from katana.manager import Manager
 from katana.target import Target
@@ -19,16 +19,18 @@ import pytesseract
 from PIL import Image
 
 
-def attempt_ocr(image_path: str) -> str:
+def attempt_ocr(image: Union[str, Image.Image]) -> str:
     """
-    Run tesseract against an image file and return the string found
+    Run tesseract against an image and return the string found
 
-    :param image_path: The path to an image file.
+    :param image: The path to an image file, or a PIL image.
 
     :return: The string determined by Tesseract's OCR efforts.
     """
     try:
-        ocr_data = pytesseract.image_to_string(Image.open(image_path))
+        if isinstance(image, str):
+            image = Image.open(image)
+        ocr_data = pytesseract.image_to_string(image)
 
     # This function is meant to ran as a standalone, so catch this exception
     # in case we aren't doing any dependency checking
@@ -58,12 +60,7 @@ class Unit(FileUnit):
     Do not recurse into itself, since it will not provide another image.
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact an image.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["image"])
+    KEYWORDS = ["image"]
 
     def evaluate(self, case: Any) -> None:
         """
@@ -76,7 +73,12 @@ class Unit(FileUnit):
         :return: None. This function should not return any data.
         """
 
-        ocr_data = attempt_ocr(self.target.path)
+        # The decoded image is shared with the other image units
+        image = self.manager.images.get(self.target)
+        if image is None:
+            return
+
+        ocr_data = attempt_ocr(image.image())
 
         if ocr_data:
             self.manager.register_data(self, ocr_data)
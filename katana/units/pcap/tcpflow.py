@@ -11,7 +11,6 @@ is a PCAP file.
 
 """
 from typing import Any
-import subprocess
 import os
 import hashlib
 
@@ -44,13 +43,11 @@ class Unit(FileUnit):
     high priority due to speed and broadness of applicability
     """
 
+    KEYWORDS = ["capture file", "pcap"]
+
     # Verify this is not a URL..
     def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a PCAP file.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["capture file", "pcap"])
+        super(Unit, self).__init__(*args, **kwargs)
 
         if self.target.is_url and not self.target.url_accessible:
             raise NotApplicable("URL")
@@ -69,16 +66,11 @@ class Unit(FileUnit):
         # Grab the directory to store results
         tcpflow_directory = self.get_output_dir()
 
-        # Run tcpflow on the target
-        p = subprocess.Popen(
-            ["tcpflow", "-r", self.target.path, "-o", tcpflow_directory],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        # Run tcpflow on the target, and wait for it to finish
+        self.manager.runner.run(
+            self, ["tcpflow", "-r", self.target.path, "-o", tcpflow_directory]
         )
 
-        # Wait for tcpflow to finish
-        p.wait()
-
         # Create a dictionary to keep track of our results
         results = {"extracted_files": []}
 
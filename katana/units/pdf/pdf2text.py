@@ -40,12 +40,13 @@ class Unit(FileUnit):
     Again no PDF from this. So recursion is silly.
     """
 
+    KEYWORDS = ["pdf document"]
+
     def __init__(self, *args, **kwargs):
         """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a PDF file.
+        The constructor ensures the PDF can be parsed by ``pdftotext``.
         """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["pdf document"])
+        super(Unit, self).__init__(*args, **kwargs)
 
         try:
             self.pdf = pdftotext.PDF(self.target.stream)
@@ -12,7 +12,6 @@ is a PDF file.
 """
 
 import os
-import subprocess
 from typing import Any
 
 from katana.unit import FileUnit
@@ -43,13 +42,7 @@ class Unit(FileUnit):
     Again no PDF from this. So recursion is silly.    
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a PDF file.
-        """
-
-        super(Unit, self).__init__(*args, **kwargs, keywords=["pdf document"])
+    KEYWORDS = ["pdf document"]
 
     def evaluate(self, case: Any) -> None:
         """
@@ -72,21 +65,17 @@ class Unit(FileUnit):
         # Create a directory to store the images in
         directory_path = self.get_output_dir()
 
-        # Run the tool to carve out the images
-        p = subprocess.Popen(
+        # Run the tool to carve out the images, and wait for it to finish
+        self.manager.runner.run(
+            self,
             [
                 "pdfimages",
                 "-png",
                 self.target.path,
                 os.path.join(directory_path, "image"),
             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
         )
 
-        # Wait for the tool to finish
-        p.wait()
-
         # Loop through the files and recurse on them
         for (directory, _, files) in os.walk(directory_path):
             for filename in files:
@@ -15,7 +15,6 @@ is a PDF file.
 
 import io
 from typing import Any
-import subprocess
 
 from katana.unit import FileUnit
 
@@ -50,13 +49,7 @@ class Unit(FileUnit):
     Required depenencies for this unit "pdfinfo"
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a PDF file.
-        """
-
-        super(Unit, self).__init__(*args, **kwargs, keywords=["pdf document"])
+    KEYWORDS = ["pdf document"]
 
     def evaluate(self, case: Any) -> None:
         """
@@ -73,8 +66,9 @@ class Unit(FileUnit):
         user_password = self.get("user_password", default="")
         owner_password = self.get("owner_password", default="")
 
-        # Run the utility
-        p = subprocess.Popen(
+        # Run the utility, and wait for the process to finish
+        p = self.manager.runner.run(
+            self,
             [
                 "pdfinfo",
                 self.target.path,
@@ -83,12 +77,7 @@ class Unit(FileUnit):
                 "-opw",
                 owner_password,
             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
         )
 
-        # Wait for the process to finish
-        p.wait()
-
-        for line in p.stdout.readlines():
-            self.manager.register_data(self, line.rstrip(b"\n"))
+        for line in p.stdout.splitlines():
+            self.manager.register_data(self, line)
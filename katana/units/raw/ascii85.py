@@ -13,10 +13,6 @@ import base64
 import magic
 
 from katana.unit import Unit as BaseUnit
-from katana.unit import NotApplicable
-from katana.manager import Manager
-from katana.target import Target
-from katana.util import is_good_magic
 import katana.util
 
 
@@ -35,21 +31,9 @@ class Unit(BaseUnit):
     priority unit, because it is uncommon and highly matching.
     """
 
-    def __init__(self, manager: Manager, target: Target):
-        super(Unit, self).__init__(manager, target)
-
-        # Ensure the target is printable data
-        if not self.target.is_printable:
-            raise NotApplicable("not printable data")
-
-        # Ensure the target is not english
-        if self.target.is_english:
-            raise NotApplicable("seemingly english")
-
-        # if this was a given file, make sure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
+    TARGET_PRINTABLE = True
+    TARGET_ENGLISH = False
+    SKIP_GOOD_MAGIC = True
 
     def evaluate(self, case: Any):
         """
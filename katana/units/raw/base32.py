@@ -13,7 +13,6 @@ import regex as re
 
 from katana.unit import Unit as BaseUnit
 from katana.unit import NotApplicable
-from katana.util import is_good_magic
 import katana.util
 
 BASE32_PATTERN = rb"[A-Z2-7+/]+={0,6}"
@@ -35,22 +34,13 @@ class Unit(BaseUnit):
     priority.
     """
 
+    TARGET_PRINTABLE = True
+    TARGET_ENGLISH = False
+    SKIP_GOOD_MAGIC = True
+
     def __init__(self, *args, **kwargs):
         super(Unit, self).__init__(*args, **kwargs)
 
-        # Ensure this is printable data
-        if not self.target.is_printable:
-            raise NotApplicable("not printable data")
-
-        # Ensure this is not english data
-        if self.target.is_english:
-            raise NotApplicable("seemingly english")
-
-        # if this was a file, ensure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
-
         # Are there base32 chunks in the data?
         self.matches = BASE32_REGEX.findall(self.target.raw)
         if self.matches is None:
@@ -11,8 +11,6 @@ import magic
 import regex as re
 
 from katana.unit import RegexUnit
-from katana.unit import NotApplicable
-from katana.util import is_good_magic
 import katana.util
 
 
@@ -34,13 +32,7 @@ class Unit(RegexUnit):
     # What are we looking for?
     PATTERN = re.compile(rb"[a-zA-Z0-9+/]+", re.MULTILINE | re.DOTALL)
 
-    def __init__(self, *args, **kwargs):
-        super(Unit, self).__init__(*args, **kwargs)
-
-        # if this was a file, ensure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
+    SKIP_GOOD_MAGIC = True
 
     def evaluate(self, match):
         """
@@ -12,10 +12,6 @@ import magic
 import regex as re
 
 from katana.unit import RegexUnit
-from katana.unit import NotApplicable
-from katana.manager import Manager
-from katana.target import Target
-from katana.util import is_good_magic
 import katana.util
 
 BASE64_PATTERN = rb"[a-zA-Z0-9+/]+={0,2}"
@@ -40,13 +36,7 @@ class Unit(RegexUnit):
     # Regular expression pattern
     PATTERN = re.compile(rb"[a-zA-Z0-9+/]{4,}={0,2}", re.MULTILINE | re.DOTALL)
 
-    def __init__(self, manager: Manager, target: Target):
-        super(Unit, self).__init__(manager, target)
-
-        # if this was a file, ensure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
+    SKIP_GOOD_MAGIC = True
 
     def evaluate(self, match):
         """
@@ -12,10 +12,6 @@ import magic
 import regex as re
 
 from katana.unit import RegexUnit
-from katana.unit import NotApplicable
-from katana.util import is_good_magic
-from katana.manager import Manager
-from katana.target import Target
 import katana.util
 
 
@@ -37,13 +33,7 @@ class Unit(RegexUnit):
     # REGEX matching base58
     PATTERN = re.compile(rb"[\x21-\x75]{4,}", re.DOTALL | re.MULTILINE)
 
-    def __init__(self, manager: Manager, target: Target):
-        super(Unit, self).__init__(manager, target)
-
-        # if this was a file, ensure it's not an image or anything useful
-        if self.target.path:
-            if is_good_magic(magic.from_file(self.target.path)):
-                raise NotApplicable("potentially useful file")
+    SKIP_GOOD_MAGIC = True
 
     def evaluate(self, match):
         """
@@ -12,7 +12,6 @@ is a file.
 """
 
 from typing import Any
-import subprocess
 import logging
 
 from katana.unit import FileUnit, NotApplicable
@@ -53,11 +52,7 @@ class Unit(FileUnit):
         """
 
         # Run exiftool on the target file
-        p = subprocess.Popen(
-            ["exiftool", self.target.path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        p = self.manager.runner.run(self, ["exiftool", self.target.path])
 
         # Look for flags, if we found them...
         response = katana.util.process_output(p)
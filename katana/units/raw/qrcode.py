@@ -10,7 +10,6 @@ that the target is in fact an image file.
 
 from typing import Any
 from pyzbar import pyzbar
-from PIL import Image
 import warnings
 
 from katana.unit import NotApplicable, FileUnit
@@ -36,19 +35,18 @@ class Unit(FileUnit):
     "qrcode".
     """
 
+    KEYWORDS = ["image"]
+
     def __init__(self, manager: Manager, target: Target):
         """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact an image. This
-        also validates it can open the file with PIL without an issue.
+        The constructor validates it can open the file with PIL without an
+        issue. The decoded image is shared with the other image units (see
+        :mod:`katana.images`).
         """
 
-        super(Unit, self).__init__(manager, target, keywords="image")
+        super(Unit, self).__init__(manager, target)
 
-        try:
-            # Attempt to open the image with PIL
-            self.image = Image.open(self.target.path)
-        except OSError:
+        if self.manager.images.get(self.target) is None:
             raise NotApplicable("not an image")
 
     def evaluate(self, case: Any):
@@ -62,7 +60,7 @@ class Unit(FileUnit):
         """
 
         # Use pyzbar to decode he qrcode
-        decoded = pyzbar.decode(self.image)
+        decoded = pyzbar.decode(self.manager.images.get(self.target).image())
         for each_decoded_item in decoded:
             decoded_data = each_decoded_item.data
 
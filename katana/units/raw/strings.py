@@ -12,12 +12,15 @@ is a file.
 """
 
 from typing import Any
-import subprocess
+import tempfile
 
 from katana.unit import FileUnit, NotApplicable
 from katana.manager import Manager
 from katana.target import Target
 
+# Maximum size of the strings output held in memory
+SPOOL_SIZE = 16 * 1024 * 1024
+
 
 class Unit(FileUnit):
 
@@ -58,14 +61,18 @@ class Unit(FileUnit):
 
         # Run the process.
         command = ["strings", self.target.path, "-n", self.get("length", "10")]
-        p = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
         # Queuing recursion and registering data can be slow on large files.
-        # Look for flags first
-        lines = []
-        for line in p.stdout:
-            self.manager.find_flag(self, line)
-            lines.append(line)
-
-        for line in lines:
-            self.manager.register_data(self, line.rstrip(b"\n"))
+        # The runner looks for flags as the lines arrive. The lines are spooled
+        # to disk if there are too many to keep in memory.
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as lines:
+
+            def spool(stream: str, line: bytes) -> None:
+                if stream == "stdout":
+                    lines.write(line + b"\n")
+
+            self.manager.runner.run(self, command, keep=False, on_line=spool)
+
+            lines.seek(0)
+            for line in lines:
+                self.manager.register_data(self, line.rstrip(b"\n"))
@@ -11,8 +11,6 @@ import os
 import stat
 
 from katana.unit import FileUnit
-import subprocess
-import shlex
 
 
 class Unit(FileUnit):
@@ -35,12 +33,7 @@ class Unit(FileUnit):
     moderately high priority due to speed and specific applicability
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact an ELF executable.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["ELF"])
+    KEYWORDS = ["ELF"]
 
     def evaluate(self, case: str):
         """
@@ -57,17 +50,11 @@ class Unit(FileUnit):
         st = os.stat(self.target.path)
         os.chmod(self.target.path, st.st_mode | stat.S_IEXEC)
 
-        # Run ltrace on the target
-        p = subprocess.Popen(
-            ["ltrace", shlex.quote(self.target.path)],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        # Run ltrace on the target, sending garbage input to the program
+        result = self.manager.runner.run(
+            self, ["ltrace", self.target.path], input=b"anything\n", timeout=1
         )
 
-        # Send garbage input to the program
-        info = p.communicate(b"anything\n", timeout=1)
-
         # Recurse on and search for flags in the result
-        for line in info:
-            self.manager.register_data(self, line)
+        for output in (result.stdout, result.stderr):
+            self.manager.register_data(self, output)
@@ -3,3 +3,225 @@
 # @Date:   2019-02-28 22:33:18
 # @Last Modified by:   John Hammond
 # @Last Modified time: 2019-04-05 22:56:13
+"""
+Audio reading shared by the audio stego units.
+
+WAVE files are read in blocks straight from the file, so long recordings
+are processed with bounded memory. Integer PCM (8, 16, 24 or 32 bits),
+floating point, A-law and u-law samples are supported with any number of
+channels. Other audio (e.g. MP3 or compressed WAVE files) is first
+converted to a WAVE file with ``ffmpeg``.
+"""
+from typing import Any, Generator
+import struct
+import os
+
+import numpy as np
+
+WAVE_PCM = 0x0001
+WAVE_FLOAT = 0x0003
+WAVE_ALAW = 0x0006
+WAVE_MULAW = 0x0007
+WAVE_EXTENSIBLE = 0xFFFE
+
+
+def _alaw_table() -> np.ndarray:
+    """ Build the lookup table of each A-law byte (G.711) """
+
+    table = np.zeros(256, dtype=np.float32)
+    for byte in range(256):
+        value = byte ^ 0x55
+        exponent = (value >> 4) & 0x7
+        mantissa = value & 0xF
+        if exponent == 0:
+            sample = (mantissa << 4) + 8
+        else:
+            sample = ((mantissa << 4) + 0x108) << (exponent - 1)
+        table[byte] = sample if value & 0x80 else -sample
+    return table / 32768
+
+
+def _mulaw_table() -> np.ndarray:
+    """ Build the lookup table of each u-law byte (G.711) """
+
+    table = np.zeros(256, dtype=np.float32)
+    for byte in range(256):
+        value = ~byte & 0xFF
+        exponent = (value >> 4) & 0x7
+        mantissa = value & 0xF
+        sample = (((mantissa << 3) + 0x84) << exponent) - 0x84
+        table[byte] = -sample if value & 0x80 else sample
+    return table / 32768
+
+
+G711_TABLES = {WAVE_ALAW: _alaw_table(), WAVE_MULAW: _mulaw_table()}
+"""
+Sample value of each byte for the companded formats
+"""
+
+
+class WaveReader(object):
+    """
+    Reads the samples of a WAVE file in blocks.
+
+    :property path: The path to the WAVE file
+    :property format: The sample format (e.g. ``WAVE_PCM``)
+    :property rate: The number of frames per second
+    :property channels: The number of channels in each frame
+    :property width: The size of each sample in bytes
+    :property frames: The number of frames in the file
+    :property offset: The offset of the first frame in the file
+    """
+
+    def __init__(self, path: str):
+        super(WaveReader, self).__init__()
+
+        self.path = path
+        self.format = None
+        self.offset = None
+
+        size = os.path.getsize(path)
+
+        with open(path, "rb") as handle:
+            riff, _, wave = struct.unpack("<4sI4s", handle.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise ValueError("not a wave file")
+
+            # Find the format and the data among the chunks
+            while self.offset is None:
+                header = handle.read(8)
+                if len(header) < 8:
+                    raise ValueError("no data chunk")
+                name, length = struct.unpack("<4sI", header)
+
+                if name == b"fmt ":
+                    self._parse_format(handle.read(length))
+                    handle.seek(length & 1, os.SEEK_CUR)
+                elif name == b"data":
+                    # Streamed files may not know the length of the data
+                    self.offset = handle.tell()
+                    length = min(length, size - self.offset)
+                else:
+                    handle.seek(length + (length & 1), os.SEEK_CUR)
+
+        if self.format is None:
+            raise ValueError("no format chunk")
+
+        self.frames = length // (self.width * self.channels)
+
+    def _parse_format(self, data: bytes) -> None:
+        """ Parse the format chunk, and check the samples can be read """
+
+        fields = struct.unpack("<HHIIHH", data[:16])
+        self.format, self.channels, self.rate, _, _, bits = fields
+
+        # The real format of an extensible file follows the extension
+        if self.format == WAVE_EXTENSIBLE and len(data) >= 26:
+            (self.format,) = struct.unpack("<H", data[24:26])
+
+        self.width = (bits + 7) // 8
+
+        if self.channels == 0 or self.rate == 0:
+            raise ValueError("invalid format")
+        if self.format == WAVE_PCM and self.width in (1, 2, 3, 4):
+            return
+        if self.format == WAVE_FLOAT and self.width in (4, 8):
+            return
+        if self.format in G711_TABLES and self.width == 1:
+            return
+
+        raise ValueError(f"unsupported format: {self.format} ({bits} bits)")
+
+    @property
+    def duration(self) -> float:
+        """ The length of the audio in seconds """
+        return self.frames / self.rate
+
+    def blocks(self, frames: int) -> Generator[np.ndarray, None, None]:
+        """
+        Read the samples in blocks of the given number of frames (the last
+        block may be shorter).
+
+        :param frames: The number of frames in each block
+        :return: A generator of arrays with the shape (frames, channels).
+                 Samples are scaled to the range -1 to 1.
+        """
+
+        size = self.width * self.channels
+        remaining = self.frames
+
+        with open(self.path, "rb") as handle:
+            handle.seek(self.offset)
+
+            while remaining > 0:
+                data = handle.read(min(frames, remaining) * size)
+                count = len(data) // size
+                if count == 0:
+                    break
+                remaining -= count
+
+                samples = self._decode(data[: count * size])
+                yield samples.reshape(count, self.channels)
+
+    def _decode(self, data: bytes) -> np.ndarray:
+        """ Decode raw samples into floats """
+
+        if self.format in G711_TABLES:
+            return G711_TABLES[self.format][np.frombuffer(data, dtype=np.uint8)]
+
+        if self.format == WAVE_FLOAT:
+            dtype = "<f4" if self.width == 4 else "<f8"
+            return np.frombuffer(data, dtype=dtype).astype(np.float32)
+
+        if self.width == 1:
+            # 8-bit samples are unsigned
+            samples = np.frombuffer(data, dtype=np.uint8).astype(np.float32)
+            return (samples - 128) / 128
+
+        if self.width == 3:
+            # Place each 24-bit sample in the top of 32 bits, keeping the sign
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+            padded = np.zeros((len(raw), 4), dtype=np.uint8)
+            padded[:, 1:] = raw
+            samples = padded.view("<i4").reshape(-1)
+            width = 4
+        else:
+            samples = np.frombuffer(data, dtype=f"<i{self.width}")
+            width = self.width
+
+        return samples.astype(np.float32) / float(1 << (width * 8 - 1))
+
+
+def open_audio(unit: Any, path: str) -> WaveReader:
+    """
+    Open an audio file for reading. Audio which isn't in a supported WAVE
+    file is converted into one with ``ffmpeg`` (in the output directory of
+    the unit).
+
+    :param unit: The unit reading the audio
+    :param path: The path to the audio file
+    :return: A reader for the audio
+    :raises ValueError: The audio could not be read or converted (e.g. if
+                        ``ffmpeg`` is not installed)
+    """
+
+    try:
+        return WaveReader(path)
+    except (ValueError, OSError, struct.error):
+        pass
+
+    output, _ = unit.generate_artifact("audio.wav", create=False)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    args = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", path]
+    try:
+        result = unit.manager.runner.run(
+            unit, args + ["-c:a", "pcm_s16le", output], scan=False
+        )
+    except OSError:
+        # ffmpeg is not installed
+        raise ValueError("unable to run ffmpeg")
+    if result.returncode != 0:
+        raise ValueError("unable to convert audio")
+
+    return WaveReader(output)
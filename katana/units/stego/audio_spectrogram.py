@@ -1,48 +1,143 @@
 """
 Create an audio spectrogram for audio files
 
-This unit will generate a spectrogram for audio files. It relies heavily
-on Python libraries such as ``pydub`` and ``pylab``.
+This unit will generate a spectrogram for audio files, in which text or
+images are sometimes hidden. Two images are created for each channel: one
+with a linear magnitude scale (``spectrogram_linear.png``), and one with a
+decibel scale (``spectrogram_dB.png``). The images of each channel of a
+multi-channel file are numbered (e.g. ``spectrogram_2_dB.png``).
+
+The audio is read in chunks (see :mod:`katana.units.stego`), and the short
+time Fourier transform of each chunk is computed with NumPy. The image
+has a row for each frequency, so its height is set by the ``nfft``
+argument (the number of samples in each transform, 1024 by default). Its
+width is the number of transforms, up to ``width`` columns (2048 by
+default). Transforms are averaged into the columns of longer audio, so
+memory use depends only on the size of the image.
 
 This unit inherits from the :class:`katana.unit.FileUnit` to ensure
 that the target is in fact an audio file.
 """
 
+from typing import List
 
-from pydub import AudioSegment
-import pylab
-import wave
+from PIL import Image
+import numpy as np
 
-from katana.unit import FileUnit, NotApplicable
-from katana.manager import Manager
-from katana.target import Target
+from katana.unit import FileUnit
+from katana.units.stego import open_audio
 
+CHUNK_TRANSFORMS = 256
+"""
+The number of transforms computed from each chunk of audio
+"""
 
-def get_info(wav_file: bytes) -> tuple:
-    """ Get audiodata from the given the file path """
+DYNAMIC_RANGE = 80
+"""
+The range of the decibel scale, below the loudest frequency
+"""
 
-    # Ensure this is actually bytes
-    if not isinstance(wav_file, bytes):
-        wav_file = wav_file.encode("utf-8")
 
-    if wav_file.split(b".")[-1] == b"mp3":
-        # This is an MP3 file not a wave file
-        sound = AudioSegment.from_mp3(wav_file.decode("utf-8"))
-        frames = sound._data
-        frame_rate = sound.frame_rate
-    else:
-        # Open the wave file
-        try:
-            wav = wave.open(wav_file.decode("utf-8"), "r")
-            frames = wav.readframes(-1)
-            frame_rate = wav.getframerate()
-            wav.close()
-        except OSError:
-            # If we fail to read this, then stop
-            return None, None
+class Spectrogram(object):
+    """
+    The magnitude of each frequency over time within some audio, averaged
+    into a fixed number of columns. Audio is fed in chunks of any size.
+
+    :property nfft: The number of samples in each transform
+    :property hop: The number of samples between transforms
+    :property total: The number of transforms in the whole audio
+    :property width: The number of columns
+    :property window: The window applied to each transform
+    :property sums: The total magnitude of each column, with the shape
+                    (width, channels, nfft // 2 + 1)
+    :property counts: The number of transforms added to each column
+    :property pending: The samples not yet transformed
+    :property index: The number of transforms computed so far
+    """
+
+    def __init__(self, nfft: int, frames: int, channels: int, width: int):
+        super(Spectrogram, self).__init__()
+
+        self.nfft = nfft
+        self.hop = nfft // 2
+        self.total = max(1, (frames - nfft) // self.hop + 1)
+        self.width = min(self.total, width)
+        self.window = np.hanning(nfft).astype(np.float32)
+
+        self.sums = np.zeros((self.width, channels, nfft // 2 + 1))
+        self.counts = np.zeros(self.width, dtype=np.int64)
+        self.pending = np.zeros((0, channels), dtype=np.float32)
+        self.index = 0
+
+    def feed(self, samples: np.ndarray) -> None:
+        """
+        Add the next chunk of audio.
+
+        :param samples: Samples with the shape (frames, channels)
+        """
+
+        samples = np.concatenate([self.pending, samples])
+        if len(samples) < self.nfft:
+            self.pending = samples
+            return
+
+        # Each transform overlaps the previous one by half
+        count = (len(samples) - self.nfft) // self.hop + 1
+        windows = np.lib.stride_tricks.sliding_window_view(samples, self.nfft, axis=0)
+        windows = windows[: count * self.hop : self.hop]
+        spectrum = np.abs(np.fft.rfft(windows * self.window, axis=-1))
+
+        self.pending = samples[count * self.hop :]
+        self.add(spectrum)
+
+    def finish(self) -> None:
+        """ Transform the audio shorter than a single transform, if any """
+
+        if self.index == 0 and len(self.pending):
+            padding = np.zeros((self.nfft - len(self.pending), self.pending.shape[1]))
+            self.feed(padding.astype(np.float32))
+
+    def add(self, spectrum: np.ndarray) -> None:
+        """ Add the magnitudes of consecutive transforms to their columns """
+
+        # Transforms past the expected total (e.g. from a short header) are
+        # added to the last column
+        indices = np.arange(self.index, self.index + len(spectrum))
+        columns = np.minimum(indices * self.width // self.total, self.width - 1)
+        self.index += len(spectrum)
 
-    sound_info = pylab.fromstring(frames, "int16")
-    return sound_info, frame_rate
+        # Columns are consecutive, so the sums are reduced in one pass
+        starts = np.flatnonzero(np.diff(columns, prepend=-1))
+        self.sums[columns[starts]] += np.add.reduceat(spectrum, starts, axis=0)
+        self.counts += np.bincount(columns, minlength=self.width)
+
+    def render(self) -> List[List[Image.Image]]:
+        """
+        Render the spectrogram of each channel. Low frequencies are at the
+        bottom of each image.
+
+        :return: A list of the linear and decibel image for each channel
+        """
+
+        magnitude = self.sums / np.maximum(self.counts, 1)[:, np.newaxis, np.newaxis]
+        images = []
+
+        for channel in range(magnitude.shape[1]):
+            values = magnitude[:, channel, ::-1].T
+            peak = max(values.max(), 1e-12)
+
+            linear = values / peak
+            decibels = 20 * np.log10(np.maximum(linear, 1e-12))
+            decibels = np.clip(decibels / DYNAMIC_RANGE + 1, 0, 1)
+
+            images.append(
+                [
+                    Image.fromarray((linear * 255).astype(np.uint8)),
+                    Image.fromarray((decibels * 255).astype(np.uint8)),
+                ]
+            )
+
+        return images
 
 
 class Unit(FileUnit):
@@ -50,7 +145,7 @@ class Unit(FileUnit):
 
     PRIORITY = 30
     """
-    Priority works with 0 being the highest priority, and 100 being the 
+    Priority works with 0 being the highest priority, and 100 being the
     lowest priority. 50 is the default priorty. This unit has a higher
     than normal priority for matching files
     """
@@ -61,18 +156,7 @@ class Unit(FileUnit):
     is included, as well as the tag "audio".
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is an audio file. This
-        also validates it is not a URL to a website.
-        """
-
-        super(Unit, self).__init__(*args, **kwargs, keywords=["audio"])
-
-        # if this is a URL, and we can reach it, don't try to mangle anything
-        if self.target.is_url and not self.target.url_accessible:
-            raise NotApplicable("this is a URL")
+    KEYWORDS = ["audio"]
 
     def evaluate(self, case):
         """
@@ -85,46 +169,34 @@ class Unit(FileUnit):
         :return: None. This function should not return any data.
         """
 
-        # Generate the artifact's (no creation, effectively grab the path)
-        linear_path, _ = self.generate_artifact("spectrogram_linear.png", create=False)
-        dB_path, _ = self.generate_artifact("spectrogram_dB.png", create=False)
-
-        # Prettify the audio spectrogram output.
-        pylab.style.use(["seaborn-dark"])
-        pylab.tight_layout()
-        sound_info, frame_rate = get_info(self.target.path)
-
-        # If we fail to get info, then stop this unit/
-        if sound_info is None and frame_rate is None:
-            return  # Stop the unit
-
-        pylab.figure(num=None, figsize=(18, 10), frameon=False)
-        pylab.specgram(
-            x=sound_info,
-            Fs=2,
-            NFFT=1024,
-            mode="magnitude",
-            scale="linear",
-            sides="onesided",
-        )
-
-        # Do not display axes in the spectrogram image file.
-        pylab.gca().axes.get_yaxis().set_visible(False)
-        pylab.gca().axes.get_xaxis().set_visible(False)
-
-        pylab.savefig(
-            linear_path, pad_inches=0, bbox_inches="tight", bbox_extra_artists=[]
-        )
-        pylab.specgram(
-            x=sound_info,
-            Fs=2,
-            NFFT=1024,
-            mode="magnitude",
-            scale="dB",
-            sides="onesided",
-        )
-        pylab.savefig(dB_path, pad_inches=0, bbox_inches="tight", bbox_extra_artists=[])
-
-        # Register the figures with the manager
-        self.manager.register_artifact(self, linear_path)
-        self.manager.register_artifact(self, dB_path)
+        # If we fail to read the audio, then stop
+        try:
+            audio = open_audio(self, self.target.path)
+        except ValueError:
+            return
+
+        nfft = max(self.geti("nfft", 1024), 16)
+        width = max(self.geti("width", 2048), 1)
+
+        spectrogram = Spectrogram(nfft, audio.frames, audio.channels, width)
+        for chunk in audio.blocks(spectrogram.hop * CHUNK_TRANSFORMS):
+            spectrogram.feed(chunk)
+        spectrogram.finish()
+
+        # There were no samples to draw
+        if spectrogram.index == 0:
+            return
+
+        for channel, images in enumerate(spectrogram.render()):
+
+            # Only number the images of multi-channel audio
+            prefix = "spectrogram_"
+            if audio.channels > 1:
+                prefix += f"{channel + 1}_"
+
+            for scale, image in zip(["linear", "dB"], images):
+                path, _ = self.generate_artifact(f"{prefix}{scale}.png", create=False)
+                image.save(path)
+
+                # Register the figures with the manager
+                self.manager.register_artifact(self, path)
@@ -4,226 +4,219 @@ Unit to read values from DTMF tones.
 This unit inherits from the :class:`katana.unit.FileUnit` to ensure
 that the target is in fact an audio file.
 
-..note::
+The audio is read in chunks at its own sample rate, and the channels are
+mixed together. Each chunk is split into blocks of about 11.5ms (92
+samples at 8kHz), and the energy of each DTMF frequency within every block
+is measured at once with a bank of Goertzel filters (a matrix product).
+Blocks with exactly one strong row and column frequency are detected as a
+key, and consecutive detections of a key are joined into a tone. The
+start and end time of each tone is reported along with the keys.
+
+Audio which isn't a WAVE file (e.g. MP3) is converted with ``ffmpeg``
+first (see :mod:`katana.units.stego`).
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from katana.unit import FileUnit
+from katana.units.stego import WaveReader, open_audio
 
-    Currently, this unit only supports WAVE files (sorry, no MP3s).
+KEYS = "123A456B789C*0#D"
+"""
+The key for each pair of row and column frequencies
 """
 
-import traceback
-import struct
-import math
-import wave
+FREQUENCIES = [697, 770, 852, 941, 1209, 1336, 1477, 1633]
+"""
+The row frequencies, followed by the column frequencies
+"""
 
-from katana.unit import NotApplicable, FileUnit
-from katana.manager import Manager
-from katana.target import Target
+BLOCK_DURATION = 92 / 8000
+"""
+The length of each block in seconds
+"""
+
+MIN_ENERGY = 4.0e5
+"""
+The energy needed by both the row and column frequencies of a key. Energy is
+measured as if the block held 92 samples of 16-bit audio.
+"""
+
+MIN_CONSECUTIVE = 2
+"""
+The number of blocks a tone must be detected in
+"""
+
+MAX_GAP = 0.05
+"""
+The longest gap (in seconds) between detections within a single tone
+"""
+
+CHUNK_BLOCKS = 1024
+"""
+The number of blocks read from the audio at once
+"""
 
 
 class DTMFdetector(object):
-    """ 
-    This is used for the DTMF processing operations. 
-    Admittedly, it was found online and adapted to work within Katana.
+    """
+    Detects DTMF tones within audio of a given sample rate. Audio is fed
+    in chunks of any size, and detections are kept between chunks.
+
+    :property rate: The sample rate of the audio
+    :property size: The number of samples in each block
+    :property bank: The cosine and sine of each frequency at each sample
+                    of a block, with the shape (size, 16)
+    :property scale: Scales the energy of a block to the 16-bit, 8kHz
+                     calibration of the thresholds
+    :property pending: The samples not yet making up a whole block
+    :property blocks: The number of whole blocks fed so far
+    :property detections: The block index and key index of each detection
     """
 
-    def __init__(self):
-
-        self.sample_index = 0
-        self.sample_count = 0
-        self.q1 = [0, 0, 0, 0, 0, 0, 0, 0]
-        self.q2 = [0, 0, 0, 0, 0, 0, 0, 0]
-        self.r = [0, 0, 0, 0, 0, 0, 0, 0]
-        self.characters = []
-        self.charStr = ""
-        self.charStr = ""
-        self.sample_count = 0
-        self.MAX_BINS = 8
-        self.GOERTZEL_N = 92
-        self.SAMPLING_RATE = 8000
-        self.freqs = [697, 770, 852, 941, 1209, 1336, 1477, 1633]
-        self.coefs = [0, 0, 0, 0, 0, 0, 0, 0]
-
-        self.reset()
-
-        self.calc_coeffs()
-
-    def reset(self):
-        pass
-
-    def post_testing(self):
-        row = 0
-        col = 0
-        see_digit = 0
-        peak_count = 0
-        max_index = 0
-        maxval = 0.0
-        t = 0
-        i = 0
-        msg = "none"
-
-        row_col_ascii_codes = [
-            ["1", "2", "3", "A"],
-            ["4", "5", "6", "B"],
-            ["7", "8", "9", "C"],
-            ["*", "0", "#", "D"],
-        ]
+    def __init__(self, rate: int):
+        super(DTMFdetector, self).__init__()
 
-        for i in range(4):
-            if self.r[i] > maxval:
-                maxval = self.r[i]
-                row = i
-
-        col = 4
-        maxval = 0
-        for i in range(4, 8):
-            if self.r[i] > maxval:
-                maxval = self.r[i]
-                col = i
-
-        if self.r[row] < 4.0e5:
-            msg = "energy not enough"
-        elif self.r[col] < 4.0e5:
-            msg = "energy not enough"
-        else:
-            see_digit = True
+        self.rate = rate
+        self.size = max(1, round(rate * BLOCK_DURATION))
 
-            if self.r[col] > self.r[row]:
-                max_index = col
-                if self.r[row] < (self.r[col] * 0.398):
-                    see_digit = False
+        # The real and imaginary parts of each frequency
+        phase = np.outer(np.arange(self.size), 2 * np.pi * np.array(FREQUENCIES) / rate)
+        self.bank = np.hstack([np.cos(phase), np.sin(phase)]).astype(np.float32)
+        self.scale = (32768 * 92 / self.size) ** 2
 
-            else:
-                max_index = row
-                if self.r[col] < (self.r[row] * 0.158):
-                    see_digit = False
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.blocks = 0
+        self.detections: List[Tuple[np.ndarray, np.ndarray]] = []
 
-            if self.r[max_index] > 1.0e9:
-                t = self.r[max_index] * 0.158
-            else:
-                t = self.r[max_index] * 0.010
-
-            peak_count = 0
-
-            for i in range(8):
-                if self.r[i] > t:
-                    peak_count += 1
-            if peak_count > 2:
-                see_digit = False
-
-            if see_digit:
-                self.characters.append(
-                    (
-                        row_col_ascii_codes[row][col - 4],
-                        float(self.sample_index) / float(self.SAMPLING_RATE),
-                    )
-                )
-
-    def clean_up_processing(self):
-        MIN_CONSECUTIVE = 2
-        MAX_GAP = 0.0500
-
-        currentCount = 0
-        lastChar = ""
-        lastTime = 0
-        charIndex = -1
-
-        for i in self.characters:
-
-            charIndex += 1
-            currentChar = i[0]
-            currentTime = i[1]
-            timeDelta = currentTime - lastTime
-
-            if lastChar == currentChar:
-                currentCount += 1
-            else:
+    @property
+    def duration(self) -> float:
+        """ The length of each block in seconds """
+        return self.size / self.rate
 
-                if len(self.characters) > (charIndex + 2):
-                    if (self.characters[charIndex + 1][0] == lastChar) and (
-                        self.characters[charIndex + 2][0] == lastChar
-                    ):
-                        # forget this every happened
-                        lastTime = currentTime
-                        continue
+    def energies(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Measure the energy of each frequency within each block. This is the
+        output of a Goertzel filter for each frequency.
 
-                if currentCount >= MIN_CONSECUTIVE:
-                    self.charStr += lastChar
-                    currentCount = 1
-                    lastChar = currentChar
-                    lastTime = currentTime
-                    continue
+        :param blocks: Samples with the shape (blocks, size)
+        :return: The energies with the shape (blocks, 8)
+        """
 
-            if timeDelta > MAX_GAP:
-                # so de we have enough counts for this to be valid?
-                if (currentCount - 1) >= MIN_CONSECUTIVE:
-                    self.charStr += lastChar
-                currentCount = 1
+        parts = blocks @ self.bank
+        count = len(FREQUENCIES)
+        return (parts[:, :count] ** 2 + parts[:, count:] ** 2) * self.scale
 
-            lastChar = currentChar
-            lastTime = currentTime
+    def detect(self, energies: np.ndarray) -> np.ndarray:
+        """
+        Find the key in each block from the energy of each frequency.
+
+        :param energies: The energies returned by ``energies``
+        :return: The index of the key in ``KEYS`` for each block, or -1 if
+                 there is none
+        """
+
+        indices = np.arange(len(energies))
+        row = energies[:, :4].argmax(axis=1)
+        column = energies[:, 4:].argmax(axis=1)
+        row_energy = energies[indices, row]
+        column_energy = energies[indices, column + 4]
+        strongest = np.maximum(row_energy, column_energy)
+
+        # Both tones must be strong enough
+        seen = (row_energy >= MIN_ENERGY) & (column_energy >= MIN_ENERGY)
+
+        # The weaker tone can't be too much weaker than the stronger tone
+        seen &= np.where(
+            column_energy > row_energy,
+            row_energy >= column_energy * 0.398,
+            column_energy >= row_energy * 0.158,
+        )
+
+        # No other frequency can be close to as strong
+        threshold = np.where(strongest > 1.0e9, strongest * 0.158, strongest * 0.010)
+        seen &= np.count_nonzero(energies > threshold[:, np.newaxis], axis=1) <= 2
 
-        if currentCount >= MIN_CONSECUTIVE:
-            self.charStr += lastChar
+        return np.where(seen, row * 4 + column, -1)
 
-    def goertzel(self, sample):
-        q0 = 0
-        i = 0
+    def feed(self, samples: np.ndarray) -> None:
+        """
+        Detect keys within the next chunk of mono audio.
+
+        :param samples: The samples of the chunk, in the range -1 to 1
+        """
 
-        self.sample_count += 1
-        self.sample_index += 1
+        samples = np.concatenate([self.pending, samples.astype(np.float32)])
+        count = len(samples) // self.size
 
-        for i in range(self.MAX_BINS):
-            q0 = self.coefs[i] * self.q1[i] - self.q2[i] + sample
-            self.q2[i] = self.q1[i]
-            self.q1[i] = q0
+        blocks = samples[: count * self.size].reshape(count, self.size)
+        self.pending = samples[count * self.size :]
 
-        if self.sample_count == self.GOERTZEL_N:
-            for i in range(self.MAX_BINS):
-                self.r[i] = (
-                    (self.q1[i] * self.q1[i])
-                    + (self.q2[i] * self.q2[i])
-                    - (self.coefs[i] * self.q1[i] * self.q2[i])
-                )
-                self.q1[i] = 0
-                self.q2[i] = 0
-            self.post_testing()
+        keys = self.detect(self.energies(blocks))
+        found = np.flatnonzero(keys >= 0)
+        self.detections.append((found + self.blocks, keys[found]))
+        self.blocks += count
 
-    def calc_coeffs(self):
-        for n in range(self.MAX_BINS):
-            self.coefs[n] = 2.0 * math.cos(
-                2.0 * math.pi * self.freqs[n] / self.SAMPLING_RATE
-            )
+    def tones(self) -> List[Tuple[str, float, float]]:
+        """
+        Join the detections so far into tones.
 
-    def check(self, filename):
+        :return: The key, start time and end time (in seconds) of each tone
+        """
+
+        if self.detections:
+            indices = np.concatenate([d[0] for d in self.detections]).tolist()
+            keys = np.concatenate([d[1] for d in self.detections]).tolist()
+        else:
+            indices, keys = [], []
 
-        given = wave.open(filename)
-        struct.unpack("h", given.readframes(1))
-        given.close()
+        gap = MAX_GAP / self.duration
 
-    def getDTMFfromWAV(self, filename):
+        # Group detections of a key, allowing for short dropouts
+        runs = []
+        for index, key in zip(indices, keys):
+            if runs and runs[-1][0] == key and index - runs[-1][2] <= gap:
+                runs[-1][2] = index
+                runs[-1][3] += 1
+            else:
+                runs.append([key, index, index, 1])
+
+        # Short runs are noise, or glitches within a longer tone
+        tones = []
+        for key, first, last, count in runs:
+            if count < MIN_CONSECUTIVE:
+                continue
+            if tones and tones[-1][0] == key and first - tones[-1][2] <= gap:
+                tones[-1][2] = last
+            else:
+                tones.append([key, first, last])
 
-        self.reset()  # reset the current state of the detector
+        return [
+            (KEYS[key], first * self.duration, (last + 1) * self.duration)
+            for key, first, last in tones
+        ]
 
-        given = wave.open(filename)
-        totalFrames = given.getnframes()
-        count = 0
+    def decode(self, audio: WaveReader) -> List[Tuple[str, float, float]]:
+        """
+        Detect the tones within some audio.
 
-        while totalFrames != count:
-            raw = given.readframes(1)
-            (sample,) = struct.unpack("h", raw)
-            self.goertzel(sample)
-            count += 1
+        :param audio: The audio to read
+        :return: The key, start time and end time (in seconds) of each tone
+        """
 
-        given.close()
+        for chunk in audio.blocks(self.size * CHUNK_BLOCKS):
+            self.feed(chunk.mean(axis=1))
 
-        self.clean_up_processing()
-        return self.charStr
+        return self.tones()
 
 
 class Unit(FileUnit):
 
     PRIORITY = 30
     """
-    Priority works with 0 being the highest priority, and 100 being the 
+    Priority works with 0 being the highest priority, and 100 being the
     lowest priority. 50 is the default priorty. This unit has a high
     priority for matching files
     """
@@ -234,28 +227,7 @@ class Unit(FileUnit):
     is included, as well as the tag "audio".
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is an audio file. This
-        also validates it is a .wav file (.mp3 is not yet supported)
-        """
-
-        super(Unit, self).__init__(*args, **kwargs, keywords=["audio"])
-
-        # Create a detector object
-        self.detector = DTMFdetector()
-
-        try:
-            # Ensure this will even work
-            if isinstance(self.target.path, bytes):
-                self.detector.check(self.target.path.decode("utf-8"))
-            else:
-                self.detector.check(self.target.path)
-        except wave.Error:
-            raise NotApplicable("no RIFF id... not a .wav? mp3 not yet supported..")
-        except:
-            raise NotApplicable("failure reading dtmf tones")
+    KEYWORDS = ["audio"]
 
     def evaluate(self, case):
         """
@@ -268,8 +240,18 @@ class Unit(FileUnit):
         :return: None. This function should not return any data.
         """
 
+        # Audio which can't be read or converted is ignored
+        try:
+            audio = open_audio(self, self.target.path)
+        except ValueError:
+            return
+
         # Decode DTMF Tones
-        results = self.detector.getDTMFfromWAV(self.target.path.decode("utf-8"))
+        tones = DTMFdetector(audio.rate).decode(audio)
+        if not tones:
+            return
 
         # Register the output data with the manager
-        self.manager.register_data(self, results)
+        self.manager.register_data(self, "".join(key for key, _, _ in tones))
+        timing = [f"{key}: {start:.3f}s - {end:.3f}s" for key, start, end in tones]
+        self.manager.register_data(self, {"tones": timing}, recurse=False)
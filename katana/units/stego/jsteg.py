@@ -11,11 +11,7 @@ is a JPG file.
 
 """
 
-import subprocess
-
-from katana.manager import Manager
 from katana.unit import FileUnit
-from katana.target import Target
 import katana.util
 
 
@@ -40,12 +36,7 @@ class Unit(FileUnit):
     "jsteg".
     """
 
-    def __init__(self, manager: Manager, target: Target):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a JPG file.
-        """
-        super(Unit, self).__init__(manager, target, keywords=["jpg", "jpeg"])
+    KEYWORDS = ["jpg", "jpeg"]
 
     def evaluate(self, case):
         """
@@ -59,11 +50,7 @@ class Unit(FileUnit):
         """
 
         # Run jsteg with our target
-        p = subprocess.Popen(
-            ["jsteg", "reveal", self.target.path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        p = self.manager.runner.run(self, ["jsteg", "reveal", self.target.path])
 
         # Look for flags, if we found them...
         response = katana.util.process_output(p)
@@ -16,7 +16,6 @@ is a file.
 
 
 from hashlib import md5
-import subprocess
 
 from katana.unit import NotApplicable, FileUnit
 import katana.units
@@ -55,9 +54,7 @@ class Unit(FileUnit):
         """
 
         # Run snow on the target
-        p = subprocess.Popen(
-            ["snow", self.target.path], stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
+        p = self.manager.runner.run(self, ["snow", self.target.path])
 
         # Initialize
         response = None
@@ -67,18 +64,14 @@ class Unit(FileUnit):
             response = katana.util.process_output(p)
         except UnicodeDecodeError:
 
-            # This probably isn't plain text....
-            p.stdout.seek(0)
-            output = p.stdout.read()
-
             # So consider it is some binary output and try and handle it.
             path, fh = self.generate_artifact(
-                f"output_{md5(self.target).hexdigest()}", mode="wb"
+                f"output_{md5(p.stdout).hexdigest()}", mode="wb"
             )
 
             # Write data and close descriptor
             with fh:
-                fh.write(output)
+                fh.write(p.stdout)
 
             # Register the artifact
             self.manager.register_artifact(self, path)
@@ -19,7 +19,6 @@ is a JPG file.
 
 """
 import base64
-import subprocess
 import threading
 
 from katana.unit import FileUnit
@@ -45,9 +44,11 @@ class Unit(FileUnit):
     is included, as well as the tag "image".
     """
 
+    KEYWORDS = ["jpg ", "jpeg "]
+
     def __init__(self, *args, **kwargs):
 
-        super(Unit, self).__init__(*args, **kwargs, keywords=["jpg ", "jpeg "])
+        super(Unit, self).__init__(*args, **kwargs)
 
         # Keep track of how many passwords we find (protected by lock)
         self.count_lock = threading.Lock()
@@ -57,39 +58,48 @@ class Unit(FileUnit):
     def enumerate(self):
         """
         This function will first yield an empty password, then the
-        supplied password argument, then loop through each line of
-        a provided dictionary file. The password will then be used by
-        the ``evaluate`` function to try and open the encrypted PDF.
+        supplied password argument, then ranges of lines from a
+        provided dictionary file. The passwords will then be used by
+        the ``evaluate`` function to try and extract hidden data.
         """
 
         # The default is to check an empty password
-        yield b""
+        passwords = [b""]
 
         # Check a passed password
         if self.get("password") is not None:
-            yield bytes(self.get("password"), "utf-8")
+            passwords.append(bytes(self.get("password"), "utf-8"))
 
         # Check other passwords specified explicitly
         if self.get("passwords") is not None:
             for p in self.get("passwords", "").split(","):
-                yield bytes(p, "utf-8")
+                passwords.append(bytes(p, "utf-8"))
+
+        yield passwords
 
         # Add all the passwords from the dictionary file
-        if self.get("dict") is not None:
-            # Read all of the dict
-            with open(self.get("dict"), "rb") as fh:
-                for line in fh:
-                    line = line.rstrip(b"\n")
-                    yield line
-
-    def evaluate(self, password):
+        yield from self.wordlist_ranges()
+
+    def evaluate(self, case):
+        """
+        Evaluate the target. Extract any info with steghide using each
+        password in the case and recurse on any new found files.
+
+        :param case: A case returned by ``enumerate``. For this unit, \
+        ``case`` will first be an empty password and the passwords supplied \
+        as arguments, then ranges of a provided dictionary file. 
+
+        :return: None. This function should not return any data.
+        """
+
+        for password in case:
+            self.extract(password)
+
+    def extract(self, password):
         """
-        Evaluate the target. Extract any info with steghide and
-        recurse on any new found files.
+        Extract any info with steghide using a single password.
 
-        :param password: A case returned by ``enumerate``. For this unit, \
-        ``password`` will first be an empty password, then the password supplied \
-        as an argument, then the contents of a provided dictionary file. 
+        :param password: The password to try
 
         :return: None. This function should not return any data.
         """
@@ -106,7 +116,8 @@ class Unit(FileUnit):
             )
 
         # Run steghide
-        p = subprocess.Popen(
+        p = self.manager.runner.run(
+            self,
             [
                 b"steghide",
                 b"extract",
@@ -117,17 +128,8 @@ class Unit(FileUnit):
                 b"-xf",
                 output_path,
             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
         )
 
-        # Wait for process completion
-        p.wait()
-
-        # Grab the output
-        output = bytes.decode(p.stdout.read(), "ascii")
-        error = bytes.decode(p.stderr.read(), "ascii")
-
         # Check if it succeeded
         if p.returncode != 0:
             return
@@ -17,7 +17,6 @@ is a file.
 """
 
 from hashlib import md5
-import subprocess
 import regex as re
 
 from katana.unit import FileUnit, NotApplicable
@@ -56,35 +55,40 @@ class Unit(FileUnit):
         the ``evaluate`` function to try and open the encrypted PDF.
         """
 
-        # The default is to check an empty password
-        yield ""
-
-        # Check other passwords specified explicitly
-        for p in self.get("passwords", "").split(","):
-            yield p
+        # The default is to check an empty password, along with other
+        # passwords specified explicitly
+        yield [""] + self.get("passwords", "").split(",")
 
         # Add all the passwords from the dictionary file
-        if self.get("dict") is not None:
-            with open(self.get("dict"), "wb") as fh:
-                yield line.rstrip(b"\n")
+        yield from self.wordlist_ranges()
 
     def evaluate(self, case):
         """
-        Evaluate the target. Extract any info with steghide and
-        recurse on any new found files.
+        Evaluate the target. Extract any info with stegsnow using each
+        password in the case and recurse on any new found files.
 
         :param case: A case returned by ``enumerate``. For this unit, \
-        ``case`` will first be an empty password, then the password supplied \
-        as an argument, then the contents of a provided dictionary file. 
+        ``case`` will first be an empty password and the passwords supplied \
+        as arguments, then ranges of a provided dictionary file. 
+
+        :return: None. This function should not return any data.
+        """
+
+        for password in case:
+            self.extract(password)
+
+    def extract(self, password):
+        """
+        Extract any info with stegsnow using a single password.
+
+        :param password: The password to try
 
         :return: None. This function should not return any data.
         """
 
         # Run stegsnow on the target
-        p = subprocess.Popen(
-            ["stegsnow", "-C", "-p", case, self.target.path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+        p = self.manager.runner.run(
+            self, ["stegsnow", "-C", "-p", password, self.target.path]
         )
 
         # Look for flags, if we found them...
@@ -93,15 +97,11 @@ class Unit(FileUnit):
             response = katana.util.process_output(p)
         except UnicodeDecodeError:
 
-            # This probably isn't plain text....
-            p.stdout.seek(0)
-            result = p.stdout.read()
-
             # So consider it is some binary output and try and handle it.
-            aritfact_path, artifact = self.generate_artifact(
-                f"output_{md5(self.target).hexdigest()}", mode="wb"
+            artifact_path, artifact = self.generate_artifact(
+                f"output_{md5(p.stdout).hexdigest()}", mode="wb"
             )
-            artifact.write(result)
+            artifact.write(p.stdout)
             artifact.close()
 
             # Register the result
@@ -5,63 +5,81 @@ This unit is a Python implementation of ``stegsolve.jar``, which is often
 used for CTF challenges.
 
 You can supply a ``channel`` or ``plane`` index to specifically extract, but
-if these arguments are not given the unit will bruteforce and grab the least
-4 bits of each color channel (R, G, B, typically).
+if these arguments are not given the unit will bruteforce and grab every bit
+(up to ``max-plane``) of each color channel (R, G, B, A, or L for grayscale
+images). Along with the channel planes, the unit also produces:
+
+- ``xor`` planes: each bit of the color channels XORed together
+- ``inverted``: the image with every color inverted
+- ``gray``: the pixels where every color channel is equal (gray bits)
+
+The image is decoded into an array once (and shared with the other image
+units), and each plane is built with array operations at full resolution.
+Each plane is saved as its own case, so the images are written by several
+threads at once.
 
 The unit inherits from :class:`katana.unit.FileUnit` to ensure the target
 is an image file.
 
 
 """
+from typing import Optional
 from PIL import Image
-import traceback
-import os
+import numpy as np
 
 from katana.unit import FileUnit, NotApplicable
 from katana.manager import Manager
 from katana.target import Target
 
+VARIANTS = ["xor", "inverted", "gray"]
+"""
+The planes produced along with the channel planes
+"""
+
 
-def get_plane(img, data, channel: str, index: str = 0):
+def get_plane(
+    pixels: np.ndarray, mode: str, channel: str, index: int = 0
+) -> Optional[Image.Image]:
     """ 
     Get a new image showcasing only one channel and index of an image.
 
-    :param img: The Python PIL original image object
+    :param pixels: The decoded image (see :mod:`katana.images`)
 
-    :param data: The pixel data of the original image object
+    :param mode: The name of each channel of the decoded image
 
-    :param channel: The channel to extract, as a string (e.g. "R", "G", "B")
+    :param channel: The channel to extract, as a string (e.g. "R", "G", "B"),
+                    or one of the ``VARIANTS``
 
     :param index: The specific bit index (0-7) you want to extract
 
     :return: A new Python PIL image with only the given channel and index.
     """
-    if channel in img.mode:
-        new_image = Image.new("L", img.size)
-        new_image_data = new_image.load()
-
-        # JOHN: I pass in the data now, so it is not loaded every time.
-        img_data = data
-
-        channel_index = img.mode.index(channel)
-        for x in range(img.size[0]):
-            for y in range(img.size[1]):
-                color = img_data[x, y]
-
-                try:
-                    channel = color[channel_index]
-                except TypeError:
-                    channel = color
-
-                plane = bin(channel)[2:].zfill(8)
-                try:
-                    new_color = 255 * int(plane[abs(index - 7)])
-                    new_image_data[x, y] = 255 * int(plane[abs(index - 7)])
-                except IndexError:
-                    pass
-        return new_image
+
+    colors = [i for i, name in enumerate(mode) if name != "A"]
+
+    if channel in mode:
+        bits = (pixels[:, :, mode.index(channel)] >> index) & 1
+
+    elif channel == "xor":
+        # Hidden data is sometimes spread over the color channels
+        combined = np.bitwise_xor.reduce(pixels[:, :, colors], axis=2)
+        bits = (combined >> index) & 1
+
+    elif channel == "inverted":
+        inverted = 255 - pixels[:, :, colors]
+        if len(colors) == 1:
+            return Image.fromarray(inverted[:, :, 0], "L")
+        return Image.fromarray(np.ascontiguousarray(inverted), "RGB")
+
+    elif channel == "gray" and len(colors) == 3:
+        color = pixels[:, :, colors]
+        bits = (color[:, :, 0] == color[:, :, 1]) & (color[:, :, 1] == color[:, :, 2])
+
     else:
-        return
+        return None
+
+    # Single bit images are quick to encode
+    return Image.fromarray(bits.astype(bool))
 
 
 class Unit(FileUnit):
@@ -91,52 +109,38 @@ class Unit(FileUnit):
     binwalk or foremost on new images serves no real purpose
     """
 
+    KEYWORDS = [" image "]
+
     def __init__(self, *args, **kwargs):
         """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is an image file. This
-        also validates it can be read and resizes the image if necessary.
+        The constructor validates the image can be read. The decoded image
+        is shared with the other image units (see :mod:`katana.images`).
         """
-        super(Unit, self).__init__(*args, **kwargs, keywords=[" image "])
-
-        try:
-            self.img = Image.open(self.target.path)
-
-            resizing = False
-            new_size = list(self.img.size)
-            if self.img.size[0] > 1000:
-                resizing = True
-                new_size[0] = 500
-            if self.img.size[1] > 1000:
-                resizing = True
-                new_size[1] = 500
-            if resizing:
-                self.img = self.img.resize(tuple(new_size), Image.ANTIALIAS)
-
-            self.data = self.img.load()
+        super(Unit, self).__init__(*args, **kwargs)
 
         # If we don't know what this is, don't bother with it.
-        except OSError:
+        image = self.manager.images.get(self.target)
+        if image is None:
             raise NotApplicable("cannot read file")
 
-        except Exception:
-            raise NotApplicable("unknown error occurred")
+        self.mode = image.mode
 
     def enumerate(self):
         """
         This function will first yield the ``channel`` and ``plane`` that are 
         supplied as arguments by the end-user. If they are not supplied, by
-        default it will loop through all colors channels and the least 4 bits 
+        default it will loop through all colors channels and all 8 bits 
         to extract from the target. These ``channel`` and ``plane`` pairs 
         will be presented as a tuple, to be used by the ``evaluate`` 
-        function.
+        function. The ``xor`` planes and other variants follow, unless
+        ``variants`` is set to false.
         """
 
         channel = self.get("channel", "")
         plane = self.get("plane", "")
 
-        # Default to 4 planes
-        max_plane = self.geti("max-plane", 4)
+        # Default to all 8 planes
+        max_plane = self.geti("max-plane", 8)
 
         # Try to decode planes
         try:
@@ -147,24 +151,33 @@ class Unit(FileUnit):
 
         # Try to decode channels
         channels = channel.upper()
-        channels = "".join([c for c in channels if c in "RGBA"])
+        channels = "".join([c for c in channels if c in self.mode])
 
         # By default, select all channels
         if len(channels) == 0:
-            channels = "RGBA"
+            channels = self.mode
 
         # Yield all plane options
         for plane in planes:
             for channel in channels:
                 yield (channel, plane)
 
+        if not self.getb("variants", True):
+            return
+
+        for plane in planes:
+            yield ("xor", plane)
+        yield ("inverted", None)
+        yield ("gray", None)
+
     def evaluate(self, case):
         """
         Evaluate the target. Create new images on specific color channels
         and their specified bit indexes.
 
         :param case: A case returned by ``enumerate``. For this unit, this \
-        will be a tuple with the channel (R, G, B) and plane (0-7) to extract.
+        will be a tuple with the channel (R, G, B, or a variant) and plane \
+        (0-7) to extract.
 
         :return: None. This function should not return any data.
         """
@@ -173,14 +186,19 @@ class Unit(FileUnit):
         channel, plane = case
 
         # Carve out the needed plane
-        image = get_plane(self.img, self.data, channel, plane)
+        decoded = self.manager.images.get(self.target)
+        image = get_plane(decoded.pixels, decoded.mode, channel, plane)
 
         if image:
             # Create the artifact
-            output_path, _ = self.generate_artifact(
-                f"channel_{channel}_plane_{plane}.png", create=True
-            )
-            image.save(output_path)
+            if plane is None:
+                name = f"{channel}.png"
+            elif channel in VARIANTS:
+                name = f"{channel}_plane_{plane}.png"
+            else:
+                name = f"channel_{channel}_plane_{plane}.png"
+            output_path, _ = self.generate_artifact(name, create=True)
+            image.save(output_path, compress_level=1)
 
             # Register the artifact with the manager
             self.manager.register_artifact(self, output_path)
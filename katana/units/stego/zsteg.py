@@ -1,57 +1,183 @@
 """
-Extract hidden data with ``zsteg``
+Extract hidden data from the least significant bits of an image
 
-This unit will extract hidden data file using the ``zsteg``
-command-line utility. The syntax runs as::
+This unit is a Python implementation of ``zsteg``. The image is decoded
+once (and shared with the other image units), and a bitstream is built for
+each combination of:
 
-    zsteg <arguments> <target_path>
+- ``bits``: the number of low bits taken from each channel value (1-8)
+- ``channels``: the channels to read, in order (e.g. ``rgb``, ``bgr``, ``a``)
+- ``orders``: the order pixels are read in. ``xy`` reads each row from left
+  to right, top to bottom, while ``yx`` reads each column. An uppercase
+  letter reverses that direction (e.g. ``XY`` starts at the bottom right).
 
-This unit will use only preselected arguments to search with ``zsteg``. 
-This saves processing time, and still seems to find the majority of flags.
+Each bitstream is packed into bytes twice, with the most significant bit
+(``msb``) and the least significant bit (``lsb``) first. Bitstreams are
+built and packed with array operations, so every combination is checked
+in-process without spawning ``zsteg`` for each one.
 
-The unit inherits from :class:`katana.unit.FileUnit` to ensure the target
-is a PNG file.
+Each packed stream is searched for flags, for known file signatures at the
+start of the stream, and for runs of printable text. Text at the start of
+the stream of at least ``min-length`` characters, or anywhere in the stream
+of at least ``min-text`` characters, is registered as data. Text which
+repeats with a short period (as flat areas of an image do) is ignored.
+Streams starting with a file signature are saved as an artifact.
+
+Names of the results follow ``zsteg`` (e.g. ``b1,rgb,lsb,xy``).
 
-.. note::
-    
-    ``zsteg`` only works with PNG files!
+The unit inherits from :class:`katana.unit.FileUnit` to ensure the target
+is a lossless image file (PNG, BMP, GIF or TIFF).
 
 """
 
-from typing import Generator, Any
+from typing import Any, Generator, List, Tuple
 
-from katana.unit import FileUnit
+import numpy as np
 
-import subprocess
+from katana.unit import FileUnit, NotApplicable
 
 
-permutations = [
-    "b1,rgb,lsb,xy",
-    "b1,r,lsb,xy",
-    "b1,rgb,msb,yx",
-    "b2,rgb,lsb,yx",
-    "b2,rgb,lsb,xy",
-    "b1,rgba,lsb,xy",
-    "b1,r,lsb,xy",
-    "b1,rgba,msb,yx",
-    "b2,rgba,lsb,yx",
-    "b2,rgba,lsb,xy",
-    "b1,rgb,lsb,xy",
+CHANNELS = {
+    "L": ["l"],
+    "LA": ["l", "a", "la"],
+    "RGB": ["r", "g", "b", "rgb", "bgr"],
+    "RGBA": ["r", "g", "b", "a", "rgb", "bgr", "rgba", "abgr"],
+}
+"""
+The channels read by default for each image mode
+"""
+
+SIGNATURES: List[Tuple[bytes, str]] = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"%PDF-", "pdf"),
+    (b"PK\x03\x04", "zip"),
+    (b"\x1f\x8b\x08", "gz"),
+    (b"BZh", "bz2"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"Rar!\x1a\x07", "rar"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x7fELF", "elf"),
+    (b"RIFF", "riff"),
+    (b"OggS", "ogg"),
+    (b"ID3", "mp3"),
 ]
 """
-This is a pre-defined list of argument to use with ``zsteg``. These options
-tend to find flags hidden with the LSB steganography technique. 
+Signatures of files which may be hidden at the start of a stream, and the
+extension used for the artifact
 """
 
+BIT_ORDERS = ["msb", "lsb"]
+"""
+The order bits are packed into each byte of a stream
+"""
+
+PRINTABLE = np.zeros(256, dtype=bool)
+PRINTABLE[0x20:0x7F] = True
+PRINTABLE[[ord("\t"), ord("\n"), ord("\r")]] = True
+"""
+Lookup table of the printable bytes
+"""
 
-class Unit(FileUnit):
 
-    DEPENDENCIES = ["zsteg"]
+def read_values(
+    pixels: np.ndarray, mode: str, channels: str, order: str
+) -> np.ndarray:
     """
-    Depends on the binary "zsteg". This must be in your PATH for this unit
-    to run.
+    Read the values of the given channels of each pixel in the given order.
+
+    :param pixels: The decoded image (see :mod:`katana.images`)
+
+    :param mode: The name of each channel of the decoded image
+
+    :param channels: The channels to read from each pixel (e.g. "bgr")
+
+    :param order: The order to read pixels in (e.g. "xy" or "YX")
+
+    :return: A flat array of channel values
+    """
+
+    # An uppercase direction is read backwards
+    if "X" in order:
+        pixels = pixels[:, ::-1]
+    if "Y" in order:
+        pixels = pixels[::-1]
+
+    # Read down each column instead of along each row
+    if order[0] in "yY":
+        pixels = pixels.transpose(1, 0, 2)
+
+    indices = [mode.lower().index(channel) for channel in channels]
+    return np.take(pixels, indices, axis=2).reshape(-1)
+
+
+def extract_bits(values: np.ndarray, bits: int) -> np.ndarray:
+    """
+    Extract the low bits of each value.
+
+    :param values: The channel values (see ``read_values``)
+
+    :param bits: The number of low bits to take from each value
+
+    :return: An array holding a single bit in each element. The bits of
+             each value are listed from the most significant bit.
+    """
+
+    if bits == 1:
+        return values & 1
+
+    # Each column holds one bit of every value
+    stream = np.empty((len(values), bits), dtype=np.uint8)
+    for column in range(bits):
+        stream[:, column] = (values >> (bits - 1 - column)) & 1
+
+    return stream.reshape(-1)
+
+
+def printable_runs(data: bytes, minimum: int) -> List[Tuple[int, int]]:
+    """
+    Find each run of printable bytes within some data.
+
+    :param data: The data to search
+
+    :param minimum: The minimum length of a run
+
+    :return: A list of (start, end) offsets of each run
     """
 
+    # Runs start and end wherever the data changes to and from printable
+    printable = PRINTABLE[np.frombuffer(data, dtype=np.uint8)].view(np.int8)
+    edges = np.flatnonzero(np.diff(printable, prepend=0, append=0))
+    starts, ends = edges[0::2], edges[1::2]
+
+    long = ends - starts >= minimum
+    return list(zip(starts[long].tolist(), ends[long].tolist()))
+
+
+def is_repetitive(text: bytes, period: int = 16) -> bool:
+    """
+    Check whether text mostly repeats with a short period, such as the
+    bits of a flat area of an image.
+
+    :param text: The text to check
+
+    :param period: The longest period to check
+
+    :return: True if most of the text matches the text a period before it
+    """
+
+    values = np.frombuffer(text, dtype=np.uint8)
+    for shift in range(1, min(period, len(values) - 1) + 1):
+        if np.count_nonzero(values[shift:] == values[:-shift]) * 2 > len(values):
+            return True
+
+    return False
+
+
+class Unit(FileUnit):
+
     GROUPS = ["stego", "image", "zsteg"]
     """
     These are "tags" for a unit. Considering it is a Stego unit, "stego"
@@ -61,93 +187,119 @@ class Unit(FileUnit):
 
     PRIORITY = 40
     """
-    Priority works with 0 being the highest priority, and 100 being the 
+    Priority works with 0 being the highest priority, and 100 being the
     lowest priority. 50 is the default priorty. This unit has a slightly
     higher priority of 40.
     """
 
+    KEYWORDS = ["png image", "pc bitmap", "gif image", "tiff image"]
+
     def __init__(self, *args, **kwargs):
         """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a PNG file.
+        The constructor validates the image can be read. The decoded image
+        is shared with the other image units (see :mod:`katana.images`).
         """
-        super(Unit, self).__init__(*args, **kwargs, keywords=["png"])
+        super(Unit, self).__init__(*args, **kwargs)
+
+        image = self.manager.images.get(self.target)
+        if image is None:
+            raise NotApplicable("cannot read image")
+
+        self.mode = image.mode
+
+        # Minimum length of text at the start of a stream, and anywhere else
+        self.min_length = self.geti("min-length", 8)
+        self.min_text = self.geti("min-text", 20)
 
     def enumerate(self) -> Generator[Any, None, None]:
         """
-        This will loop through a set of pre-defined arguments for 
-        ``zsteg`` to run with.
-        
-        :return: Generator of ``zsteg`` arguments
+        Yield each combination of the ``channels`` and ``orders`` arguments
+        as a tuple. By default, each channel (and common channel orders) is
+        read by rows and by columns. Each case covers every number of
+        ``bits``, so the channel values are only read once.
+
+        :return: Generator of (channels, order) tuples
         """
 
-        for args in permutations:
-            yield args
+        channels = self.get("channels", "")
+        channels = [c for c in channels.lower().split(",") if c]
+        if not channels:
+            channels = CHANNELS[self.mode]
+
+        # Skip channels which the image doesn't have
+        channels = [c for c in channels if all(x in self.mode.lower() for x in c)]
+
+        orders = [o for o in self.get("orders", "xy,yx").split(",") if o]
+
+        for order in orders:
+            for channel in channels:
+                yield (channel, order)
 
     def evaluate(self, case: Any) -> None:
         """
-        Evaluate the target. Run ``zsteg`` on the target and
-        recurse on any newfound information.
+        Evaluate the target. Extract the bitstream for each number of
+        ``bits``, pack it with both bit orders, and search each stream.
 
         :param case: A case returned by ``enumerate``. For this unit,\
-        the ``case`` is an argument to use for ``zsteg``. 
+        the ``case`` is a tuple of the channels and the pixel order.
+
+        :return: None. This function should not return any data.
+        """
+
+        channels, order = case
+        image = self.manager.images.get(self.target)
+        values = read_values(image.pixels, image.mode, channels, order)
+
+        bits = [int(b) for b in self.get("bits", "1,2,3,4").split(",")]
+
+        for count in bits:
+            if not 1 <= count <= 8:
+                continue
+
+            stream = extract_bits(values, count)
+
+            for bit_order in BIT_ORDERS:
+
+                # A flag was already found
+                if self.origin.completed:
+                    return
+
+                packed = np.packbits(
+                    stream, bitorder="big" if bit_order == "msb" else "little"
+                ).tobytes()
+                self.search(f"b{count},{channels},{bit_order},{order}", packed)
+
+    def search(self, name: str, data: bytes) -> None:
+        """
+        Search a packed stream for flags, hidden files and text.
+
+        :param name: The name of the stream (e.g. ``b1,rgb,lsb,xy``)
+
+        :param data: The packed stream
 
         :return: None. This function should not return any data.
         """
 
-        # Run zsteg with the given arguments
-        p = subprocess.Popen(
-            ["zsteg", self.target.path, case],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-
-        # Create a variable to store the results in
-        result = {"stdout": [], "stderr": []}
-
-        # Capture the results from the process
-        # output = bytes.decode(p.stdout.read(), "ascii")
-        # error = bytes.decode(p.stderr.read(), "ascii")
-        output = p.stdout.read()
-        error = p.stderr.read()
-
-        # zsteg does buffers output, so we need to clean those
-        # unused status lines. The code below removes them.
-        delimeter = b"\r"
-        cleaned_output = [line.strip() for line in output.split(b"\n") if line]
-        cleaned_errors = [line.strip() for line in error.split(b"\n") if line]
-
-        # First, clean out the actual stdout results
-        for line in cleaned_output:
-
-            status_lines = [
-                segment + delimeter for segment in line.split(delimeter) if segment
-            ]
-
-            for temp_line in status_lines:
-                # this conditions determines whether or not if it was actually
-                # a bad status output
-                if not temp_line.endswith(b".. \r"):
-
-                    # for this unit. we look for flags manually DURING the
-                    # execution and processing, just in case something comes
-                    # up and the rest of the code takes a long time to run.
-                    if self.manager.find_flag(self, temp_line):
-                        return
-                    result["stdout"].append(temp_line)
-
-        # Second, clean out the stderr results
-        for line in cleaned_errors:
-            if self.manager.find_flag(self, line):
-                return
-            result["stderr"].append(line)
-
-        # Finally, if THERE WERE NOT results found in a specific stream
-        # (stdout or stderr), remove those keys from the results dictionary
-        if not len(result["stderr"]):
-            result.pop("stderr")
-        if not len(result["stdout"]) or b"[=] nothing :(\r" in result["stdout"]:
-            result.pop("stdout")
-
-        # Report the results
-        self.manager.register_data(self, result)
+        if self.manager.find_flag(self, data):
+            return
+
+        # Save the stream if it looks like a file
+        for signature, extension in SIGNATURES:
+            if data.startswith(signature):
+                path, handle = self.generate_artifact(
+                    f"{name}.{extension}", mode="wb", create=True
+                )
+                with handle:
+                    handle.write(data)
+                self.manager.register_artifact(self, path)
+                break
+
+        # Shorter text is only reported at the start of the stream
+        for start, end in printable_runs(data, min(self.min_length, self.min_text)):
+            if end - start < (self.min_length if start == 0 else self.min_text):
+                continue
+
+            # Flat areas of the image produce repeating text, which is ignored
+            text = data[start:end]
+            if not is_repetitive(text):
+                self.manager.register_data(self, text)
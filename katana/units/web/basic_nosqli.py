@@ -45,6 +45,11 @@ class Unit(web.WebUnit):
     This unit should not recurse on itself.
     """
 
+    BATCH_SIZE = 1
+    """
+    Every case is an HTTP request, so hand them out one at a time.
+    """
+
     def __init__(self, *args, **kwargs):
         """
         The constructor is included to first determine if there is a form
@@ -99,11 +104,12 @@ class Unit(web.WebUnit):
             if self.password:
                 password = self.password[0].decode("utf-8")
 
-            try:
-                method = vars(requests)[method.lower()]
-            except IndexError:
+            # Requests go through the pooled HTTP client. Forms only GET or POST.
+            if method.lower() == "get":
+                method = self.manager.http.get
+            else:
                 # Could not find a valid method... default to POST
-                method = requests.post
+                method = self.manager.http.post
 
         # Grab the URL pieces
         url_form = self.target.upstream.decode("utf-8").split("/")
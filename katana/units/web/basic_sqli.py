@@ -97,11 +97,10 @@ class Unit(web.WebUnit):
             if self.password:
                 password = self.password[0].decode("utf-8")
 
-            try:
-                method = vars(requests)[method.lower()]
-            except IndexError:
+            # Forms only GET or POST
+            if method.lower() != "get":
                 # Could not find a valid method... default to POST
-                method = requests.post
+                method = "post"
 
             quotes_possibilities = ["'", '"']
             comment_possibilities = ["--", "#", "/*", "%00"]
@@ -134,10 +133,11 @@ class Unit(web.WebUnit):
         else:
             return  # This will tell THE WHOLE UNIT to stop!
 
-    def evaluate(self, case: Any):
+    async def evaluate(self, case: Any):
         """
         Evaluate the target. Attempt to perform SQL injection on
-        the form found on the target web page.
+        the form found on the target web page. This is a coroutine, so many
+        payloads are in flight at once.
 
         :param case: A case returned by ``enumerate``. For this unit,\
         the ``enumerate`` function will offer the HTTP method, action, \
@@ -162,7 +162,8 @@ class Unit(web.WebUnit):
 
         # Now send the payload with a regular user browser
         try:
-            r = method(
+            r = await self.manager.http.request_async(
+                method,
                 last_location + action,
                 data={username: payload, password: payload},
                 timeout=2,
@@ -9,7 +9,6 @@ lots of predefined variables that can be used throughout multiple web units.
 
 """
 
-import requests
 from katana.unit import NotApplicable
 from katana.units import web
 
@@ -83,11 +82,12 @@ class Unit(web.WebUnit):
                 action = self.action[0].decode("utf-8")
             if self.method:
                 method = self.method[0].decode("utf-8")
-            try:
-                method = vars(requests)[method.lower()]
-            except IndexError:
+            # Requests go through the pooled HTTP client. Forms only GET or POST.
+            if method.lower() == "get":
+                method = self.manager.http.get
+            else:
                 # Could not find a valid method... default to POST
-                method = requests.post
+                method = self.manager.http.post
 
         # if this is a relative path, get the furthermost directory location
         url_form = self.target.upstream.decode("utf-8").split("/")
@@ -5,8 +5,12 @@ This unit will detect if a ``/.git/`` directory is found on a website.
 If it is, it will pull down all the files and search for flags within
 the commits and objects inside of the public facing git repository.
 
-This process is threaded, alongside Katana already being threaded...
-so your mileage may vary.
+The repository is downloaded by a pool of threads (``jobs`` in the unit
+configuration) sharing the connection pool of the manager HTTP client.
+Repositories which only expose packfiles are supported through
+``.git/objects/info/packs``. Nothing is checked out: the objects are read
+straight from the dumped object store, and every file from every commit
+becomes a new target.
 
 This unit inherits from :class:`katana.units.web.WebUnit` as that contains
 lots of predefined variables that can be used throughout multiple web units.
@@ -18,31 +22,30 @@ lots of predefined variables that can be used throughout multiple web units.
 """
 
 
-import multiprocessing
+import concurrent.futures
 import os
 import os.path
 import re
-import shutil
 import socket
-import subprocess
 import tempfile
 import urllib.parse
+import zlib
 
 from contextlib import closing
-from hashlib import md5
 
 import bs4
+import dulwich.errors
 import dulwich.index
+import dulwich.object_store
 import dulwich.objects
-import dulwich.pack
 import requests
 import socks
 
 from typing import Any
 
-import re
 from katana.units.web import WebUnit
 from katana.unit import NotApplicable
+import katana.util
 
 
 def is_html(response):
@@ -115,246 +118,211 @@ def get_referenced_sha1(obj_file):
     return objs
 
 
-class Worker(multiprocessing.Process):
+def fetch(unit, url, filepath, timeout, stream=False):
     """
     Part of the Git Dumper procedure.
 
-    Worker for process_tasks 
+    Request a single file through the shared HTTP client of the manager
     """
+    return unit.manager.http.get(
+        "%s/%s" % (url, filepath),
+        allow_redirects=False,
+        stream=stream,
+        timeout=timeout,
+        verify=False,
+    )
 
-    def __init__(self, pending_tasks, tasks_done, args):
-        super().__init__()
-        self.daemon = True
-        self.pending_tasks = pending_tasks
-        self.tasks_done = tasks_done
-        self.args = args
-
-    def run(self):
-        # initialize process
-        self.init(*self.args)
-
-        # fetch and do tasks
-        while True:
-            task = self.pending_tasks.get(block=True)
-
-            if task is None:  # end signal
-                return
 
-            result = self.do_task(task, *self.args)
+def save(response, directory, filepath):
+    """
+    Part of the Git Dumper procedure.
 
-            assert isinstance(result, list), "do_task() should return a list of tasks"
+    Stream the response body into the output directory
+    """
 
-            self.tasks_done.put(result)
+    abspath = os.path.abspath(os.path.join(directory, filepath))
+    create_intermediate_dirs(abspath)
 
-    def init(self, *args):
-        raise NotImplementedError
+    # write file
+    with open(abspath, "wb") as f:
+        for chunk in response.iter_content(65536):
+            f.write(chunk)
 
-    def do_task(self, task, *args):
-        raise NotImplementedError
+    return abspath
 
 
-def process_tasks(initial_tasks, worker, jobs, args=(), tasks_done=None):
+def process_tasks(initial_tasks, task, jobs, args=(), tasks_done=None):
     """
     Part of the Git Dumper procedure.
 
-    Process tasks in parallel.
+    Process tasks concurrently in a pool of threads. Each task is called as
+    ``task(item, *args)``, and returns a list of new items to process. The
+    threads share the connection pool of the HTTP client, so this is cheap
+    compared to the I/O itself.
     """
 
     if not initial_tasks:
         return
 
     tasks_seen = set(tasks_done) if tasks_done else set()
-    pending_tasks = multiprocessing.Queue()
-    tasks_done = multiprocessing.Queue()
-    num_pending_tasks = 0
+    pending = set()
 
-    # add all initial tasks in the queue
-    for task in initial_tasks:
-        assert task is not None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
 
-        if task not in tasks_seen:
-            pending_tasks.put(task)
-            num_pending_tasks += 1
-            tasks_seen.add(task)
+        def submit(items):
+            for item in items:
+                assert item is not None
 
-    # initialize processes
-    processes = [worker(pending_tasks, tasks_done, args) for _ in range(jobs)]
+                if item not in tasks_seen:
+                    tasks_seen.add(item)
+                    pending.add(pool.submit(task, item, *args))
 
-    # launch them all
-    for p in processes:
-        p.start()
+        # add all initial tasks
+        submit(initial_tasks)
 
-    # collect task results
-    while num_pending_tasks > 0:
-        task_result = tasks_done.get()
-        num_pending_tasks -= 1
+        # collect task results
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                pending.remove(future)
+                try:
+                    submit(future.result())
+                except (
+                    requests.exceptions.RequestException,
+                    OSError,
+                    ValueError,
+                    zlib.error,
+                    dulwich.errors.ObjectFormatException,
+                ):
+                    # Missing or broken files (e.g. a "not found" page served
+                    # in place of an object) are expected. Move on.
+                    pass
+
+
+def download(filepath, unit, url, directory, timeout):
+    """
+    Part of the Git Dumper procedure.
 
-        for task in task_result:
-            assert task is not None
+    Download a single file
+    """
+    with closing(fetch(unit, url, filepath, timeout, stream=True)) as response:
 
-            if task not in tasks_seen:
-                pending_tasks.put(task)
-                num_pending_tasks += 1
-                tasks_seen.add(task)
+        if response.status_code != 200:
+            return []
 
-    # send termination signal (task=None)
-    for _ in range(jobs):
-        pending_tasks.put(None)
+        save(response, directory, filepath)
 
-    # join all
-    for p in processes:
-        p.join()
+        return []
 
 
-class DownloadWorker(Worker):
+def download_recursive(filepath, unit, url, directory, timeout):
     """
     Part of the Git Dumper procedure.
 
-    Download a list of files
+    Download a directory recursively.
     """
+    with closing(fetch(unit, url, filepath, timeout, stream=True)) as response:
 
-    def __init__(self, pending_tasks, tasks_done, args):
-        super().__init__(pending_tasks, tasks_done, args)
-        # self.unit = unit
-        self.session = requests.Session()
-
-    def init(self, url, directory, retry, timeout, unit, katana):
-        self.session.verify = False
-        self.session.mount(url, requests.adapters.HTTPAdapter(max_retries=retry))
+        if (
+            response.status_code in (301, 302)
+            and "Location" in response.headers
+            and response.headers["Location"].endswith(filepath + "/")
+        ):
+            return [filepath + "/"]
 
-    def do_task(self, filepath, url, directory, retry, timeout, unit, katana):
-        with closing(
-            self.session.get(
-                "%s/%s" % (url, filepath),
-                allow_redirects=False,
-                stream=True,
-                timeout=timeout,
-            )
-        ) as response:
+        if response.status_code != 200:
+            return []
 
-            if response.status_code != 200:
+        if filepath.endswith("/"):  # directory index
+            if not is_html(response):
                 return []
 
-            abspath = os.path.abspath(os.path.join(directory, filepath))
-            create_intermediate_dirs(abspath)
-
-            # write file
-            with open(abspath, "wb") as f:
-                for chunk in response.iter_content(4096):
-                    f.write(chunk)
+            return [filepath + filename for filename in get_indexed_files(response)]
+        else:  # file
+            save(response, directory, filepath)
 
             return []
 
 
-class RecursiveDownloadWorker(DownloadWorker):
+def find_refs(filepath, unit, url, directory, timeout):
     """
     Part of the Git Dumper procedure.
 
-    Download a directory recursively.
+    Find refs/
     """
+    response = fetch(unit, url, filepath, timeout)
 
-    def do_task(self, filepath, url, directory, retry, timeout, unit, katana):
-        with closing(
-            self.session.get(
-                "%s/%s" % (url, filepath),
-                allow_redirects=False,
-                stream=True,
-                timeout=timeout,
-            )
-        ) as response:
-
-            if (
-                response.status_code in (301, 302)
-                and "Location" in response.headers
-                and response.headers["Location"].endswith(filepath + "/")
-            ):
-                return [filepath + "/"]
-
-            if response.status_code != 200:
-                return []
+    if response.status_code != 200:
+        return []
 
-            if filepath.endswith("/"):  # directory index
-                assert is_html(response)
+    save(response, directory, filepath)
 
-                return [filepath + filename for filename in get_indexed_files(response)]
-            else:  # file
-                abspath = os.path.abspath(os.path.join(directory, filepath))
-                create_intermediate_dirs(abspath)
+    # find refs
+    tasks = []
 
-                # write file
-                with open(abspath, "wb") as f:
-                    for chunk in response.iter_content(4096):
-                        f.write(chunk)
+    for ref in re.findall(r"(refs(/[a-zA-Z0-9\-\.\_\*]+)+)", response.text):
+        ref = ref[0]
+        if not ref.endswith("*"):
+            tasks.append(".git/%s" % ref)
+            tasks.append(".git/logs/%s" % ref)
 
-                return []
+    return tasks
 
 
-class FindRefsWorker(DownloadWorker):
+def find_objects(obj, unit, url, directory, timeout):
     """
     Part of the Git Dumper procedure.
 
-    Find refs/
+    Find objects.
     """
+    filepath = ".git/objects/%s/%s" % (obj[:2], obj[2:])
+    response = fetch(unit, url, filepath, timeout)
 
-    def do_task(self, filepath, url, directory, retry, timeout, unit, katana):
-        response = self.session.get(
-            "%s/%s" % (url, filepath), allow_redirects=False, timeout=timeout
-        )
-
-        if response.status_code != 200:
-            return []
-
-        abspath = os.path.abspath(os.path.join(directory, filepath))
-        create_intermediate_dirs(abspath)
-
-        # write file
-        with open(abspath, "w") as f:
-            f.write(response.text)
-
-        # find refs
-        tasks = []
+    if response.status_code != 200:
+        return []
 
-        for ref in re.findall(r"(refs(/[a-zA-Z0-9\-\.\_\*]+)+)", response.text):
-            ref = ref[0]
-            if not ref.endswith("*"):
-                tasks.append(".git/%s" % ref)
-                tasks.append(".git/logs/%s" % ref)
+    abspath = save(response, directory, filepath)
 
-        return tasks
+    # parse object file to find other objects
+    obj_file = dulwich.objects.ShaFile.from_path(abspath)
+    return get_referenced_sha1(obj_file)
 
 
-class FindObjectsWorker(DownloadWorker):
+def find_packs(directory):
     """
     Part of the Git Dumper procedure.
 
-    Find objects.
+    Return the packs listed in ``.git/objects/info/packs``
     """
 
-    def do_task(self, obj, url, directory, retry, timeout, unit, katana):
-        filepath = ".git/objects/%s/%s" % (obj[:2], obj[2:])
-        response = self.session.get(
-            "%s/%s" % (url, filepath), allow_redirects=False, timeout=timeout
-        )
-        # Fetching %s/%s [%d]\n', url, filepath, response.status_code
+    info_packs_path = os.path.join(directory, ".git", "objects", "info", "packs")
+    if not os.path.exists(info_packs_path):
+        return []
 
-        if response.status_code != 200:
-            return []
+    with open(info_packs_path) as f:
+        info_packs = f.read()
 
-        abspath = os.path.abspath(os.path.join(directory, filepath))
-        create_intermediate_dirs(abspath)
+    return re.findall(r"pack-([a-f0-9]{40})\.pack", info_packs)
 
-        # write file
-        with open(abspath, "wb") as f:
-            f.write(response.content)
 
-        # parse object file to find other objects
-        obj_file = dulwich.objects.ShaFile.from_path(abspath)
-        return get_referenced_sha1(obj_file)
+def open_objects(directory):
+    """
+    Part of the Git Dumper procedure.
 
+    Open the object store (loose objects and packs) of the dumped repository
+    """
+    return dulwich.object_store.DiskObjectStore(
+        os.path.join(directory, ".git", "objects")
+    )
 
-def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
-    """ 
-    Dump a .git repository into the output directory. 
+
+def fetch_git(unit, url, directory, jobs, timeout):
+    """
+    Dump a .git repository into the output directory. Only the ``.git``
+    directory is recovered. The objects are read from it directly (see
+    ``open_objects``), so nothing is checked out.
 
     This is the core function of the https://github.com/arthaud/git-dumper
     code.
@@ -363,7 +331,6 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
     assert os.path.isdir(directory), "%s is not a directory" % directory
     assert not os.listdir(directory), "%s is not empty" % directory
     assert jobs >= 1, "invalid number of jobs"
-    assert retry >= 1, "invalid number of retries"
     assert timeout >= 1, "invalid timeout"
     # find base url
     url = url.rstrip("/")
@@ -374,8 +341,10 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
         url = url[:-4]
     url = url.rstrip("/")
 
+    args = (unit, url, directory, timeout)
+
     # check for /.git/HEAD
-    response = requests.get("%s/.git/HEAD" % url, verify=False, allow_redirects=False)
+    response = fetch(unit, url, ".git/HEAD", timeout)
 
     if response.status_code != 200:
         # error: %s/.git/HEAD does not exist\n', url, file=sys.stderr
@@ -386,7 +355,7 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
 
     # check for directory listing
     # Testing /.git/
-    response = requests.get("%s/.git/" % url, verify=False, allow_redirects=False)
+    response = fetch(unit, url, ".git/", timeout)
 
     if (
         response.status_code == 200
@@ -394,15 +363,7 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
         and "HEAD" in get_indexed_files(response)
     ):
         # Fetching .git recursively
-        process_tasks(
-            [".git/", ".gitignore"],
-            RecursiveDownloadWorker,
-            jobs,
-            args=(url, directory, retry, timeout, unit, katana),
-        )
-
-        # run git checkout
-        subprocess.check_call(["git", "checkout", "."], cwd=directory)
+        process_tasks([".git/", ".gitignore"], download_recursive, jobs, args=args)
         return 0
 
     # no directory listing
@@ -411,27 +372,11 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
         ".gitignore",
         ".git/COMMIT_EDITMSG",
         ".git/description",
-        ".git/hooks/applypatch-msg.sample",
-        ".git/hooks/applypatch-msg.sample",
-        ".git/hooks/applypatch-msg.sample",
-        ".git/hooks/commit-msg.sample",
-        ".git/hooks/post-commit.sample",
-        ".git/hooks/post-receive.sample",
-        ".git/hooks/post-update.sample",
-        ".git/hooks/pre-applypatch.sample",
-        ".git/hooks/pre-commit.sample",
-        ".git/hooks/pre-push.sample",
-        ".git/hooks/pre-rebase.sample",
-        ".git/hooks/pre-receive.sample",
-        ".git/hooks/prepare-commit-msg.sample",
-        ".git/hooks/update.sample",
         ".git/index",
         ".git/info/exclude",
         ".git/objects/info/packs",
     ]
-    process_tasks(
-        tasks, DownloadWorker, jobs, args=(url, directory, retry, timeout, unit, katana)
-    )
+    process_tasks(tasks, download, jobs, args=args)
 
     # find refs
     tasks = [
@@ -442,36 +387,28 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
         ".git/info/refs",
         ".git/logs/HEAD",
         ".git/logs/refs/heads/master",
+        ".git/logs/refs/heads/main",
         ".git/logs/refs/remotes/origin/HEAD",
         ".git/logs/refs/remotes/origin/master",
         ".git/logs/refs/stash",
         ".git/packed-refs",
         ".git/refs/heads/master",
+        ".git/refs/heads/main",
         ".git/refs/remotes/origin/HEAD",
         ".git/refs/remotes/origin/master",
         ".git/refs/stash",
     ]
 
-    process_tasks(
-        tasks, FindRefsWorker, jobs, args=(url, directory, retry, timeout, unit, katana)
-    )
+    process_tasks(tasks, find_refs, jobs, args=args)
 
-    # find packs
+    # find packs, using .git/objects/info/packs. The index is needed to look
+    # up objects within each pack.
     tasks = []
+    for sha1 in find_packs(directory):
+        tasks.append(".git/objects/pack/pack-%s.idx" % sha1)
+        tasks.append(".git/objects/pack/pack-%s.pack" % sha1)
 
-    # use .git/objects/info/packs to find packs
-    info_packs_path = os.path.join(directory, ".git", "objects", "info", "packs")
-    if os.path.exists(info_packs_path):
-        with open(info_packs_path) as f:
-            info_packs = f.read()
-
-        for sha1 in re.findall(r"pack-([a-f0-9]{40})\.pack", info_packs):
-            tasks.append(".git/objects/pack/pack-%s.idx" % sha1)
-            tasks.append(".git/objects/pack/pack-%s.pack" % sha1)
-
-    process_tasks(
-        tasks, DownloadWorker, jobs, args=(url, directory, retry, timeout, unit, katana)
-    )
+    process_tasks(tasks, download, jobs, args=args)
 
     # find objects
     objs = set()
@@ -505,40 +442,33 @@ def fetch_git(unit, url, directory, jobs, retry, timeout, katana):
     # use .git/index to find objects
     index_path = os.path.join(directory, ".git", "index")
     if os.path.exists(index_path):
-        index = dulwich.index.Index(index_path)
-
-        for entry in index.iterblobs():
-            objs.add(entry[1].decode())
+        try:
+            index = dulwich.index.Index(index_path)
+            for entry in index.iterobjects():
+                objs.add(entry[1].decode())
+        except (OSError, ValueError, AssertionError):
+            pass  # a broken index only costs us some objects
 
     # use packs to find more objects to fetch, and objects that are packed
-    pack_file_dir = os.path.join(directory, ".git", "objects", "pack")
-    if os.path.isdir(pack_file_dir):
-        for filename in os.listdir(pack_file_dir):
-            if filename.startswith("pack-") and filename.endswith(".pack"):
-                pack_data_path = os.path.join(pack_file_dir, filename)
-                pack_idx_path = os.path.join(pack_file_dir, filename[:-5] + ".idx")
-                pack_data = dulwich.pack.PackData(pack_data_path)
-                pack_idx = dulwich.pack.load_pack_index(pack_idx_path)
-                pack = dulwich.pack.Pack.from_objects(pack_data, pack_idx)
-
+    with closing(open_objects(directory)) as objects:
+        for pack in objects.packs:
+            try:
                 for obj_file in pack.iterobjects():
-                    packed_objs.add(obj_file.sha().hexdigest())
+                    packed_objs.add(obj_file.id.decode())
                     objs |= set(get_referenced_sha1(obj_file))
+            except (
+                OSError,
+                ValueError,
+                AssertionError,
+                KeyError,
+                zlib.error,
+                dulwich.errors.ObjectFormatException,
+            ):
+                pass  # truncated or damaged pack
 
     # fetch all objects
-    process_tasks(
-        objs,
-        FindObjectsWorker,
-        jobs,
-        args=(url, directory, retry, timeout, unit, katana),
-        tasks_done=packed_objs,
-    )
-
-    # ignore errors
+    process_tasks(objs, find_objects, jobs, args=args, tasks_done=packed_objs)
 
-    subprocess.call(
-        ["git", "checkout", "."], stderr=open(os.devnull, "wb"), cwd=directory
-    )
     return 0
 
 
@@ -592,17 +522,11 @@ class Unit(WebUnit):
         self.git_proxy = self.get("proxy", default="")
         self.git_jobs = self.geti("jobs", default=10)
         self.git_timeout = self.geti("git_timeout", default=3)
-        self.git_retry = self.geti("git_retry", default=3)
-        self.flag_format = self.manager.flag_pattern.pattern.decode("utf-8")
 
         # Validate these configs to ensure they make sense
         if self.git_jobs < 1:
             raise NotApplicable("invalid number of git-jobs")
 
-        # retry validation
-        if self.git_retry < 1:
-            raise NotApplicable("invalid number of git-retries")
-
         # timeout validation
         if self.git_timeout < 1:
             raise NotApplicable("invalid git timeout")
@@ -631,7 +555,7 @@ class Unit(WebUnit):
         url = "{0}/{1}".format(self.target.url_root.rstrip("/"), ".git/HEAD")
 
         try:
-            r = requests.get(url, allow_redirects=False)
+            r = self.manager.http.get(url, allow_redirects=False)
         except (requests.exceptions.ConnectionError,):
             raise NotApplicable("cannot reach server")
 
@@ -645,7 +569,9 @@ class Unit(WebUnit):
     def evaluate(self, case: Any):
         """
         Evaluate the target. If a ``.git`` repository is found, download
-        it and look through all of the objects for a flag.
+        it and look through all of the objects for a flag. Every commit
+        message is registered as data, and every blob (from any commit) is
+        recursed on as a new target.
 
         :param case: A case returned by ``enumerate``. For this unit,\
         the ``enumerate`` function is not used.
@@ -654,94 +580,64 @@ class Unit(WebUnit):
 
         """
 
-        # Keep track of seen files for the target
-        self.target.seen_files = []
+        with tempfile.TemporaryDirectory() as git_directory:
 
-        temp_folder = tempfile.gettempdir()
-        git_directory = tempfile.mkdtemp()
+            # Download the repository
+            try:
+                fetch_git(
+                    self,
+                    self.target.url_root,
+                    git_directory,
+                    self.git_jobs,
+                    self.git_timeout,
+                )
+            except AssertionError as e:
+                return  # something went wrong. stop.
+
+            # Walk every object we recovered, loose or packed
+            with closing(open_objects(git_directory)) as objects:
+                for sha in objects:
+
+                    # Stop once a flag is found
+                    if self.is_complete():
+                        return
+
+                    try:
+                        obj = objects[sha]
+                    except (
+                        KeyError,
+                        OSError,
+                        ValueError,
+                        AssertionError,
+                        zlib.error,
+                        dulwich.errors.ObjectFormatException,
+                    ):
+                        continue  # damaged object
+
+                    if isinstance(obj, dulwich.objects.Commit):
+                        # Add the commit data
+                        message = obj.message.decode("utf-8", errors="replace")
+                        self.manager.register_data(
+                            self,
+                            f"commit {sha[:6].decode()}: {message.strip()}",
+                            recurse=False,
+                        )
+                    elif isinstance(obj, dulwich.objects.Blob):
+                        self.register_blob(sha.decode(), obj.as_raw_string())
+
+    def register_blob(self, sha: str, data: bytes):
+        """
+        Recurse on the contents of a file found in the repository. Printable
+        files are queued as data, anything else is saved as an artifact.
 
-        # Download the repository
-        try:
-            fetch_git(
-                self,
-                self.target.url_root,
-                git_directory,
-                self.git_jobs,
-                self.git_retry,
-                self.git_timeout,
-                self.manager,
-            )
-        except AssertionError as e:
-            return  # something went wrong. stop.
-
-        # Do a basic grep for flags
-        grep = subprocess.run(
-            "git grep -P {}".format(self.flag_format).split(),
-            cwd=git_directory,
-            stdout=subprocess.PIPE,
-        )
-        if self.manager.find_flag(self, grep.stdout):
-            self.completed = True
-            return
-
-        # Start to look at the commit messages...
-        grep = subprocess.run(
-            "git log --pretty=oneline".split(),
-            cwd=git_directory,
-            stdout=subprocess.PIPE,
-        )
-
-        line_number = 0
-        first_commit = ""
-
-        for line in grep.stdout.decode("utf-8").split("\n"):
-            commit, commit_message = line.split(" ")[0], " ".join(line.split(" ")[1:])
-            if line_number == 0:
-                first_commit = commit
-
-            # Add the commit data
-            self.manager.register_data(
-                self, f"commit {commit[:6]}: {commit_message}", recurse=False
-            )
+        :param sha: The object ID of the blob
+        :param data: The contents of the blob
+        """
 
-            # If you find a flag in the commit message, STOP this unit!
-            if self.manager.find_flag(self, commit_message):
-                return
-
-            # -----------------------------------------------------------------
-            # JOHN: This next procedure is HEAVY
-            #       It loops through every commit, grabs files and recurses
-            #       on EVERY NEW FILE it finds.... soooooo
-            #       I limit this to only run if a flag file is specified.
-            if self.manager.flag_pattern:
-                commit_data = subprocess.run(
-                    f"git checkout {commit}".split(),
-                    cwd=git_directory,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-                # Look through all the files in the current commit
-                for (directory, dirs, files) in os.walk(git_directory):
-                    # Ignore the .git directory for god's sake
-                    dirs[:] = [d for d in dirs if d not in [".git"]]
-
-                    for filename in files:
-                        file_path = os.path.join(directory, filename)
-
-                        # Hash the file to make sure if we have not seen it before
-                        path_hash = md5(open(file_path, "rb").read()).hexdigest()
-
-                        if path_hash not in self.target.seen_files:
-                            temp_path = os.path.join(temp_folder, path_hash)
-                            shutil.move(file_path, temp_path)
-                            self.manager.register_data(self, temp_path)
-                            self.target.seen_files.append(path_hash)
-
-                line_number += 1
-
-            commit_data = subprocess.run(
-                f"git checkout {first_commit}".split(),
-                cwd=git_directory,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
+        if katana.util.isprintable(data):
+            self.manager.register_data(self, data)
+        else:
+            filename, handle = self.generate_artifact(sha, mode="wb", create=True)
+            handle.write(data)
+            handle.close()
+            self.manager.register_artifact(self, filename)
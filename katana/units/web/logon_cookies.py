@@ -19,7 +19,6 @@ lots of predefined variables that can be used throughout multiple web units.
 """
 
 import re
-import requests
 
 from katana.unit import NotApplicable
 from katana.units.web import WebUnit
@@ -98,7 +97,8 @@ class Unit(WebUnit):
             if self.password:
                 password = self.password[0].decode("utf-8")
 
-            s = requests.Session()
+            # The session keeps the logon cookies, but shares connections
+            s = self.manager.http.session()
 
             # Attempt a default login
             try:
@@ -118,13 +118,17 @@ class Unit(WebUnit):
                     if admin_cookie in s.cookies.keys():
                         if s.cookies[admin_cookie] == "False":
                             s.cookies.update({admin_cookie: "True"})
-                            new = requests.get(r.url, cookies={admin_cookie: "True"})
+                            new = self.manager.http.get(
+                                r.url, cookies={admin_cookie: "True"}
+                            )
 
                             if self.manager.find_flag(self, new.text):
                                 break
                         else:
                             s.cookies.update({admin_cookie: "1"})
-                            new = requests.get(r.url, cookies={admin_cookie: "1"})
+                            new = self.manager.http.get(
+                                r.url, cookies={admin_cookie: "1"}
+                            )
                             if self.manager.find_flag(self, new.text):
                                 break
             else:
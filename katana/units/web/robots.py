@@ -62,7 +62,7 @@ class Unit(WebUnit):
 
         # Try to get the robots.txt file
         try:
-            r = requests.get(
+            r = self.manager.http.get(
                 "{0}/{1}".format(self.target.url_root.rstrip("/"), "robots.txt"),
                 headers=headers,
             )
@@ -108,7 +108,7 @@ class Unit(WebUnit):
             if action.lower().startswith("disallow"):
                 yield url
 
-    def evaluate(self, case):
+    async def evaluate(self, case):
         """
         Evaluate the target. Reach out to every entry in the robots.txt file
         and look for flags.
@@ -125,7 +125,7 @@ class Unit(WebUnit):
         # Fix the new URL and access the page
         new_url = "{0}/{1}".format(self.target.url_root.rstrip("/"), url.lstrip("/"))
 
-        r = requests.get(new_url, headers=headers)
+        r = await self.manager.http.get_async(new_url, headers=headers)
 
         # I DO recurse on this, in case there are base64 things to catch...
         self.manager.register_data(self, r.text)
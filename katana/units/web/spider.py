@@ -4,28 +4,62 @@ Spider web pages
 This unit will look through all of the different links on a website and
 queue each of them as a new target, or link to explore.
 
+Every spider unit working on the same site (under the same root target)
+shares a :class:`Frontier`. Links are canonicalized (resolved against the
+page, lowercased scheme and host, default ports, ``.`` and ``..`` segments,
+fragments and query parameter order removed) and checked against the
+frontier before they are queued. Duplicate links, links to other sites and
+links beyond the crawl budget are dropped before they become targets. The
+budget is configured under the unit section:
+
+.. code-block:: ini
+
+    [spider]
+    depth = 5       # Maximum number of links followed from the first page
+    breadth = 100   # Maximum number of new links queued from a single page
+    pages = 1000    # Maximum number of pages queued for a single site
+
+Accepted links are queued from the event loop, so the targets created for
+them are downloaded concurrently by the I/O threads of the manager. Each page
+is only requested once, when its target is built.
+
 This unit inherits from :class:`katana.units.web.WebUnit` as that contains
 lots of predefined variables that can be used throughout multiple web units.
 
 .. warning::
-    
-    This unit automatically attempts to perform malicious actions on the 
+
+    This unit automatically attempts to perform malicious actions on the
     target. **DO NOT** use this in any circumstances where you do not have the
     authority to operate!
 
 """
 
-import requests
-from typing import Any
-
+from typing import Any, Dict, Generator
+import urllib.parse
+import posixpath
+import threading
+import hashlib
+import weakref
+import math
 import re
+
 from katana.units.web import WebUnit
 from katana.unit import NotApplicable
 
 
-bad_starting_links = [b"#", b"javascript:", b"https://", b"http://", b"//"]
+bad_starting_links = [b"#", b"javascript:", b"mailto:", b"data:"]
 """
-Avoid inline JavaScript, anchors, and external links
+Avoid inline JavaScript, anchors, e-mail addresses and inline data
+"""
+
+frontiers = weakref.WeakKeyDictionary()
+"""
+The crawl frontiers for each site, indexed by the root target
+"""
+
+frontiers_lock = threading.Lock()
+"""
+Protects the creation of crawl frontiers
 """
 
 
@@ -34,26 +68,158 @@ def has_a_bad_start(link):
     This is a convenience function just to avoid bad links above
     """
     for bad_start in bad_starting_links:
-        if link.startswith(bad_start):
+        if link.lower().startswith(bad_start):
             return False
     else:
         return True
 
 
+def canonicalize(base: str, link: str) -> str:
+    """
+    Resolve a link found on the page at ``base``, and normalize it so that
+    different spellings of the same URL compare equal. Returns None for
+    links which are not HTTP(S).
+    """
+
+    try:
+        parts = urllib.parse.urlsplit(urllib.parse.urljoin(base, link.strip()))
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in ["http", "https"] or not parts.hostname:
+        return None
+
+    # Drop the port if it is the default for the scheme
+    netloc = parts.hostname.lower()
+    if port is not None and port != {"http": 80, "https": 443}[scheme]:
+        netloc = "{0}:{1}".format(netloc, port)
+
+    # Resolve "." and ".." segments, keeping any trailing slash
+    path = posixpath.normpath("/" + parts.path.lstrip("/"))
+    if parts.path.endswith("/") and path != "/":
+        path += "/"
+
+    # Query parameter order doesn't matter
+    query = urllib.parse.urlencode(
+        sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    )
+
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+
+class BloomFilter(object):
+    """
+    A fixed-size set of strings which may report false positives, but never
+    false negatives. Used to remember the links admitted on a site.
+    """
+
+    def __init__(self, capacity: int, error: float = 0.001):
+
+        # Optimal number of bits and hash functions for the error rate
+        self.bits = max(8, int(-capacity * math.log(error) / (math.log(2) ** 2)))
+        self.hashes = max(1, min(16, round(self.bits / capacity * math.log(2))))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _indices(self, item: str) -> Generator[int, None, None]:
+        """ Double hashing with two halves of a single digest """
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for n in range(self.hashes):
+            yield (h1 + n * h2) % self.bits
+
+    def add(self, item: str) -> None:
+        for index in self._indices(item):
+            self.array[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.array[index >> 3] & (1 << (index & 7)) for index in self._indices(item)
+        )
+
+
+class Frontier(object):
+    """
+    The crawl state of a single site. This is shared by every spider unit
+    working on the site.
+
+    :property site: The scheme and host of the site
+    :property admitted: The number of pages admitted so far
+    :property pending: The link depth of each admitted page which has not
+                       been crawled yet
+    :property seen: A Bloom filter of every link admitted so far. It is
+                    sized for the page budget, so memory use doesn't grow
+                    with the number of links.
+    """
+
+    SEEN_ERROR: float = 1e-6
+    """
+    False positive rate of ``seen``. A false positive drops a link which was
+    never queued.
+    """
+
+    def __init__(self, site: str, depth: int, breadth: int, pages: int):
+        super(Frontier, self).__init__()
+
+        self.site = site
+        self.max_depth = depth
+        self.max_breadth = breadth
+        self.max_pages = pages
+
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.pending: Dict[str, int] = {}
+        self.seen = BloomFilter(max(pages, 1), self.SEEN_ERROR)
+
+    def crawl(self, url: str) -> int:
+        """
+        Start crawling a page, and return its link depth (pages not found
+        by the spider are 0). The depth is forgotten afterwards.
+        """
+        with self.lock:
+            return self.pending.pop(url, 0)
+
+    def admit(self, url: str, depth: int) -> bool:
+        """
+        Decide whether the canonical link should be queued. Each link on the
+        site is admitted at most once, and only within the crawl budget.
+        """
+
+        # Don't wander off to other sites
+        if not url.startswith(self.site + "/"):
+            return False
+
+        with self.lock:
+
+            if depth > self.max_depth or self.admitted >= self.max_pages:
+                return False
+
+            if url in self.seen:
+                return False
+            self.seen.add(url)
+
+            self.admitted += 1
+            self.pending[url] = depth
+
+        return True
+
+
 class Unit(WebUnit):
 
     PRIORITY = 20
     """
-    Priority works with 0 being the highest priority, and 100 being the 
+    Priority works with 0 being the highest priority, and 100 being the
     lowest priority. 50 is the default priorty. This unit has a somewhat
     higher priority.
     """
 
-    PROTECTED_RECURSE = True
+    RECURSE_SELF = True
     """
-    We don't really want to spider on EVERYTHING and start an infinite loop..
-    We can protect against this once we create a target object
-    and start to "keep track" of links we find in one specific website target
+    Spider each page we find. The crawl frontier for the site drops
+    duplicate links and stops the crawl once the budget is used up, so this
+    doesn't turn into an infinite loop.
     """
 
     BAD_MIME_TYPES = ["application/octet-stream"]
@@ -65,7 +231,7 @@ class Unit(WebUnit):
         """
         The constructor is included to first determine if a found target
         is an attachment or a bad MIME type. If this is the case, the unit
-        will abort.
+        will abort. Otherwise, it finds the crawl frontier for the site.
         """
         super(Unit, self).__init__(*args, **kwargs)
 
@@ -83,15 +249,30 @@ class Unit(WebUnit):
                         "spider does not support {0} files".format(bad_type)
                     )
 
-    def evaluate(self, case: Any):
-        """
-        Evaluate the target. Look for links inside of the target web page and
-        reach out to each of them, queueing them as a new target.
+        self.url = canonicalize(self.target.upstream.decode("utf-8"), "")
+        if self.url is None:
+            raise NotApplicable("not an http url")
 
-        :param case: A case returned by ``enumerate``. For this unit,\
-        the ``enumerate`` function is not used.
+        # Find (or start) the crawl of this site
+        site = "/".join(self.url.split("/")[:3])
+        with frontiers_lock:
+            sites = frontiers.setdefault(self.origin, {})
+            if site not in sites:
+                sites[site] = Frontier(
+                    site,
+                    self.geti("depth", default=5),
+                    self.geti("breadth", default=100),
+                    self.geti("pages", default=1000),
+                )
+                sites[site].admit(self.url, 0)
+            self.frontier = sites[site]
 
-        :return: None. This function should not return any data.
+    def enumerate(self) -> Generator[Any, None, None]:
+        """
+        Yield cases. Look for links inside of the target web page, and yield
+        each link admitted by the crawl frontier.
+
+        :return: A generator, yielding the canonical URL of each new link
         """
 
         # Look for links inside the page
@@ -99,22 +280,37 @@ class Unit(WebUnit):
             rb'href=[\'"](.+?)[\'"]', self.target.raw, flags=re.IGNORECASE
         )
 
-        # Remove anything that might not be local (remove all bad links)
+        # Remove anything that might not be a page (remove all bad links)
         links = list(filter(has_a_bad_start, links))
 
-        # if this is a relative path, get the furthermost directory location
-        url_form = self.target.upstream.decode("utf-8").split("/")
-        if len(url_form) > 3:
-            last_location = "/".join(url_form[:-1])
-        else:
-            last_location = self.target.upstream.decode("utf-8").rstrip("/")
+        depth = self.frontier.crawl(self.url) + 1
+        admitted = 0
 
-        # All this does is find is new links.
-        # It won't contain flags and they don't need to be considered results.
         for link in links:
-            new_link = "{0}/{1}".format(last_location, link.decode("utf-8").lstrip("/"))
 
-            # If we found a new link, add as as a result, recurse on it, and
-            # hunt for flags
-            if new_link:
-                self.manager.register_data(self, new_link)
+            # Only so many new links from a single page
+            if admitted >= self.frontier.max_breadth:
+                break
+
+            url = canonicalize(self.url, link.decode("utf-8", errors="ignore"))
+            if url is not None and self.frontier.admit(url, depth):
+                admitted += 1
+                yield url
+
+    async def evaluate(self, case: Any):
+        """
+        Evaluate the target. Queue a new link as a new target. This runs on
+        the event loop, so the target is built (and the page downloaded) in
+        an I/O thread, and links are fetched concurrently.
+
+        :param case: A case returned by ``enumerate``. For this unit,\
+        the ``enumerate`` function yields each new link.
+
+        :return: None. This function should not return any data.
+        """
+
+        # All this does is find is new links.
+        # It won't contain flags and they don't need to be considered results.
+        # If we found a new link, add as as a result, recurse on it, and
+        # hunt for flags
+        self.manager.register_data(self, case)
@@ -4,20 +4,81 @@ ZIP file extraction
 This unit attempt to extract a ZIP file. First the unit will try with an empty
 password, and then it will try with the user-supplied password argument. 
 Finally, it will bruteforce with a upplied dictionary file. 
-The process is done with a dependency, using the ``unzip`` command like so::
 
-    unzip -P <password> <target_path>
+Passwords are checked in-process. The archive is parsed once, and the
+encryption header of every encrypted member is kept. For traditional
+ZipCrypto, the last byte of the decrypted header must match a check byte
+(the high byte of the CRC or modification time), so each wrong password is
+usually rejected after decrypting only 12 bytes. Passwords which pass the
+check byte of every member are confirmed by decompressing a member and
+checking its CRC. WinZip AES members are checked with the 2 byte password
+verifier, and confirmed with the authentication code.
+
+The archive is only extracted once, with the correct password.
 
 The unit inherits from :class:`katana.unit.FileUnit` to ensure the target
 is a ZIP file.
 
 """
-from typing import Any
-import subprocess
+from typing import Any, List, Optional, Tuple
+import hashlib
+import struct
 import zipfile
+import hmac
+import zlib
+import bz2
 import os
 
-from katana.unit import FileUnit
+from Crypto.Cipher import AES
+from Crypto.Util import Counter
+
+from katana.unit import FileUnit, NotApplicable
+
+
+def _crc_table() -> List[int]:
+    """ Build the CRC32 lookup table used by the ZipCrypto key schedule """
+
+    table = []
+    for value in range(256):
+        for _ in range(8):
+            value = (value >> 1) ^ 0xEDB88320 if value & 1 else value >> 1
+        table.append(value)
+    return table
+
+
+CRC_TABLE: List[int] = _crc_table()
+
+AES_KEY_LENGTHS = {1: 16, 2: 24, 3: 32}
+"""
+Key length for each WinZip AES strength. The salt is half as long.
+"""
+
+
+def zipcrypto_keys(password: bytes) -> Tuple[int, int, int]:
+    """ The ZipCrypto keys after they are initialized with the password """
+
+    k0, k1, k2 = 0x12345678, 0x23456789, 0x34567890
+    for c in password:
+        k0 = (k0 >> 8) ^ CRC_TABLE[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ CRC_TABLE[(k2 ^ (k1 >> 24)) & 0xFF]
+
+    return k0, k1, k2
+
+
+def zipcrypto_check(keys: Tuple[int, int, int], header: bytes) -> int:
+    """ Decrypt a 12 byte ZipCrypto header, and return the last byte """
+
+    k0, k1, k2 = keys
+    c = 0
+    for c in header:
+        t = (k2 | 2) & 0xFFFF
+        c ^= ((t * (t ^ 1)) >> 8) & 0xFF
+        k0 = (k0 >> 8) ^ CRC_TABLE[(k0 ^ c) & 0xFF]
+        k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+        k2 = (k2 >> 8) ^ CRC_TABLE[(k2 ^ (k1 >> 24)) & 0xFF]
+
+    return c
 
 
 class Unit(FileUnit):
@@ -33,10 +94,9 @@ class Unit(FileUnit):
     In can case we have nested ZIPs, we can recurse into ourselves
     """
 
-    DEPENDENCIES = ["unzip"]
+    CPU_BOUND = True
     """
-    This process is done with the ``unzip`` command because the Python
-    method bottlenecks.
+    Passwords are checked against the archive in python.
     """
 
     PRIORITY = 25
@@ -46,70 +106,250 @@ class Unit(FileUnit):
     moderately high priority due to speed and broadness of applicability
     """
 
+    KEYWORDS = ["zip archive", "OpenDocument"]
+
     def __init__(self, *args, **kwargs):
+        super(Unit, self).__init__(*args, **kwargs)
+
+        # Parse the archive once, keeping the encryption header of each member
+        self.zipcrypto: List[Tuple[str, int, bytes, int]] = []
+        self.aes: List[Tuple[str, int, int, bytes, bytes, int, int]] = []
+
+        try:
+            with zipfile.ZipFile(self.target.path) as archive:
+                members = archive.infolist()
+            with open(self.target.path, "rb") as handle:
+                for info in members:
+                    if info.flag_bits & 0x1:
+                        self._parse_member(handle, info)
+        except (zipfile.BadZipFile, OSError, struct.error) as e:
+            raise NotApplicable(f"unable to parse archive: {e}")
+
+    def _parse_member(self, handle: Any, info: zipfile.ZipInfo) -> None:
         """
-        The constructor is included just to provide a keyword for the
-        ``FileUnit``, ensuring the provided target is in fact a ZIP archive.
+        Read the encryption header of an encrypted member.
+
+        :param handle: The open target file
+        :param info: The member of the archive
         """
 
-        super(Unit, self).__init__(
-            *args, **kwargs, keywords=["zip archive", "OpenDocument"]
+        # The data follows the local header, whose extra field may differ
+        handle.seek(info.header_offset)
+        name_length, extra_length = struct.unpack("<26xHH", handle.read(30))
+        offset = info.header_offset + 30 + name_length + extra_length
+
+        if info.compress_type != 99:
+            # With a data descriptor, the check byte comes from the time
+            if info.flag_bits & 0x8:
+                hour, minute = info.date_time[3:5]
+                check = ((hour << 11) | (minute << 5)) >> 8
+            else:
+                check = info.CRC >> 24
+
+            handle.seek(offset)
+            self.zipcrypto.append(
+                (info.filename, info.file_size, handle.read(12), check)
+            )
+            return
+
+        # WinZip AES stores the strength and real method in an extra field
+        extra = info.extra
+        while len(extra) >= 4:
+            field, size = struct.unpack("<HH", extra[:4])
+            if field == 0x9901:
+                _, _, strength, method = struct.unpack("<H2sBH", extra[4:11])
+                break
+            extra = extra[4 + size :]
+        else:
+            return
+
+        length = AES_KEY_LENGTHS[strength]
+        handle.seek(offset)
+        salt = handle.read(length // 2)
+        verifier = handle.read(2)
+
+        self.aes.append(
+            (info.filename, offset, info.compress_size, salt, verifier, length, method)
         )
 
     def enumerate(self):
         """
         This function will first yield an empty password, then the
-        supplied password argument, then loop through each line of
-        a provided dictionary file. The password will then be used by
+        supplied password argument, then ranges of lines from a
+        provided dictionary file. The passwords will then be used by
         the ``evaluate`` function to try and extract the ZIP fike.
         """
 
         # the default is to try with no password
-        yield ""
+        passwords = [b""]
 
         # if they supply a password, use it
         if self.get("password"):
-            yield self.get("password")
+            passwords.append(self.get("password").encode("utf-8"))
+
+        yield passwords
 
         # if they supply a dictionary to look through, use each of those!
-        if self.get("dict"):
-            with open(self.get("dict"), "rb") as handle:
-                for line in handle:
-                    yield line.rstrip(b"\n")
+        yield from self.wordlist_ranges()
 
-    def evaluate(self, case: str):
+    def evaluate(self, case: Any):
         """
-        Evaluate the target. Extract the target with ZIP and
-        recurse on any new found files.
+        Evaluate the target. Check each password in the case against
+        the archive, and extract the target once the password is found.
 
         :param case: A case returned by ``enumerate``. For this unit, \
-        ``case`` will first be an empty password, then the password supplied \
-        as an argument, then the contents of a provided dictionary file. 
+        ``case`` will first be an empty password and the password supplied \
+        as an argument, then ranges of a provided dictionary file. 
 
         :return: None. This function should not return any data.
         """
 
-        password = case
+        for password in case:
+
+            # Another range may have found the password already
+            if self.completed:
+                return
+
+            if self.check(password):
+                self.extract(password)
+                self.manager.complete(self)
+                return
+
+    def check(self, password: bytes) -> bool:
+        """
+        Check whether a password opens the archive. The cheap checks are
+        done first, and only passwords passing them are confirmed.
 
-        result = {"password": "", "namelist": []}
+        :param password: The password to try
+
+        :return: True if the password is correct
+        """
+
+        # Every ZipCrypto header must decrypt to its check byte
+        if self.zipcrypto:
+            keys = zipcrypto_keys(password)
+            for _, _, header, check in self.zipcrypto:
+                if zipcrypto_check(keys, header) != check:
+                    return False
+
+        # The AES password verifier is derived with PBKDF2
+        if self.aes:
+            _, _, _, salt, verifier, length, _ = self.aes[0]
+            derived = hashlib.pbkdf2_hmac("sha1", password, salt, 1000, length * 2 + 2)
+            if derived[-2:] != verifier:
+                return False
+
+        # Confirm by decompressing the smallest member and checking its CRC
+        if self.zipcrypto:
+            name = min(self.zipcrypto, key=lambda member: member[1])[0]
+            try:
+                with zipfile.ZipFile(self.target.path) as archive:
+                    archive.read(name, pwd=password)
+            except (RuntimeError, zipfile.BadZipFile, zlib.error, EOFError):
+                return False
+
+        # Confirm with the authentication code
+        if self.aes:
+            try:
+                if self.decrypt_aes(self.aes[0], password) is None:
+                    return False
+            except (zlib.error, OSError, ValueError, NotImplementedError):
+                return False
+
+        return True
+
+    def decrypt_aes(self, member: Tuple, password: bytes) -> Optional[bytes]:
+        """
+        Decrypt and decompress a WinZip AES member.
+
+        :param member: The parsed member from ``self.aes``
+        :param password: The password to use
+
+        :return: The contents of the member, or None if the password is wrong
+        """
+
+        _, offset, size, salt, verifier, length, method = member
+
+        derived = hashlib.pbkdf2_hmac("sha1", password, salt, 1000, length * 2 + 2)
+        if derived[-2:] != verifier:
+            return None
+
+        # The encrypted data sits between the verifier and authentication code
+        with open(self.target.path, "rb") as handle:
+            handle.seek(offset + len(salt) + 2)
+            data = handle.read(size - len(salt) - 2 - 10)
+            code = handle.read(10)
+
+        mac = hmac.new(derived[length : length * 2], data, hashlib.sha1)
+        if not hmac.compare_digest(mac.digest()[:10], code):
+            return None
+
+        counter = Counter.new(128, initial_value=1, little_endian=True)
+        data = AES.new(derived[:length], AES.MODE_CTR, counter=counter).decrypt(data)
+
+        if method == zipfile.ZIP_STORED:
+            return data
+        elif method == zipfile.ZIP_DEFLATED:
+            return zlib.decompress(data, -15)
+        elif method == zipfile.ZIP_BZIP2:
+            return bz2.decompress(data)
+
+        raise NotImplementedError(f"unsupported compression method: {method}")
+
+    def extract(self, password: bytes):
+        """
+        Extract the target with the correct password, and recurse on
+        the extracted files.
+
+        :param password: The correct password
+
+        :return: None. This function should not return any data.
+        """
+
+        result = {"password": repr(password)[2:-1], "namelist": []}
+        aes = {member[0]: member for member in self.aes}
 
         # Create a directory to store the files in
-        directory_path = self.get_output_dir()
-
-        p = subprocess.Popen(
-            ["unzip", "-P", password, self.target.path],
-            cwd=directory_path,
-            stdout=subprocess.PIPE,
-            stdin=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        directory_path = os.path.realpath(self.get_output_dir())
+
+        with zipfile.ZipFile(self.target.path) as archive:
+            for info in archive.infolist():
+
+                # Never write outside of the output directory
+                path = os.path.realpath(
+                    os.path.join(directory_path, info.filename.lstrip("/\\"))
+                )
+                if not path.startswith(directory_path + os.sep):
+                    continue
+
+                if info.is_dir():
+                    os.makedirs(path, exist_ok=True)
+                    continue
+
+                # Members which fail to extract are skipped
+                try:
+                    if info.filename in aes:
+                        data = self.decrypt_aes(aes[info.filename], password)
+                    else:
+                        data = archive.read(info, pwd=password)
+                except (
+                    RuntimeError,
+                    zipfile.BadZipFile,
+                    zlib.error,
+                    EOFError,
+                    ValueError,
+                    NotImplementedError,
+                ):
+                    continue
+
+                if data is None:
+                    continue
 
-        p.wait()
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as handle:
+                    handle.write(data)
 
-        for root, dirs, files in os.walk(directory_path):
-            for name in files:
-                result["namelist"].append(name)
-                path = os.path.join(root, name)
+                result["namelist"].append(info.filename)
                 self.manager.register_artifact(self, path)
 
         self.manager.register_data(self, result)
@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
+from typing import Any, Callable, Generator, Tuple
 import string
+import numpy
+import mmap
+
+# Default size of each window when scanning large data
+WINDOW_SIZE = 1024 * 1024
+# Default number of bytes shared between adjacent windows
+WINDOW_OVERLAP = 4096
 
 
 def isprintable(data) -> bool:
@@ -18,6 +26,158 @@ def isprintable(data) -> bool:
     return True
 
 
+def byte_histogram(data) -> numpy.ndarray:
+    """
+    Count the occurrences of each byte value within ``data``. This accepts any
+    bytes-like object (including memory mapped targets) without copying it,
+    and returns an array of 256 counts indexed by byte value.
+    """
+
+    if type(data) is str:
+        data = data.encode("utf-8")
+
+    return numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=256)
+
+
+def is_stream(data) -> bool:
+    """ Whether ``data`` is a file-like object rather than a buffer. Memory
+    maps are treated as buffers, since the file position of a shared memory
+    map can't be used from multiple threads. """
+    return hasattr(data, "read") and not isinstance(data, mmap.mmap)
+
+
+def _reader(data) -> Callable[[int], bytes]:
+    """ Build a function returning the next ``size`` bytes of a buffer or
+    file-like object. Fewer bytes are only returned at the end of the data. """
+
+    if is_stream(data):
+
+        def read(size: int) -> bytes:
+            chunks = []
+            while size > 0:
+                chunk = data.read(size)
+                if not chunk:
+                    break
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                chunks.append(chunk)
+                size -= len(chunk)
+            return b"".join(chunks)
+
+    else:
+        position = 0
+
+        def read(size: int) -> bytes:
+            nonlocal position
+            chunk = data[position : position + size]
+            position += len(chunk)
+            return bytes(chunk)
+
+    return read
+
+
+def windows(
+    data, size: int = WINDOW_SIZE, overlap: int = WINDOW_OVERLAP
+) -> Generator[Tuple[int, Any, int], None, None]:
+    """
+    Split ``data`` into windows of ``size`` bytes, each followed by ``overlap``
+    bytes which are repeated at the beginning of the next window. This yields
+    a tuple of the window offset, the window itself, and the limit within the
+    window. Anything starting at or after the limit will be seen again in the
+    next window, so anything up to ``overlap`` bytes long which starts before
+    the limit lies wholly within the window. The data may be a string, any
+    bytes-like object (including memory mapped targets) or a file-like
+    object, and at most one window is held in memory. Data fitting within a
+    single window is not copied.
+    """
+
+    if type(data) is str:
+        data = data.encode("utf-8")
+
+    if not is_stream(data) and len(data) <= size + overlap:
+        yield 0, data, len(data)
+        return
+
+    read = _reader(data)
+    offset = 0
+    window = read(size + overlap)
+
+    while True:
+        chunk = read(size)
+
+        # Nothing follows this window
+        if not chunk:
+            yield offset, window, len(window)
+            return
+
+        yield offset, window, size
+
+        # Keep the overlap for the beginning of the next window
+        window = window[size:] + chunk
+        offset += size
+
+
+def finditer(
+    pattern, data, size: int = WINDOW_SIZE, overlap: int = WINDOW_OVERLAP
+) -> Generator[Any, None, None]:
+    """
+    Equivalent to ``pattern.finditer(data)``, but searches the data in windows
+    of ``size`` bytes (see ``windows`` for the accepted data types). A match
+    which runs into the end of a window is searched again at the start of the
+    next window, so matches shorter than a window are never split. Windows
+    also share ``overlap`` bytes, so patterns which only match with some
+    trailing context are still found. Match positions are relative to the
+    window containing the match.
+
+    The maximum match length is ``overlap`` bytes: every match up to that
+    length is found exactly once, as by ``pattern.finditer``. A longer match
+    is missed if it crosses the end of a window without the pattern matching
+    any of it there (e.g. ``FLAG{[^}]*}`` before its closing brace). Greedy
+    matches longer than a window are truncated into window sized pieces.
+    """
+
+    if type(data) is str:
+        data = data.encode("utf-8")
+
+    if not is_stream(data) and len(data) <= size:
+        yield from pattern.finditer(data)
+        return
+
+    read = _reader(data)
+    # Offset of the window within the data
+    offset = 0
+    # Matches starting before this offset were already yielded
+    committed = 0
+    window = read(size)
+
+    while window:
+
+        last = len(window) < size
+        resume = None
+
+        for match in pattern.finditer(window):
+            if offset + match.start() < committed:
+                continue
+
+            # This match may continue into the next window
+            if not last and match.end() == len(window) and match.start() > 0:
+                resume = match.start()
+                break
+
+            committed = max(committed, offset + match.end())
+            yield match
+
+        if last:
+            return
+
+        # Start the next window with the overlap, or with the cut off match
+        if resume is None:
+            resume = max(len(window) - overlap, committed - offset, 1)
+
+        window = window[resume:] + read(resume)
+        offset += resume
+
+
 def is_good_magic(magic: str) -> bool:
     """ Checks if the magic type is in a list of known interesting file types
     """
@@ -55,16 +215,25 @@ def ellipsize(data: str, length: int = 64) -> str:
 
 def process_output(popen_object) -> dict:
     """
-    This function expects a ``subprocess.Popen`` object, to read the standard
-    output and standard error streams. It reads these line-by-line, stripping
-    whitespace, and adds them to a ``results`` dictionary so it could be
-    easily given back to Katana.
+    This function expects a ``subprocess.Popen`` object (or the
+    ``katana.runner.ProcessResult`` of a finished process), to read the
+    standard output and standard error streams. It reads these line-by-line,
+    stripping whitespace, and adds them to a ``results`` dictionary so it
+    could be easily given back to Katana.
     """
 
     result = {"stdout": [], "stderr": []}
 
-    output = bytes.decode(popen_object.stdout.read(), "latin-1")
-    error = bytes.decode(popen_object.stderr.read(), "latin-1")
+    output, error = popen_object.stdout, popen_object.stderr
+
+    # Running processes have streams rather than the output itself
+    if hasattr(output, "read"):
+        output = output.read()
+    if hasattr(error, "read"):
+        error = error.read()
+
+    output = bytes.decode(output, "latin-1")
+    error = bytes.decode(error, "latin-1")
 
     for line in [l.strip() for l in error.split("\n") if l]:
         result["stderr"].append(line)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+
+The :class:`Wordlist` is the dictionary file service shared by every unit which guesses passwords (e.g. the ``dict``
+option of ``crack.md5``, ``zip.unzip`` or ``stego.steghide``). Dictionaries are opened with :func:`load`::
+
+    wordlist = katana.wordlist.load(self.get("dict"))
+
+The file is memory mapped once per process, and the byte offset of every line is indexed the first time a password
+is looked up by its number (e.g. when the file is split into ranges). Later calls to :func:`load` with the same file
+(from any unit, for any target) return the same object until the file is modified.
+
+Instead of yielding one case per password, units yield contiguous ranges of the dictionary from ``enumerate``. The
+``Unit.wordlist_ranges`` helper does this for the ``dict`` option::
+
+    def enumerate(self):
+        yield [b"", b"password"]
+        yield from self.wordlist_ranges()
+
+    def evaluate(self, case):
+        for password in case:
+            ...
+
+Each :class:`WordRange` is an iterable of passwords (without the trailing newline), read by slicing the memory map
+and splitting it in one go. A range sent to the process pool only carries the path and byte span. Worker processes
+map the file and slice the span, but never index it. The number of passwords in a range is set with the
+``wordlist-range`` option (under the manager or unit section), so the manager pulls whole ranges rather than single
+passwords per dequeue.
+
+"""
+from typing import Any, Dict, Iterator, Tuple
+import threading
+import mmap
+import os
+
+import numpy as np
+
+# Wordlists loaded by this process, indexed by path
+wordlists: Dict[str, "Wordlist"] = {}
+# Protects the wordlists dictionary
+wordlists_lock = threading.Lock()
+
+
+def load(path: str) -> "Wordlist":
+    """ Load the wordlist at the given path. Wordlists are only loaded once per
+    process, unless the file was modified.
+
+    :param path: Path to the dictionary file
+    :return: The shared wordlist object
+    """
+
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+
+    with wordlists_lock:
+        wordlist = wordlists.get(path)
+        if wordlist is None or wordlist.version != (stat.st_size, stat.st_mtime_ns):
+            wordlist = Wordlist(path)
+            wordlists[path] = wordlist
+
+    return wordlist
+
+
+class Wordlist(object):
+    """ A memory mapped dictionary file with an index of the start of each
+    line. Indexing a wordlist returns a single password, and slicing it
+    returns a :class:`WordRange`.
+
+    :property path: The real path to the dictionary file
+    :property version: The size and modification time of the file when loaded
+    :property offsets: The byte offset of each line, followed by the size of
+                       the file (indexed on first use)
+    """
+
+    RANGE_SIZE: int = 10000
+    """ Default number of passwords per range """
+
+    def __init__(self, path: str):
+        super(Wordlist, self).__init__()
+
+        self.path = path
+
+        with open(path, "rb") as handle:
+            stat = os.fstat(handle.fileno())
+            self.version = (stat.st_size, stat.st_mtime_ns)
+
+            # Empty files can't be mapped
+            if stat.st_size == 0:
+                self.data = b""
+            else:
+                self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._offsets: np.ndarray = None
+        self.lock = threading.Lock()
+
+    @property
+    def offsets(self) -> np.ndarray:
+        # Ranges can be read without the index, so it is built on demand
+        with self.lock:
+            if self._offsets is None:
+                self._offsets = self._index()
+            return self._offsets
+
+    def _index(self) -> np.ndarray:
+        """ Find the byte offset of each line. The file is scanned in blocks to
+        bound the memory used by the scan itself. """
+
+        size = len(self.data)
+        dtype = np.uint32 if size < 2 ** 32 else np.uint64
+        block = 64 * 1024 * 1024
+
+        # Every line starts after a newline, except for the first one
+        starts = [np.zeros(1, dtype=dtype)]
+        for begin in range(0, size, block):
+            chunk = np.frombuffer(self.data[begin : begin + block], dtype=np.uint8)
+            starts.append((np.flatnonzero(chunk == 10) + begin + 1).astype(dtype))
+
+        offsets = np.concatenate(starts)
+
+        # The last line may not end with a newline
+        if offsets[-1] != size:
+            offsets = np.append(offsets, np.array([size], dtype=dtype))
+
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("wordlist slices must be contiguous")
+            return WordRange(
+                self.path,
+                int(self.offsets[start]),
+                int(self.offsets[max(start, stop)]),
+                self,
+            )
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("wordlist index out of range")
+
+        line = self.data[self.offsets[index] : self.offsets[index + 1]]
+        return line[:-1] if line.endswith(b"\n") else line
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self[:])
+
+    def ranges(self, size: int = None) -> Iterator["WordRange"]:
+        """ Split the wordlist into contiguous ranges of ``size`` passwords
+
+        :param size: Number of passwords in each range
+        :return: Generator of ranges covering the whole wordlist
+        """
+
+        size = size or self.RANGE_SIZE
+
+        for start in range(0, len(self), size):
+            yield self[start : start + size]
+
+
+class WordRange(object):
+    """ A contiguous range of lines from a :class:`Wordlist`. Iterating the
+    range yields each password. Ranges are cheap to pickle, and will map the
+    file within the receiving process if needed.
+
+    :property path: The real path to the dictionary file
+    :property span: The byte offsets of the range within the file
+    """
+
+    def __init__(self, path: str, start: int, stop: int, wordlist: Wordlist = None):
+        super(WordRange, self).__init__()
+
+        self.path = path
+        self.span = (start, stop)
+        self.wordlist = wordlist
+
+    def __getstate__(self) -> Tuple[str, Tuple[int, int]]:
+        # Only the location is sent to other processes
+        return (self.path, self.span)
+
+    def __setstate__(self, state: Tuple[str, Tuple[int, int]]) -> None:
+        self.path, self.span = state
+        self.wordlist = None
+
+    def __iter__(self) -> Iterator[bytes]:
+
+        if self.wordlist is None:
+            self.wordlist = load(self.path)
+
+        start, stop = self.span
+        if start == stop:
+            return iter(())
+
+        # Slice the whole range at once, and drop the final newline
+        data = self.wordlist.data[start:stop]
+        if data.endswith(b"\n"):
+            data = data[:-1]
+
+        return iter(data.split(b"\n"))
+
+    def __repr__(self) -> str:
+        return "<WordRange {0} [{1}:{2}]>".format(self.path, *self.span)
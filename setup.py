@@ -20,8 +20,7 @@ dependencies = [
     "base58",
     "pysocks",
     "scipy",
-    "pydub",
-    "matplotlib",
+    "numpy>=1.20",
     "pdftotext",
     "PyPDF2",
     "pyopenssl",
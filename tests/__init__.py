@@ -26,8 +26,14 @@ parameters:
 That's it! A Katana Unit Test only requires that single call, however your test
 method can also be used to generate a unique or special target (for example,
 creating a temporary file containing an image to pass to stego unit).
+
+Tests of web units can also inherit from the `LocalHTTPServer` mixin, which
+serves a site from a request handler on localhost for the length of the test.
 """
+from http.server import HTTPServer
 from unittest import TestCase
+import functools
+import threading
 import warnings
 import os
 import io
@@ -115,3 +121,37 @@ class KatanaTest(TestCase):
 
         # Fail otherwise
         self.fail(f"correct flag not found (found: {self.monitor.flags})")
+
+
+class LocalHTTPServer(object):
+    """ Mixin for tests which serve a site on localhost. It must be listed
+    before `KatanaTest`. Call `start_server` from `setUp`, and the server is
+    shut down by `tearDown`. """
+
+    def start_server(self, handler, **kwargs) -> str:
+        """ Serve requests with the given handler class in a background
+        thread. Requests are not logged.
+
+        :param handler: The request handler class
+        :param kwargs: Extra arguments for the handler (e.g. `directory`)
+        :return: The URL of the site
+        """
+
+        # Keep the test output clean
+        quiet = type(handler.__name__, (handler,), {"log_message": lambda *a: None})
+
+        self.server = HTTPServer(("127.0.0.1", 0), functools.partial(quiet, **kwargs))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.server_url = f"http://127.0.0.1:{self.server.server_port}/"
+        return self.server_url
+
+    def tearDown(self):
+        """ Shut down the server, if it was started """
+
+        if getattr(self, "server", None) is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+        super(LocalHTTPServer, self).tearDown()
@@ -0,0 +1,83 @@
+import tempfile
+import io
+import os
+
+from katana.cache import ResultCache
+from katana.monitor import Monitor
+from katana.manager import Manager
+from tests import KatanaTest
+
+
+class TestResultCache(KatanaTest):
+    """ Test katana.cache.ResultCache """
+
+    def setUp(self):
+        super(TestResultCache, self).setUp()
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.directory.name, "cache")
+
+        self.target = os.path.join(self.directory.name, "target.bin")
+        with open(self.target, "wb") as f:
+            f.write(bytes(range(256)) * 64 + b"FLAG{strings_attached}\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestResultCache, self).tearDown()
+
+    def config(self, timeout: str) -> str:
+        return rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=strings
+        auto=no
+        force=yes
+        cache-dir={self.cache}
+        process-timeout={timeout}
+        """
+
+    def entries(self):
+        if not os.path.isdir(self.cache):
+            return []
+        return [name for name in os.listdir(self.cache) if not name.startswith(".")]
+
+    def test_killed_not_cached(self):
+
+        # The program runs out of time right away
+        self.manager.read_file(io.StringIO(self.config("0.000001")))
+        self.manager.queue_target(self.target)
+        self.manager.start()
+        self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+        self.assertEqual(self.entries(), [])
+
+        # A complete run is cached
+        self.monitor = Monitor()
+        self.manager = Manager(monitor=self.monitor)
+        self.katana_test(
+            config=self.config("120"),
+            target=self.target,
+            correct_flag="FLAG{strings_attached}",
+        )
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_copy_into(self):
+        source = os.path.join(self.directory.name, "source")
+        os.makedirs(os.path.join(source, "inner"))
+        with open(os.path.join(source, "inner", "new.txt"), "w") as f:
+            f.write("new")
+        os.symlink("inner/new.txt", os.path.join(source, "link"))
+
+        # The output directory of the unit already exists
+        destination = os.path.join(self.directory.name, "destination")
+        os.makedirs(os.path.join(destination, "inner"))
+        with open(os.path.join(destination, "inner", "old.txt"), "w") as f:
+            f.write("old")
+
+        ResultCache(self.manager)._copy_into(source, destination)
+
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(destination, "inner"))),
+            ["new.txt", "old.txt"],
+        )
+        link = os.path.join(destination, "link")
+        self.assertEqual(os.readlink(link), "inner/new.txt")
@@ -0,0 +1,221 @@
+from http.server import BaseHTTPRequestHandler
+import concurrent.futures
+import threading
+import tempfile
+import time
+import os
+
+from katana.httpclient import HttpClient
+from tests import KatanaTest, LocalHTTPServer
+
+
+class CacheHandler(BaseHTTPRequestHandler):
+    """ Serves pages with various caching headers, and records each request
+    """
+
+    HEADERS = {
+        "/no-store": {"Cache-Control": "no-store"},
+        "/no-cache": {"Cache-Control": "no-cache"},
+        "/private": {"Cache-Control": "private, max-age=600"},
+        "/stale": {"Cache-Control": "max-age=0"},
+        "/etag": {"ETag": '"v1"'},
+    }
+
+    requests = []
+    # The number of requests for /flaky which fail before it succeeds
+    failures = 0
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers), self.client_address))
+
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+
+        if self.path == "/flaky":
+            if len([r for r in self.requests if r[0] == "/flaky"]) <= self.failures:
+                self.send_error(503)
+                return
+
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        if self.path == "/slow":
+            time.sleep(0.2)
+
+        body = (self.path + " " + self.headers.get("Cookie", "")).encode("utf-8")
+        self.send_response(200)
+        for name, value in self.HEADERS.get(self.path, {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class KeepAliveHandler(CacheHandler):
+    """ Keeps connections open between requests """
+
+    protocol_version = "HTTP/1.1"
+    # Don't hang the server if a connection is left open
+    timeout = 5
+
+
+class TestHttpClient(LocalHTTPServer, KatanaTest):
+    """ Test katana.httpclient.HttpClient """
+
+    def setUp(self):
+        super(TestHttpClient, self).setUp()
+
+        CacheHandler.requests = []
+        CacheHandler.failures = 0
+        self.start_server(CacheHandler)
+
+    def requested(self, path: str) -> int:
+        """ The number of requests which reached the server for a path """
+        return len([r for r in CacheHandler.requests if r[0] == path])
+
+    def test_cached(self):
+        first = self.manager.http.get(self.server_url + "page")
+        second = self.manager.http.get(self.server_url + "page")
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.requested("/page"), 1)
+
+    def test_not_stored(self):
+
+        # Errors and responses the server asks us not to keep
+        for path in ["/missing", "/no-store", "/no-cache", "/private", "/stale"]:
+            for _ in range(2):
+                self.manager.http.get(self.server_url + path.lstrip("/"))
+            self.assertEqual(self.requested(path), 2, path)
+
+    def test_cookies(self):
+        url = self.server_url + "page"
+
+        for value in ["1", "2", "1"]:
+            r = self.manager.http.get(url, cookies={"session": value})
+            self.assertEqual(r.text, f"/page session={value}")
+
+        # Each cookie is a different request
+        self.assertEqual(self.requested("/page"), 2)
+
+    def test_revalidation(self):
+        self.manager["manager"]["http-cache-ttl"] = "0"
+
+        first = self.manager.http.get(self.server_url + "etag")
+        second = self.manager.http.get(self.server_url + "etag")
+
+        # The expired copy is revalidated, and still used
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.requested("/etag"), 2)
+        self.assertEqual(CacheHandler.requests[-1][1].get("If-None-Match"), '"v1"')
+
+    def test_single_flight(self):
+        url = self.server_url + "slow"
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            responses = list(pool.map(lambda _: self.manager.http.get(url), range(8)))
+
+        self.assertEqual(self.requested("/slow"), 1)
+        self.assertTrue(all(r.content == responses[0].content for r in responses))
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+
+            # Only one page fits in memory
+            self.manager["manager"]["http-cache-size"] = str(10 / 1024 / 1024)
+            self.manager["manager"]["http-cache-dir"] = directory
+
+            self.manager.http.get(self.server_url + "first")
+            self.manager.http.get(self.server_url + "second")
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            # The spilled page is loaded by later runs without a request
+            client = HttpClient(self.manager)
+            r = client.get(self.server_url + "first")
+            self.assertEqual(r.text, "/first ")
+            self.assertEqual(self.requested("/first"), 1)
+            client.close()
+
+    def test_sessions(self):
+        client = self.manager.http
+
+        # Each thread has its own session, which it keeps between requests
+        session = client._session()
+        self.assertIs(client._session(), session)
+        with concurrent.futures.ThreadPoolExecutor(1) as pool:
+            other = pool.submit(client._session).result()
+        self.assertIsNot(other, session)
+
+        # Every session, including private ones, shares the same connections
+        for s in [session, other, client.session()]:
+            self.assertIs(s.get_adapter(self.server_url), client.adapter)
+
+    def test_retries(self):
+        url = self.server_url + "flaky"
+        self.manager["manager"]["http-backoff"] = "0"
+        CacheHandler.failures = 2
+
+        # Server errors are retried until the request succeeds
+        self.manager["manager"]["http-retries"] = "2"
+        r = self.manager.http.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.requested("/flaky"), 3)
+
+        # Once the retries run out, the last error is returned
+        CacheHandler.requests = []
+        self.manager["manager"]["http-retries"] = "1"
+        client = HttpClient(self.manager)
+        r = client.get(url)
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(self.requested("/flaky"), 2)
+        client.close()
+
+
+class TestConnectionPool(LocalHTTPServer, KatanaTest):
+    """ Test the shared connection pools of katana.httpclient.HttpClient """
+
+    def setUp(self):
+        super(TestConnectionPool, self).setUp()
+
+        CacheHandler.requests = []
+        self.start_server(KeepAliveHandler)
+
+    def tearDown(self):
+        # The server handles one connection at a time, so it can't be shut
+        # down while a connection is kept alive
+        self.manager.http.close()
+        super(TestConnectionPool, self).tearDown()
+
+    def get(self) -> tuple:
+        """ Make an uncached request, and return the client address """
+        r = self.manager.http.get(self.server_url + "no-store")
+        self.assertEqual(r.status_code, 200)
+        return CacheHandler.requests[-1][2]
+
+    def test_reuse(self):
+        address = self.get()
+
+        # The connection is reused by later requests, from any thread
+        self.assertEqual(self.get(), address)
+        thread = threading.Thread(target=self.get)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertEqual(len(CacheHandler.requests), 3)
+        self.assertEqual(CacheHandler.requests[-1][2], address)
+
+        # Closed connections are reopened as needed
+        self.manager.http.close()
+        self.assertNotEqual(self.get(), address)
+
+    def test_connections(self):
+        self.manager["manager"]["http-connections"] = "3"
+
+        # The pools block once every connection is in use
+        self.get()
+        pools = self.manager.http.adapter.poolmanager
+        self.assertEqual(pools.connection_pool_kw["maxsize"], 3)
+        self.assertTrue(pools.connection_pool_kw["block"])
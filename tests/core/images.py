@@ -0,0 +1,107 @@
+from unittest import mock
+import concurrent.futures
+import threading
+import tempfile
+import time
+import os
+
+from PIL import Image
+import numpy as np
+
+from katana.images import ImageCache
+from katana.target import Target
+from tests import KatanaTest
+
+
+class TestImageCache(KatanaTest):
+    """ Test katana.images.ImageCache """
+
+    def setUp(self):
+        super(TestImageCache, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestImageCache, self).tearDown()
+
+    def image_target(self, name: str, width: int, height: int) -> Target:
+        """ Build a target for a noisy RGB image """
+
+        path = os.path.join(self.directory.name, f"{name}.png")
+        pixels = self.rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        Image.fromarray(pixels, "RGB").save(path)
+
+        target = Target(self.manager, path)
+        target.build_target()
+        return target
+
+    def test_single_decode(self):
+        target = self.image_target("shared", 256, 256)
+        images = self.manager.images
+
+        # Slow down decoding, so every request arrives while it is decoding
+        decode = images._decode
+        decoded = []
+
+        def slow_decode(path):
+            decoded.append(path)
+            time.sleep(0.1)
+            return decode(path)
+
+        barrier = threading.Barrier(8)
+
+        def get():
+            barrier.wait()
+            return images.get(target)
+
+        with mock.patch.object(images, "_decode", slow_decode):
+            with concurrent.futures.ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(lambda _: get(), range(8)))
+
+        # Every unit shares the same decoded image
+        self.assertEqual(len(decoded), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(results[0].pixels.shape, (256, 256, 3))
+        self.assertEqual((images.misses, images.hits), (1, 7))
+
+    def test_release(self):
+        target = self.image_target("released", 64, 64)
+        images = self.manager.images
+
+        self.assertIsNotNone(images.get(target))
+        self.assertIn(target.hash.hexdigest(), images.entries)
+
+        # Completing the target releases its image
+        target.completed = True
+        self.assertNotIn(target.hash.hexdigest(), images.entries)
+        self.assertEqual(images.size, 0)
+
+    def test_eviction(self):
+        self.manager["manager"]["image-cache"] = "1"
+        images = ImageCache(self.manager)
+
+        # Two of these fit within a megabyte, but not three
+        first = self.image_target("first", 400, 400)
+        second = self.image_target("second", 400, 400)
+        third = self.image_target("third", 400, 400)
+
+        images.get(first)
+        images.get(second)
+        images.get(first)
+        images.get(third)
+
+        # The least recently used image was released
+        self.assertEqual(
+            list(images.entries),
+            [first.hash.hexdigest(), third.hash.hexdigest()],
+        )
+        self.assertEqual(images.evictions, 1)
+        self.assertEqual(images.size, 2 * 400 * 400 * 3)
+        self.assertLessEqual(images.size, images.limit)
+
+        # Images larger than the whole cache are never kept
+        large = self.image_target("large", 800, 800)
+        self.assertIsNotNone(images.get(large))
+        self.assertNotIn(large.hash.hexdigest(), images.entries)
+        self.assertEqual(images.evictions, 1)
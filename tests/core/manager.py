@@ -0,0 +1,95 @@
+from unittest import mock
+import threading
+import io
+
+from katana.target import Target
+from katana.units.crypto import xor
+from tests import KatanaTest
+
+
+class TestManager(KatanaTest):
+    """ Test katana.manager.Manager """
+
+    HYBRID = r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=xor
+        auto=yes
+        executor=hybrid
+        """
+
+    def test_unpicklable_unit(self):
+
+        # A unit holding a lock can't be shipped, so it is evaluated locally
+        def getstate(unit):
+            state = unit.__dict__.copy()
+            state["lock"] = threading.Lock()
+            return state
+
+        with mock.patch.object(xor.Unit, "__getstate__", getstate, create=True):
+            self.katana_test(
+                config=self.HYBRID,
+                target=b"\x07\r\x00\x06:\x19\x0e\x13<",
+                correct_flag="FLAG{XOR}",
+            )
+
+        self.assertIn(xor.Unit, self.manager.local_units)
+        self.assertEqual(self.monitor.exceptions, [])
+
+    def test_broken_unit(self):
+
+        # A bug in the unit is reported, rather than hidden by a fallback
+        def getstate(unit):
+            raise RuntimeError("broken unit")
+
+        with mock.patch.object(xor.Unit, "__getstate__", getstate, create=True):
+            self.manager.read_file(io.StringIO(self.HYBRID))
+            self.manager.queue_target(b"\x07\r\x00\x06:\x19\x0e\x13<")
+            self.manager.start()
+            self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        self.assertNotIn(xor.Unit, self.manager.local_units)
+        self.assertIn("broken unit", [str(e) for _, e in self.monitor.exceptions])
+
+    def test_held_target(self):
+        self.manager.read_file(io.StringIO(self.HYBRID))
+        self.manager.start()
+
+        # Targets queued from the event loop are held until an I/O thread has
+        # built them, even if building fails
+        async def queue():
+            return self.manager.queue_target(b"an unbuildable target")
+
+        with mock.patch.object(
+            Target, "build_target", side_effect=RuntimeError("unbuildable")
+        ), mock.patch.object(self.monitor, "on_manager_exception") as on_exception:
+            self.manager.engine.submit(queue()).result(timeout=5)
+            self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        self.assertTrue(self.manager.work.idle)
+        self.assertEqual(str(on_exception.call_args[0][1]), "unbuildable")
+
+    def test_adjust_batch(self):
+        self.manager["manager"]["batch-time"] = "0.1"
+        self.manager["manager"]["max-batch"] = "1000"
+        fast = self.manager.WorkItem(50, "init", None, None, 10)
+        slow = self.manager.WorkItem(50, "init", None, None, 10)
+
+        for _ in range(20):
+            # 10us per case grows the batch, up to the maximum
+            self.manager._adjust_batch(fast, fast.batch * 1e-5, fast.batch)
+            # 50ms per case shrinks it to two cases per dequeue
+            self.manager._adjust_batch(slow, slow.batch * 0.05, slow.batch)
+
+        self.assertEqual(fast.batch, 1000)
+        self.assertEqual(slow.batch, 2)
+
+        # Cases slower than the batch time are still pulled one at a time
+        for _ in range(20):
+            self.manager._adjust_batch(slow, 1.0, 1)
+        self.assertEqual(slow.batch, 1)
+
+        # Adaptation can be disabled
+        self.manager["manager"]["batch-time"] = "0"
+        self.manager._adjust_batch(slow, 0.0, 1)
+        self.assertEqual(slow.batch, 1)
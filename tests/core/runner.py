@@ -0,0 +1,70 @@
+import signal
+import sys
+import os
+
+from tests import KatanaTest
+
+
+class TestProcessRunner(KatanaTest):
+    """ Test katana.runner.ProcessRunner """
+
+    def run_python(self, source: str, **kwargs):
+        """ Run a Python snippet with the manager's runner """
+        return self.manager.runner.run(None, [sys.executable, "-c", source], **kwargs)
+
+    def test_returncode(self):
+        result = self.run_python("import sys; sys.exit(3)")
+
+        self.assertEqual(result.returncode, 3)
+        self.assertIsNone(result.killed)
+        stats = self.manager.runner.stats[os.path.basename(sys.executable)]
+        self.assertEqual(stats.failed, 1)
+
+    def test_signal(self):
+        result = self.run_python(
+            "import os, signal; os.kill(os.getpid(), signal.SIGTERM)"
+        )
+        self.assertEqual(result.returncode, -signal.SIGTERM)
+
+    def test_timeout(self):
+        result = self.run_python("import time; time.sleep(30)", timeout=0.5)
+
+        self.assertEqual(result.killed, "timeout")
+        self.assertEqual(result.returncode, -signal.SIGKILL)
+        self.assertLess(result.elapsed, 10)
+
+    def test_output_limit(self):
+        self.manager["manager"]["process-output"] = "0.001"
+        limit = int(0.001 * 1024 * 1024)
+
+        # Lines past the limit are still searched for flags
+        result = self.run_python(
+            "print('a' * 5000); print('FLAG{past_the_limit}')", timeout=10
+        )
+
+        self.assertEqual(result.returncode, 0)
+        self.assertTrue(result.truncated)
+        self.assertEqual(result.stdout, b"a" * limit)
+        self.assertIn("FLAG{past_the_limit}", [flag for _, flag in self.monitor.flags])
+
+    def test_on_line(self):
+        lines = []
+        result = self.run_python(
+            "import sys; print('one'); print('two'); sys.stderr.write('three')",
+            on_line=lambda stream, line: lines.append((stream, line)),
+            keep=False,
+        )
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, b"")
+        self.assertEqual(
+            sorted(lines),
+            [("stderr", b"three"), ("stdout", b"one"), ("stdout", b"two")],
+        )
+
+    def test_input(self):
+        data = b"x" * (1024 * 1024)
+        result = self.run_python(
+            "import sys; print(len(sys.stdin.buffer.read()))", input=data
+        )
+        self.assertEqual(result.stdout, b"%d\n" % len(data))
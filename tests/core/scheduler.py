@@ -0,0 +1,75 @@
+import threading
+import time
+
+from katana.scheduler import Scheduler
+from tests import KatanaTest
+
+
+class TestScheduler(KatanaTest):
+    """ Test katana.scheduler.Scheduler """
+
+    def setUp(self):
+        super(TestScheduler, self).setUp()
+        self.scheduler = Scheduler()
+
+    def wait_for(self, predicate, timeout: float = 5):
+        """ Wait for another thread to reach some state """
+        deadline = time.time() + timeout
+        while not predicate():
+            self.assertLess(time.time(), deadline, "timed out")
+            time.sleep(0.01)
+
+    def test_priority(self):
+        for item in [5, 1, 3]:
+            self.scheduler.put(item)
+
+        self.assertEqual([self.scheduler.get() for _ in range(3)], [1, 3, 5])
+        self.assertIsNone(self.scheduler.get(block=False))
+
+    def test_join_idle(self):
+        # Nothing was queued
+        self.assertTrue(self.scheduler.join(timeout=0))
+
+        # Removing an item isn't enough, it must also be finished
+        self.scheduler.put(1)
+        self.scheduler.get()
+        self.assertFalse(self.scheduler.join(timeout=0.1))
+
+        # A joining thread is woken once the work is done
+        threading.Timer(0.1, self.scheduler.task_done).start()
+        self.assertTrue(self.scheduler.join(timeout=5))
+        self.assertTrue(self.scheduler.idle)
+
+    def test_close(self):
+        results = []
+
+        def worker():
+            results.append(self.scheduler.get())
+
+        workers = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in workers:
+            thread.start()
+        self.wait_for(lambda: self.scheduler.waiting == 3)
+
+        # Every blocked worker is woken, and gets nothing
+        self.scheduler.close()
+        for thread in workers:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [None] * 3)
+
+        # Closing also releases threads waiting for completion
+        self.scheduler.put(1)
+        self.assertTrue(self.scheduler.join(timeout=5))
+
+    def test_hold(self):
+        # Held work is outstanding, but nothing can be removed
+        self.scheduler.hold()
+        self.assertFalse(self.scheduler.idle)
+        self.assertIsNone(self.scheduler.get(block=False))
+        self.assertFalse(self.scheduler.join(timeout=0.1))
+
+        # Releasing it completes the work
+        self.scheduler.task_done()
+        self.assertTrue(self.scheduler.idle)
+        self.assertTrue(self.scheduler.join(timeout=0))
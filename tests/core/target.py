@@ -0,0 +1,109 @@
+import hashlib
+import tempfile
+import base64
+import magic
+import os
+
+from katana.target import (
+    Target,
+    BASE64_BYTES,
+    DICTIONARY,
+    DICTIONARY_THRESHOLD,
+    LETTER_REGEX,
+    PRINTABLE_BYTES,
+)
+from tests import KatanaTest
+
+# Targets which every classification is checked against
+SAMPLES = [
+    b"This is a secret message and you are not here for the flag",
+    b"This is a secret message with qwzxv krrpt words",
+    base64.b64encode(b"Hello world, this is the flag"),
+    b"YWJjZGVmZ2hpams",
+    b"hello world\x00\x01\x02 binary data",
+    bytes(range(256)) * 4,
+]
+
+
+def baseline(data: bytes):
+    """ The original classification, a python loop over every byte """
+
+    is_printable, is_base64, is_english = True, True, True
+    all_words, english_words = 0, 0
+
+    for c in data:
+        if c not in PRINTABLE_BYTES:
+            is_printable = is_base64 = is_english = False
+            break
+        elif c not in BASE64_BYTES:
+            is_base64 = False
+
+    if is_printable:
+        words = [w for w in LETTER_REGEX.findall(data) if len(w) > 2]
+        all_words = len(words)
+        english_words = len([w for w in words if DICTIONARY.check(w.decode())])
+        is_english = (
+            english_words >= (all_words - DICTIONARY_THRESHOLD) and english_words != 0
+        )
+
+    return hashlib.md5(data).hexdigest(), is_printable, is_base64, is_english
+
+
+class TestTarget(KatanaTest):
+    """ Test the classification of katana.target.Target """
+
+    def setUp(self):
+        super(TestTarget, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestTarget, self).tearDown()
+
+    def build(self, upstream) -> Target:
+        target = Target(self.manager, upstream)
+        target.build_target()
+        return target
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return path
+
+    def classification(self, target: Target):
+        return (
+            target.hash.hexdigest(),
+            target.is_printable,
+            target.is_base64,
+            target.is_english,
+        )
+
+    def test_raw(self):
+        for data in SAMPLES:
+            target = self.build(data)
+            self.assertEqual(self.classification(target), baseline(data), data)
+            self.assertEqual(target.magic, magic.from_buffer(data))
+            self.assertEqual(target.size, len(data))
+
+    def test_file(self):
+        for n, data in enumerate(SAMPLES):
+            path = self.write(f"sample{n}", data)
+            target = self.build(path)
+            self.assertEqual(self.classification(target), baseline(data), data)
+            self.assertEqual(target.magic, magic.from_file(path))
+
+    def test_blocks(self):
+        # English text spanning several blocks is sampled, not checked in full
+        text = b"you are not here for the flag and this is a secret message\n"
+        text = text * (3 * 1024 * 1024 // len(text))
+        target = self.build(self.write("english.txt", text))
+        self.assertEqual(self.classification(target), baseline(text))
+
+        # A single binary byte in a later block is still seen
+        binary = text + b"\x00" + text
+        target = self.build(self.write("binary.txt", binary))
+        self.assertEqual(target.hash.hexdigest(), hashlib.md5(binary).hexdigest())
+        self.assertFalse(target.is_printable)
+        self.assertFalse(target.is_english)
+        self.assertEqual(target.magic, magic.from_file(target.path))
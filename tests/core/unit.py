@@ -0,0 +1,183 @@
+from unittest import mock
+import tempfile
+import zipfile
+import hashlib
+import base64
+import gzip
+import io
+import os
+
+from PIL import Image
+
+from katana.target import Target
+from katana.unit import Unit
+from katana.units.crypto import affine, atbash, caesar, caesar255, xor
+from katana.units.crack import md5
+from katana.units.zip import unzip
+from tests import KatanaTest
+
+
+class SizedUnit(Unit):
+    """ A unit with every static check other than the target properties """
+
+    KEYWORDS = ["ascii text"]
+    MIN_SIZE = 16
+    MAX_SIZE = 64
+
+
+class TestUnit(KatanaTest):
+    """ Test the static checks and deferred construction of katana.unit.Unit """
+
+    def build(self, upstream) -> Target:
+        target = Target(self.manager, upstream)
+        target.build_target()
+        return target
+
+    def test_is_applicable(self):
+        self.assertTrue(SizedUnit.is_applicable(self.build(b"a" * 32)))
+
+        # Outside of the size bounds
+        self.assertFalse(SizedUnit.is_applicable(self.build(b"a" * 8)))
+        self.assertFalse(SizedUnit.is_applicable(self.build(b"a" * 128)))
+
+        # The libmagic type has none of the keywords
+        self.assertFalse(SizedUnit.is_applicable(self.build(bytes(range(32)))))
+
+    def test_deferred(self):
+        self.manager.read_file(
+            io.StringIO(
+                """
+        [manager]
+        units=md5
+        auto=no
+
+        [md5]
+        password=FLAG{deferred}
+        """
+            )
+        )
+
+        with mock.patch.object(
+            md5.Unit, "__init__", autospec=True, side_effect=md5.Unit.__init__
+        ) as init:
+
+            # Too short to contain a hash, so the unit is never queued
+            short = self.manager.queue_target("FLAG{not")
+            self.assertTrue(short.completed)
+
+            # The unit is queued, but not constructed until it is evaluated
+            target = self.manager.queue_target(
+                hashlib.md5(b"FLAG{deferred}").hexdigest()
+            )
+            self.assertEqual(target.units_left, 1)
+            init.assert_not_called()
+
+            self.manager.start()
+            self.assertTrue(self.manager.join(timeout=10))
+
+        self.assertEqual(init.call_count, 1)
+        self.assertIs(init.call_args[0][2], target)
+        self.assertIn("FLAG{deferred}", [flag for unit, flag in self.monitor.flags])
+
+
+class TestFinder(KatanaTest):
+    """ Test the unit index of katana.unit.Finder """
+
+    def setUp(self):
+        super(TestFinder, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestFinder, self).tearDown()
+
+    def build(self, upstream) -> Target:
+        target = Target(self.manager, upstream)
+        target.build_target()
+        return target
+
+    def targets(self):
+        """ Build a target of each kind with different unit requirements """
+
+        png = os.path.join(self.directory.name, "image.png")
+        Image.new("RGB", (32, 32), (255, 0, 0)).save(png)
+
+        archive = os.path.join(self.directory.name, "archive.zip")
+        with zipfile.ZipFile(archive, "w") as handle:
+            handle.writestr("flag.txt", "FLAG{not_here}")
+
+        compressed = os.path.join(self.directory.name, "data.gz")
+        with gzip.open(compressed, "wb") as handle:
+            handle.write(b"this is compressed data")
+
+        return [
+            self.build(png),
+            self.build(archive),
+            self.build(compressed),
+            self.build(b"this is a secret message and you are not here"),
+            self.build(base64.b64encode(b"this is a secret message")),
+            self.build(bytes(range(256))),
+        ]
+
+    def test_keywords(self):
+        png, archive = self.targets()[:2]
+        finder = self.manager.finder
+
+        # The keywords of unzip aren't in the magic of an image, so it isn't
+        # even checked
+        with mock.patch.object(
+            unzip.Unit, "is_applicable", wraps=unzip.Unit.is_applicable
+        ) as is_applicable:
+            self.assertNotIn(unzip.Unit, list(finder.candidates(png)))
+            is_applicable.assert_not_called()
+
+            self.assertIn(unzip.Unit, list(finder.candidates(archive)))
+            is_applicable.assert_called_once_with(archive)
+
+    def test_full_scan(self):
+        finder = self.manager.finder
+
+        for target in self.targets():
+            # Checking every registered unit finds the same units, in order
+            expected = [u for u in finder.units if u.is_applicable(target)]
+            self.assertEqual(list(finder.candidates(target)), expected, target.magic)
+
+
+class TestEvaluateBatch(KatanaTest):
+    """ Test that evaluating a whole batch of cases at once (see
+    katana.unit.Unit.evaluate_batch) matches evaluating each case """
+
+    def evaluate(self, unit_class, upstream: bytes, flag: str) -> None:
+        target = Target(self.manager, upstream)
+        target.build_target()
+        unit = unit_class(self.manager, target)
+        cases = list(unit.enumerate())
+
+        def results(evaluate) -> list:
+            with mock.patch.object(self.manager, "register_data") as register:
+                evaluate()
+            calls = register.mock_calls
+            return sorted(repr(args[1:]) + repr(kwargs) for _, args, kwargs in calls)
+
+        batch = results(lambda: unit.evaluate_batch(cases))
+        single = results(lambda: [unit.evaluate(case) for case in cases])
+
+        self.assertEqual(batch, single)
+        self.assertTrue(any(flag in result for result in batch), batch)
+
+    def test_affine(self):
+        self.evaluate(affine.Unit, b"HLIM{HLIM}", "FLAG{FLAG}")
+
+    def test_atbash(self):
+        self.evaluate(atbash.Unit, b"UOZT{UOZT}", "FLAG{FLAG}")
+
+    def test_caesar(self):
+        self.evaluate(caesar.Unit, b"SYNT{PNRFNE_FUVSG}", "FLAG{CAESAR_SHIFT}")
+
+    def test_caesar255(self):
+        # The unit only accepts printable targets
+        flag = b"FLAG{every_byte_shifts}"
+        self.evaluate(caesar255.Unit, bytes(c + 1 for c in flag), flag.decode())
+
+    def test_xor(self):
+        self.evaluate(xor.Unit, b"\x07\r\x00\x06:\x19\x0e\x13<", "FLAG{XOR}")
@@ -0,0 +1,75 @@
+import io
+import regex as re
+
+from tests import KatanaTest
+import katana.util
+
+# Small windows, so that every test crosses several of them
+SIZE = 64
+OVERLAP = 16
+
+FLAG_PATTERN = re.compile(rb"FLAG{[^}]*}")
+
+
+class TestWindows(KatanaTest):
+    """ Test katana.util.windows and katana.util.finditer """
+
+    def find(self, pattern, data, size: int = SIZE):
+        """ The bytes of each match found by searching in windows """
+        return [
+            m.group() for m in katana.util.finditer(pattern, data, size, OVERLAP)
+        ]
+
+    def test_windows(self):
+        data = bytes(range(256)) * 2
+
+        for source in [data, io.BytesIO(data)]:
+            found = b""
+            for offset, window, limit in katana.util.windows(source, SIZE, OVERLAP):
+                # Each window starts where the last limit ended
+                self.assertEqual(offset, len(found))
+                self.assertEqual(window, data[offset : offset + len(window)])
+                self.assertLessEqual(len(window), SIZE + OVERLAP)
+                found += window[:limit]
+
+            self.assertEqual(found, data)
+
+    def test_boundary(self):
+        # Flags up to the overlap long, crossing every window boundary
+        for length in range(6, OVERLAP + 1):
+            flag = b"FLAG{" + b"y" * (length - 6) + b"}"
+            for position in range(3 * SIZE):
+                data = b"x" * position + flag + b"x" * (3 * SIZE - position)
+                self.assertEqual(self.find(FLAG_PATTERN, data), [flag], position)
+
+    def test_seam(self):
+        # Flags within the overlap are seen by two windows, but reported once
+        data = b"".join(b"FLAG{%02d}" % n for n in range(100))
+        expected = [m.group() for m in FLAG_PATTERN.finditer(data)]
+
+        self.assertEqual(self.find(FLAG_PATTERN, data), expected)
+        self.assertEqual(self.find(FLAG_PATTERN, io.BytesIO(data)), expected)
+
+    def test_greedy(self):
+        pattern = re.compile(rb"a+")
+
+        # A run crossing the end of a window is not split
+        data = b"x" * 50 + b"a" * 40 + b"x" * 50
+        self.assertEqual(self.find(pattern, data), [b"a" * 40])
+
+        # A run longer than a window is truncated to the window size
+        data = b"x" * 50 + b"a" * 200 + b"x" * 50
+        self.assertEqual(
+            self.find(pattern, data), [b"a" * SIZE] * 3 + [b"a" * (200 - 3 * SIZE)]
+        )
+
+    def test_longer_than_overlap(self):
+        # Documented limit: this flag ends beyond the window, and starts
+        # before the overlap, so no window contains all of it
+        flag = b"FLAG{" + b"y" * 30 + b"}"
+        data = b"x" * 40 + flag + b"x" * 100
+        self.assertEqual(self.find(FLAG_PATTERN, data), [])
+
+        # The same flag starting within the overlap is found
+        data = b"x" * 60 + flag + b"x" * 100
+        self.assertEqual(self.find(FLAG_PATTERN, data), [flag])
@@ -0,0 +1,76 @@
+from unittest import mock
+import tempfile
+import pickle
+import os
+
+from tests import KatanaTest
+import katana.wordlist
+
+
+class TestWordlist(KatanaTest):
+    """ Test katana.wordlist """
+
+    def setUp(self):
+        super(TestWordlist, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "words.txt")
+
+    def tearDown(self):
+        katana.wordlist.wordlists.clear()
+        self.directory.cleanup()
+        super(TestWordlist, self).tearDown()
+
+    def write(self, data: bytes) -> katana.wordlist.Wordlist:
+        """ Write the dictionary file and load it """
+        with open(self.path, "wb") as handle:
+            handle.write(data)
+        return katana.wordlist.load(self.path)
+
+    def test_empty(self):
+        wordlist = self.write(b"")
+
+        self.assertEqual(len(wordlist), 0)
+        self.assertEqual(list(wordlist), [])
+        self.assertEqual(list(wordlist.ranges()), [])
+
+    def test_trailing_newline(self):
+        for data in [b"alpha\nbeta\ngamma", b"alpha\nbeta\ngamma\n"]:
+            wordlist = self.write(data)
+            self.assertEqual(len(wordlist), 3)
+            self.assertEqual(list(wordlist), [b"alpha", b"beta", b"gamma"])
+            self.assertEqual(wordlist[-1], b"gamma")
+
+    def test_blank_lines(self):
+        wordlist = self.write(b"\nalpha\n\nbeta\n")
+
+        self.assertEqual(len(wordlist), 4)
+        self.assertEqual(list(wordlist), [b"", b"alpha", b"", b"beta"])
+        self.assertEqual(
+            [list(r) for r in wordlist.ranges(2)], [[b"", b"alpha"], [b"", b"beta"]]
+        )
+
+    def test_pickled_ranges(self):
+        words = [str(i).encode("utf-8") for i in range(25)]
+        wordlist = self.write(b"\n".join(words))
+        ranges = [pickle.dumps(r) for r in wordlist.ranges(10)]
+
+        # Unpickle as a worker process would, without a loaded wordlist
+        katana.wordlist.wordlists.clear()
+        with mock.patch.object(katana.wordlist.Wordlist, "_index") as index:
+            found = [word for r in ranges for word in pickle.loads(r)]
+            index.assert_not_called()
+
+        self.assertEqual(found, words)
+
+    def test_reload(self):
+        wordlist = self.write(b"alpha\n")
+        self.assertIs(katana.wordlist.load(self.path), wordlist)
+
+        # Same size, but a different modification time
+        self.write(b"gamma\n")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        reloaded = katana.wordlist.load(self.path)
+
+        self.assertIsNot(reloaded, wordlist)
+        self.assertEqual(list(reloaded), [b"gamma"])
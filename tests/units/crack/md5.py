@@ -0,0 +1,127 @@
+import hashlib
+import io
+import tempfile
+
+from katana.units.crack import md5
+from tests import KatanaTest
+
+
+class TestMD5(KatanaTest):
+    """ Test katana.units.crack.md5 """
+
+    def setUp(self):
+        super(TestMD5, self).setUp()
+
+        # The password is deep within the dictionary, across several ranges
+        self.wordlist = tempfile.NamedTemporaryFile(suffix=".txt")
+        for n in range(5000):
+            self.wordlist.write(b"password%d\n" % n)
+        self.wordlist.write(b"FLAG{dictionary_attack}\n")
+        self.wordlist.flush()
+
+    def tearDown(self):
+        self.wordlist.close()
+
+        super(TestMD5, self).tearDown()
+
+    def test_dict(self):
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=md5
+        auto=no
+        wordlist-range=1000
+
+        [md5]
+        dict={self.wordlist.name}
+        """,
+            target=hashlib.md5(b"FLAG{dictionary_attack}").hexdigest(),
+            correct_flag="FLAG{dictionary_attack}",
+        )
+
+    def test_many_algorithms(self):
+        hashes = [
+            hashlib.sha256(b"password17").hexdigest(),
+            hashlib.sha1(b"password4000").hexdigest(),
+            hashlib.md5(b"FLAG{dictionary_attack}").hexdigest(),
+        ]
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=md5
+        auto=no
+
+        [md5]
+        dict={self.wordlist.name}
+        """,
+            target="\n".join(hashes),
+            correct_flag="FLAG{dictionary_attack}",
+        )
+
+    def test_hybrid_executor(self):
+        hashes = [
+            hashlib.sha256(b"password17").hexdigest(),
+            hashlib.sha1(b"password4000").hexdigest(),
+            hashlib.md5(b"FLAG{dictionary_attack}").hexdigest(),
+        ]
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=md5
+        auto=no
+        executor=hybrid
+        wordlist-range=1000
+
+        [md5]
+        dict={self.wordlist.name}
+        """,
+            target="\n".join(hashes),
+            correct_flag="FLAG{dictionary_attack}",
+        )
+
+        # The ranges must have been cracked in the process pool
+        self.assertNotIn(md5.Unit, self.manager.local_units)
+        self.assertGreater(self.manager.cases_remote, 0)
+
+        # The real unit saw every hash, so it reported them all exactly once
+        summaries = self.summaries()
+        self.assertLessEqual(len(summaries), 3)
+        self.assertTrue(summaries[-1].startswith("cracked 3 of 3 hashes "))
+
+    def test_partial(self):
+        hashes = [
+            hashlib.md5(b"password17").hexdigest(),
+            hashlib.md5(b"not in the dictionary").hexdigest(),
+        ]
+        self.manager.read_file(
+            io.StringIO(
+                rf"""
+        [manager]
+        units=md5
+        auto=no
+
+        [md5]
+        dict={self.wordlist.name}
+        """
+            )
+        )
+        self.manager.queue_target("\n".join(hashes))
+        self.manager.start()
+        self.assertTrue(self.manager.join(timeout=10))
+
+        # The rate is reported although the second hash is never cracked
+        summaries = self.summaries()
+        self.assertEqual(len(summaries), 1)
+        self.assertTrue(summaries[0].startswith("cracked 1 of 2 hashes after "))
+        self.assertTrue(summaries[0].endswith(" hashes/sec)"))
+
+    def summaries(self):
+        """ The throughput reported by the unit """
+        return [
+            data
+            for unit, data in self.monitor.data
+            if isinstance(data, str) and data.startswith("cracked ")
+        ]
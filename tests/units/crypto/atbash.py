@@ -1,3 +1,10 @@
+from unittest import mock
+import tempfile
+import os
+
+from katana.units.crypto import atbash
+from katana.monitor import Monitor
+from katana.manager import Manager
 from tests import KatanaTest
 
 
@@ -15,3 +22,30 @@ class TestAtBash(KatanaTest):
             target=b"UOZT{UOZT}",
             correct_flag="FLAG{FLAG}",
         )
+
+    def test_result_cache(self):
+
+        with tempfile.TemporaryDirectory() as cache:
+            config = f"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=atbash
+        auto=yes
+        force=yes
+        cache-dir={cache}
+        """
+
+            # The first run evaluates the unit and saves the results
+            self.katana_test(
+                config=config, target=b"UOZT{UOZT}", correct_flag="FLAG{FLAG}"
+            )
+            self.assertGreater(len(os.listdir(cache)), 0, "no results cached")
+
+            # The second run uses a fresh manager, and replays the results
+            self.monitor = Monitor()
+            self.manager = Manager(monitor=self.monitor)
+            with mock.patch.object(atbash.Unit, "evaluate", autospec=True) as evaluate:
+                self.katana_test(
+                    config=config, target=b"UOZT{UOZT}", correct_flag="FLAG{FLAG}"
+                )
+            evaluate.assert_not_called()
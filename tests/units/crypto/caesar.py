@@ -0,0 +1,17 @@
+from tests import KatanaTest
+
+
+class TestCaesar(KatanaTest):
+    """ Test katana.units.crypto.caesar """
+
+    def test_caesar(self):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=caesar
+        auto=yes
+        """,
+            target=b"SYNT{PNRFNE_FUVSG}",
+            correct_flag="FLAG{CAESAR_SHIFT}",
+        )
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+from katana.units.crypto import xor
 from tests import KatanaTest
 
 
@@ -32,3 +33,21 @@ class Test(KatanaTest):
             target=b"    \x1d4.5\x1b",
             correct_flag="FLAG{XOR}",
         )
+
+    def test_hybrid_executor(self):
+
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=xor
+        auto=yes
+        executor=hybrid
+        """,
+            target=b"\x07\r\x00\x06:\x19\x0e\x13<",
+            correct_flag="FLAG{XOR}",
+        )
+
+        # The cases must have been evaluated in the process pool
+        self.assertNotIn(xor.Unit, self.manager.local_units)
+        self.assertGreater(self.manager.cases_remote, 0)
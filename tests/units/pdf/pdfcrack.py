@@ -0,0 +1,167 @@
+import tempfile
+import os
+
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2._encryption import AES_CBC_encrypt, AlgV4, AlgV5
+
+from katana.units.pdf import pdfcrack
+from tests import KatanaTest
+
+
+class TestPdfcrack(KatanaTest):
+    """ Test katana.units.pdf.pdfcrack """
+
+    def setUp(self):
+        super(TestPdfcrack, self).setUp()
+
+        # The password is deep within the dictionary, across several ranges
+        self.directory = tempfile.TemporaryDirectory()
+        self.wordlist = os.path.join(self.directory.name, "words.txt")
+        with open(self.wordlist, "w") as f:
+            for n in range(3000):
+                f.write("password%d\n" % n)
+            f.write("FLAG{not_so_portable}\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+        super(TestPdfcrack, self).tearDown()
+
+    def encrypted_pdf(self, use_128bit: bool) -> str:
+        """ Create a blank PDF encrypted with RC4 """
+
+        writer = PdfWriter()
+        writer.add_blank_page(72, 72)
+        writer.encrypt("FLAG{not_so_portable}", "owner", use_128bit=use_128bit)
+
+        path = os.path.join(self.directory.name, f"{use_128bit}.pdf")
+        with open(path, "wb") as f:
+            writer.write(f)
+
+        return path
+
+    def aes_pdf(self, revision: int) -> str:
+        """ Create a blank PDF encrypted with AES. PyPDF2 can't write these,
+        so the encryption dictionary is built from its reader's algorithms
+        and the file is written by hand. """
+
+        password, owner = b"FLAG{not_so_portable}", b"owner"
+        document_id = os.urandom(16)
+        # Permissions are signed in the file, but unsigned for PyPDF2
+        permissions = -4
+        flags = permissions & 0xFFFFFFFF
+
+        if revision == 4:
+            # The key length is only given by the crypt filter
+            o_key = AlgV4.compute_O_value_key(owner, 4, 128)
+            o = AlgV4.compute_O_value(o_key, password, 4)
+            key = AlgV4.compute_key(password, 4, 128, o, flags, document_id, True)
+            values = {b"/O": o, b"/U": AlgV4.compute_U_value(key, 4, document_id)}
+            header = b"/V 4 /R 4 /CF << /StdCF << /CFM /AESV2 /Length 16 >> >>"
+        elif revision == 5:
+            values = AlgV5.generate_values(
+                password, owner, os.urandom(32), flags, True
+            )
+            values = {k.encode("ascii"): v for k, v in values.items()}
+            header = b"/V 5 /R 5 /Length 256 /CF << /StdCF << /CFM /AESV3 >> >>"
+        else:
+            key, salts = os.urandom(32), os.urandom(32)
+
+            def entry(secret: bytes, udata: bytes, salt: bytes):
+                value = AlgV5.calculate_hash(6, secret, salt[:8], udata) + salt[:16]
+                hashed = AlgV5.calculate_hash(6, secret, salt[8:16], udata)
+                return value, AES_CBC_encrypt(hashed, bytes(16), key)
+
+            u, ue = entry(password, b"", salts[:16])
+            o, oe = entry(owner, u, salts[16:])
+            values = {
+                b"/U": u,
+                b"/UE": ue,
+                b"/O": o,
+                b"/OE": oe,
+                b"/Perms": AlgV5.compute_Perms_value(key, flags, True),
+            }
+            header = b"/V 5 /R 6 /Length 256 /CF << /StdCF << /CFM /AESV3 >> >>"
+
+        encrypt = b"<< /Filter /Standard %s /P %d /StmF /StdCF /StrF /StdCF %s >>" % (
+            header,
+            permissions,
+            b" ".join(b"%s <%s>" % (k, v.hex().encode()) for k, v in values.items()),
+        )
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 72 72] >>",
+            encrypt,
+        ]
+
+        # Write each object, followed by the cross reference table
+        data = b"%PDF-1.7\n"
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(data))
+            data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        xref = len(data)
+        data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        data += b"trailer\n<< /Size %d /Root 1 0 R /Encrypt 4 0 R " % (
+            len(objects) + 1
+        )
+        data += b"/ID [<%s> <%s>] >>\n" % ((document_id.hex().encode(),) * 2)
+        data += b"startxref\n%d\n%%%%EOF\n" % xref
+
+        path = os.path.join(self.directory.name, f"aes{revision}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        # Make sure PyPDF2 agrees that the password opens the document. Its
+        # reader also ignores the crypt filter length, so it can't open R4.
+        if revision != 4:
+            self.assertTrue(PdfReader(path).decrypt(password.decode("utf-8")))
+
+        return path
+
+    def crack(self, target: str, executor: str = "thread"):
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=pdfcrack
+        auto=no
+        executor={executor}
+        wordlist-range=1000
+
+        [pdfcrack]
+        dict={self.wordlist}
+        """,
+            target=target,
+            correct_flag="FLAG{not_so_portable}",
+        )
+
+    def test_rc4_40(self):
+        self.crack(self.encrypted_pdf(use_128bit=False))
+
+    def test_rc4_128(self):
+        self.crack(self.encrypted_pdf(use_128bit=True))
+
+    def test_aes_128(self):
+        self.crack(self.aes_pdf(4))
+
+    def test_aes_256_r5(self):
+        self.crack(self.aes_pdf(5))
+
+    def test_aes_256_r6(self):
+        self.crack(self.aes_pdf(6))
+
+    def test_hybrid_executor(self):
+        self.crack(self.encrypted_pdf(use_128bit=True), executor="hybrid")
+
+        # The ranges were checked in the process pool, and the real unit
+        # kept the statistics and stopped
+        self.assertNotIn(pdfcrack.Unit, self.manager.local_units)
+        self.assertGreater(self.manager.cases_remote, 0)
+        unit = next(
+            unit for unit, _ in self.monitor.data if isinstance(unit, pdfcrack.Unit)
+        )
+        self.assertTrue(unit.completed)
+        self.assertGreater(unit.tested, 0)
@@ -15,3 +15,15 @@ class TestBase64(KatanaTest):
             target=b64encode(b"FLAG{base64}"),
             correct_flag="FLAG{base64}",
         )
+
+    def test_multiple_flag_formats(self):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+            picoCTF{.*?}
+        auto=yes
+        """,
+            target=b64encode(b"picoCTF{base64}"),
+            correct_flag="picoCTF{base64}",
+        )
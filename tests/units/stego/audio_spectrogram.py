@@ -0,0 +1,99 @@
+from unittest import mock
+import tempfile
+import struct
+import wave
+import io
+import os
+
+from PIL import Image
+import numpy as np
+
+from tests import KatanaTest
+
+
+class TestAudioSpectrogram(KatanaTest):
+    """ Test katana.units.stego.audio_spectrogram """
+
+    def setUp(self):
+        super(TestAudioSpectrogram, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestAudioSpectrogram, self).tearDown()
+
+    def test_stereo(self):
+
+        # A different tone in each channel of a short clip
+        rate, nfft = 8000, 256
+        tones = [1000, 2500]
+        t = np.arange(rate) / rate
+        samples = np.stack([0.5 * np.sin(2 * np.pi * f * t) for f in tones], axis=1)
+
+        path = os.path.join(self.directory.name, "stereo.wav")
+        with wave.open(path, "wb") as handle:
+            handle.setnchannels(2)
+            handle.setsampwidth(2)
+            handle.setframerate(rate)
+            handle.writeframes((samples * 32767).astype("<i2").tobytes())
+
+        self.manager.read_file(
+            io.StringIO(
+                rf"""
+        [manager]
+        units=audio_spectrogram
+        auto=no
+
+        [audio_spectrogram]
+        nfft={nfft}
+        """
+            )
+        )
+        self.manager.queue_target(path)
+        self.manager.start()
+        self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        artifacts = {
+            os.path.basename(path): path for _, path in self.monitor.artifacts
+        }
+
+        for channel, tone in enumerate(tones, start=1):
+            for scale in ["linear", "dB"]:
+                name = f"spectrogram_{channel}_{scale}.png"
+                self.assertIn(name, artifacts)
+
+                with Image.open(artifacts[name]) as image:
+                    values = np.asarray(image, dtype=np.float64)
+
+                # A row for each frequency, with low frequencies at the bottom
+                self.assertEqual(values.shape[0], nfft // 2 + 1)
+                row = np.argmax(values.mean(axis=1))
+                self.assertEqual(row, nfft // 2 - tone * nfft // rate)
+
+    def test_missing_ffmpeg(self):
+        path = os.path.join(self.directory.name, "silence.au")
+        data = bytes(2 * 8000)
+
+        # Sun audio isn't a WAVE file, so it must be converted
+        with open(path, "wb") as handle:
+            handle.write(struct.pack(">4sIIIII", b".snd", 24, len(data), 3, 8000, 1))
+            handle.write(data)
+
+        self.manager.read_file(
+            io.StringIO(
+                """
+        [manager]
+        units=audio_spectrogram
+        auto=no
+        """
+            )
+        )
+
+        # Without ffmpeg, the unit gives up instead of raising
+        with mock.patch.dict(os.environ, {"PATH": self.directory.name}):
+            self.manager.queue_target(path)
+            self.manager.start()
+            self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        self.assertEqual(self.monitor.exceptions, [])
+        self.assertEqual(self.monitor.artifacts, [])
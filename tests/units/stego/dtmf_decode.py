@@ -0,0 +1,110 @@
+from unittest import mock
+import tempfile
+import struct
+import wave
+import io
+import os
+
+import numpy as np
+
+from tests import KatanaTest
+
+ROWS = [697, 770, 852, 941]
+COLUMNS = [1209, 1336, 1477, 1633]
+KEYS = "123A456B789C*0#D"
+
+
+def dial(digits: str, rate: int) -> np.ndarray:
+    """ Generate 80ms tones for each digit, separated by 60ms of silence """
+
+    pieces = []
+    for digit in digits:
+        key = KEYS.index(digit)
+        t = np.arange(int(rate * 0.08)) / rate
+        pieces.append(
+            0.3 * np.sin(2 * np.pi * ROWS[key // 4] * t)
+            + 0.3 * np.sin(2 * np.pi * COLUMNS[key % 4] * t)
+        )
+        pieces.append(np.zeros(int(rate * 0.06)))
+
+    # A little noise, to keep things honest
+    samples = np.concatenate(pieces)
+    return samples + np.random.default_rng(0).normal(0, 0.01, len(samples))
+
+
+class TestDtmfDecode(KatanaTest):
+    """ Test katana.units.stego.dtmf_decode """
+
+    def setUp(self):
+        super(TestDtmfDecode, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestDtmfDecode, self).tearDown()
+
+    def decode(self, target: str):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=31415926\d+
+        units=dtmf_decode
+        auto=no
+        """,
+            target=target,
+            correct_flag="3141592653589793",
+        )
+
+    def test_stereo_pcm(self):
+        path = os.path.join(self.directory.name, "stereo.wav")
+        samples = np.repeat(dial("3141592653589793", 44100)[:, np.newaxis], 2, axis=1)
+
+        with wave.open(path, "wb") as handle:
+            handle.setnchannels(2)
+            handle.setsampwidth(2)
+            handle.setframerate(44100)
+            handle.writeframes((samples * 32767).astype("<i2").tobytes())
+
+        self.decode(path)
+
+    def test_float(self):
+        path = os.path.join(self.directory.name, "float.wav")
+        data = dial("3141592653589793", 8000).astype("<f4").tobytes()
+
+        # The wave module only writes integer samples
+        with open(path, "wb") as handle:
+            handle.write(struct.pack("<4sI4s", b"RIFF", 36 + len(data), b"WAVE"))
+            handle.write(
+                struct.pack("<4sIHHIIHH", b"fmt ", 16, 3, 1, 8000, 32000, 4, 32)
+            )
+            handle.write(struct.pack("<4sI", b"data", len(data)) + data)
+
+        self.decode(path)
+
+    def test_missing_ffmpeg(self):
+        path = os.path.join(self.directory.name, "tones.au")
+        data = (dial("3141592653589793", 8000) * 32767).astype(">i2").tobytes()
+
+        # Sun audio isn't a WAVE file, so it must be converted
+        with open(path, "wb") as handle:
+            handle.write(struct.pack(">4sIIIII", b".snd", 24, len(data), 3, 8000, 1))
+            handle.write(data)
+
+        self.manager.read_file(
+            io.StringIO(
+                """
+        [manager]
+        units=dtmf_decode
+        auto=no
+        """
+            )
+        )
+
+        # Without ffmpeg, the unit gives up instead of raising
+        with mock.patch.dict(os.environ, {"PATH": self.directory.name}):
+            self.manager.queue_target(path)
+            self.manager.start()
+            self.assertTrue(self.manager.join(timeout=10))
+
+        self.assertEqual(self.monitor.exceptions, [])
+        self.assertEqual(self.monitor.flags, [])
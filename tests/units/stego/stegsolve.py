@@ -0,0 +1,66 @@
+import tempfile
+import io
+import os
+
+from PIL import Image, ImageDraw
+import numpy as np
+
+from tests import KatanaTest
+
+
+class TestStegsolve(KatanaTest):
+    """ Test katana.units.stego.stegsolve """
+
+    def setUp(self):
+        super(TestStegsolve, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestStegsolve, self).tearDown()
+
+    def test_large_plane(self):
+
+        # Write the flag into the third bit of the red channel of a large,
+        # noisy image
+        mask = Image.new("1", (1600, 1200))
+        ImageDraw.Draw(mask).text((40, 600), "FLAG{bit_by_bit}", fill=1)
+        hidden = np.array(mask)
+
+        pixels = np.random.default_rng(0).integers(
+            0, 256, (1200, 1600, 3), dtype=np.uint8
+        )
+        pixels[:, :, 0] = (pixels[:, :, 0] & ~np.uint8(4)) | (hidden << 2)
+
+        target = os.path.join(self.directory.name, "hidden.png")
+        Image.fromarray(pixels, "RGB").save(target)
+
+        self.manager.read_file(
+            io.StringIO(
+                r"""
+        [manager]
+        units=stegsolve
+        auto=no
+
+        [stegsolve]
+        channel=R
+        plane=2
+        variants=no
+        """
+            )
+        )
+        self.manager.queue_target(target)
+        self.manager.start()
+        self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        # The plane is extracted at full resolution, so every pixel of the
+        # flag survives
+        paths = [
+            path
+            for _, path in self.monitor.artifacts
+            if path.endswith("channel_R_plane_2.png")
+        ]
+        self.assertEqual(len(paths), 1)
+        with Image.open(paths[0]) as plane:
+            self.assertEqual(plane.size, (1600, 1200))
+            self.assertTrue(np.array_equal(np.array(plane.convert("1")), hidden))
@@ -0,0 +1,59 @@
+import tempfile
+import os
+
+from PIL import Image
+import numpy as np
+
+from tests import KatanaTest
+
+
+class TestZsteg(KatanaTest):
+    """ Test katana.units.stego.zsteg """
+
+    def setUp(self):
+        super(TestZsteg, self).setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super(TestZsteg, self).tearDown()
+
+    def hidden_image(self, extension: str, mode: str) -> str:
+        """ Hide the flag within the low two bits of the blue and red
+        channels, reading down each column """
+
+        channels = len(mode)
+        pixels = np.random.default_rng(0).integers(
+            0, 256, (64, 64, channels), dtype=np.uint8
+        )
+
+        # Split the message into 2 bit chunks, most significant first
+        message = np.frombuffer(b"FLAG{least_significant}\0", dtype=np.uint8)
+        chunks = np.unpackbits(message).reshape(-1, 2)
+        chunks = (chunks[:, 0] << 1) | chunks[:, 1]
+
+        columns = pixels.transpose(1, 0, 2)[:, :, [2, 1, 0]].reshape(-1)
+        columns[: len(chunks)] = (columns[: len(chunks)] & 0xFC) | chunks
+        pixels[:, :, [2, 1, 0]] = columns.reshape(64, 64, 3).transpose(1, 0, 2)
+
+        path = os.path.join(self.directory.name, f"hidden.{extension}")
+        Image.fromarray(pixels, mode).save(path)
+        return path
+
+    def extract(self, target: str):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=zsteg
+        auto=no
+        """,
+            target=target,
+            correct_flag="FLAG{least_significant}",
+        )
+
+    def test_png(self):
+        self.extract(self.hidden_image("png", "RGBA"))
+
+    def test_bmp(self):
+        self.extract(self.hidden_image("bmp", "RGB"))
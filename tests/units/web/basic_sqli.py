@@ -0,0 +1,87 @@
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+from tests import KatanaTest, LocalHTTPServer
+
+
+class LoginHandler(BaseHTTPRequestHandler):
+    """ Serves a login form which is vulnerable to SQL injection """
+
+    # The method of the form
+    METHOD = b"post"
+
+    requests = []
+
+    def send_body(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.login("GET")
+
+    def do_POST(self):
+        self.login("POST")
+
+    def login(self, method: str):
+        path = urlsplit(self.path).path
+        self.requests.append((method, path))
+
+        if path == "/":
+            self.send_body(
+                b'<html><form action="login" method="%s">'
+                b'<input type="text" name="username">'
+                b'<input type="password" name="password">'
+                b"</form></html>" % self.METHOD
+            )
+            return
+
+        # The form is sent in the body, whatever the method
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+
+        # Only the simplest payload gets through
+        username = form.get("username", [""])[0]
+        if username == "' OR 1 --":
+            self.send_body(b"FLAG{injected}")
+        else:
+            self.send_body(b"access denied")
+
+
+class TestBasicSqli(LocalHTTPServer, KatanaTest):
+    """ Test katana.units.web.basic_sqli """
+
+    def setUp(self):
+        super(TestBasicSqli, self).setUp()
+
+        LoginHandler.requests = []
+        self.start_server(LoginHandler)
+
+    def sqli(self, method: bytes) -> set:
+        """ Find the flag through a form with the given method, and return the
+        methods used to log in """
+
+        LoginHandler.METHOD = method
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=basic_sqli
+        auto=no
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{injected}",
+        )
+
+        return {m for m, path in LoginHandler.requests if path == "/login"}
+
+    def test_get(self):
+        self.assertEqual(self.sqli(b"GET"), {"GET"})
+
+    def test_post(self):
+        self.assertEqual(self.sqli(b"post"), {"POST"})
+
+    def test_unknown_method(self):
+        # Forms only GET or POST, so anything else is posted
+        self.assertEqual(self.sqli(b"put"), {"POST"})
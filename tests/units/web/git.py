@@ -0,0 +1,79 @@
+from http.server import SimpleHTTPRequestHandler
+import tempfile
+import os
+
+import dulwich.porcelain
+import dulwich.server
+
+from tests import KatanaTest, LocalHTTPServer
+
+
+class SoftNotFoundHandler(SimpleHTTPRequestHandler):
+    """ Answers requests for missing files with a "not found" page, but a 200
+    status """
+
+    def send_error(self, code, message=None, explain=None):
+        if code != 404:
+            return super(SoftNotFoundHandler, self).send_error(code, message, explain)
+
+        body = b"<html><body>Page not found</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestGit(LocalHTTPServer, KatanaTest):
+    """ Test katana.units.web.git """
+
+    def setUp(self):
+        super(TestGit, self).setUp()
+
+        # Create a repository where the flag only exists in an old commit
+        self.site = tempfile.TemporaryDirectory()
+        repo = dulwich.porcelain.init(self.site.name)
+        flag_path = os.path.join(self.site.name, "flag.txt")
+
+        with open(flag_path, "w") as f:
+            f.write("FLAG{packed_away_but_not_forgotten}\n")
+        dulwich.porcelain.add(repo, [flag_path])
+        dulwich.porcelain.commit(repo, b"add flag", author=b"a <a@b.c>")
+
+        dulwich.porcelain.remove(repo, [flag_path])
+        dulwich.porcelain.commit(repo, b"remove flag", author=b"a <a@b.c>")
+
+        # Only expose packed objects
+        repo.object_store.pack_loose_objects()
+        dulwich.server.update_server_info(repo)
+        repo.close()
+
+    def tearDown(self):
+        super(TestGit, self).tearDown()
+        self.site.cleanup()
+
+    def test_packed(self):
+        self.start_server(SimpleHTTPRequestHandler, directory=self.site.name)
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=git
+        auto=no
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{packed_away_but_not_forgotten}",
+        )
+
+    def test_soft_not_found(self):
+        self.start_server(SoftNotFoundHandler, directory=self.site.name)
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=git
+        auto=no
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{packed_away_but_not_forgotten}",
+        )
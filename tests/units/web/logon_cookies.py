@@ -0,0 +1,83 @@
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+
+from katana.httpclient import HttpClient
+from tests import KatanaTest, LocalHTTPServer
+
+
+class LogonHandler(BaseHTTPRequestHandler):
+    """ Serves a login form which trusts an ``admin`` cookie """
+
+    FORM = (
+        b'<html><form action="login" method="post">'
+        b'<input type="text" name="username">'
+        b'<input type="password" name="password">'
+        b"</form></html>"
+    )
+
+    requests = []
+
+    def send_body(self, body: bytes, headers: dict = {}):
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path, self.headers.get("Cookie")))
+
+        if self.path == "/":
+            self.send_body(self.FORM)
+        elif self.headers.get("Cookie") == "admin=True":
+            self.send_body(b"FLAG{cookies_are_not_secure}")
+        else:
+            self.send_body(b"welcome guest")
+
+    def do_POST(self):
+        self.requests.append(("POST", self.path, self.headers.get("Cookie")))
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        # Any login is accepted, but not as an administrator
+        self.send_body(b"welcome guest", {"Set-Cookie": "admin=False"})
+
+
+class TestLogonCookies(LocalHTTPServer, KatanaTest):
+    """ Test katana.units.web.logon_cookies """
+
+    def setUp(self):
+        super(TestLogonCookies, self).setUp()
+
+        LogonHandler.requests = []
+        self.start_server(LogonHandler)
+
+    def test_logon_cookies(self):
+        sessions = []
+        create = HttpClient.session
+
+        def session(client):
+            sessions.append(create(client))
+            return sessions[-1]
+
+        with mock.patch.object(
+            HttpClient, "session", autospec=True, side_effect=session
+        ):
+            self.katana_test(
+                config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=logon_cookies
+        auto=no
+        """,
+                target=self.server_url,
+                correct_flag="FLAG{cookies_are_not_secure}",
+            )
+
+        self.assertIn(("POST", "/login", None), LogonHandler.requests)
+        self.assertIn(("GET", "/login", "admin=True"), LogonHandler.requests)
+
+        # The login cookies were kept by a private session of the shared
+        # client. The thread-local sessions don't keep cookies.
+        jars = [{cookie.name for cookie in s.cookies} for s in sessions]
+        self.assertEqual([jar for jar in jars if jar], [{"admin"}])
@@ -0,0 +1,82 @@
+from http.server import BaseHTTPRequestHandler
+from unittest import mock
+import io
+
+from katana.target import Target
+from tests import KatanaTest, LocalHTTPServer
+
+
+class RobotsHandler(BaseHTTPRequestHandler):
+    """ Serves a robots.txt file pointing at a page containing the flag """
+
+    PAGES = {
+        "/": b"<html>nothing to see here</html>",
+        "/robots.txt": b"User-agent: *\nDisallow: /nothing\nDisallow: /secret\n",
+        "/nothing": b"still nothing",
+        "/secret": b"FLAG{robots_are_not_secure}",
+    }
+
+    def do_GET(self):
+        body = self.PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestRobots(LocalHTTPServer, KatanaTest):
+    """ Test katana.units.web.robots """
+
+    def setUp(self):
+        super(TestRobots, self).setUp()
+        self.start_server(RobotsHandler)
+
+    def test_robots(self):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=robots
+        auto=yes
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{robots_are_not_secure}",
+        )
+
+    def test_targets_built_off_loop(self):
+
+        # Record whether each target is built on the event loop thread. The
+        # root target is built before the engine is started.
+        on_loop = []
+        build_target = Target.build_target
+
+        def build(target):
+            engine = self.manager.engine
+            on_loop.append(engine is not None and engine.in_loop())
+            return build_target(target)
+
+        # Nothing matches the flag format, so finding the flag doesn't stop
+        # the pages from being queued
+        self.manager.read_file(
+            io.StringIO(
+                r"""
+        [manager]
+        flag-format=NOTHING{.*?}
+        units=robots
+        auto=no
+        """
+            )
+        )
+
+        with mock.patch.object(Target, "build_target", autospec=True) as patched:
+            patched.side_effect = build
+            self.manager.queue_target(self.server_url)
+            self.manager.start()
+            self.assertTrue(self.manager.join(timeout=10), "manager timed out")
+
+        # The root target, and the data of both disallowed pages
+        self.assertEqual(len(on_loop), 3)
+        self.assertNotIn(True, on_loop, "target built on the event loop")
@@ -0,0 +1,78 @@
+from http.server import BaseHTTPRequestHandler
+
+from tests import KatanaTest, LocalHTTPServer
+
+
+class SpiderHandler(BaseHTTPRequestHandler):
+    """ Serves a small site whose pages link to each other in many ways """
+
+    PAGES = {
+        "/": b"""<a href="/a/">a</a> <a href="/a/./">a</a>
+            <a href="/A/../a/#top">a</a> <a href="http://example.com/">elsewhere</a>
+            <a href="mailto:x@y">mail</a>""",
+        "/a/": b"""<a href="../">home</a> <a href="b.html?y=2&x=1">b</a>
+            <a href="b.html?x=1&y=2">b</a>""",
+        "/a/b.html": b"""<a href="/FLAG{spiders_follow_every_link}">flag</a>
+            <a href="/a/">a</a>""",
+    }
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        body = self.PAGES.get(self.path.split("?")[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestSpider(LocalHTTPServer, KatanaTest):
+    """ Test katana.units.web.spider """
+
+    def setUp(self):
+        super(TestSpider, self).setUp()
+
+        SpiderHandler.requests = []
+        self.start_server(SpiderHandler)
+
+    def test_spider(self):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=spider
+        auto=no
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{spiders_follow_every_link}",
+        )
+
+        # Every page was only fetched once
+        self.assertEqual(
+            len(SpiderHandler.requests), len(set(SpiderHandler.requests))
+        )
+        self.assertIn("/a/b.html?x=1&y=2", SpiderHandler.requests)
+
+    def test_cache_disabled(self):
+        self.katana_test(
+            config=r"""
+        [manager]
+        flag-format=FLAG{.*?}
+        units=spider
+        auto=no
+        http-cache-size=0
+        """,
+            target=self.server_url,
+            correct_flag="FLAG{spiders_follow_every_link}",
+        )
+
+        # Without the response cache, building each target is the only fetch
+        self.assertEqual(
+            len(SpiderHandler.requests), len(set(SpiderHandler.requests))
+        )
+        self.assertIn("/a/b.html?x=1&y=2", SpiderHandler.requests)
@@ -0,0 +1,80 @@
+import subprocess
+import unittest
+import tempfile
+import shutil
+import os
+
+from katana.units.zip import unzip
+from tests import KatanaTest
+
+
+@unittest.skipUnless(shutil.which("zip"), "zip is not installed")
+class TestUnzip(KatanaTest):
+    """ Test katana.units.zip.unzip """
+
+    def setUp(self):
+        super(TestUnzip, self).setUp()
+
+        # Encrypt the flag with a password deep within the dictionary
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.directory.name, "flag.txt"), "w") as f:
+            f.write("FLAG{zipped_up_tight}\n")
+        subprocess.run(
+            ["zip", "-q", "-P", "password4321", "flag.zip", "flag.txt"],
+            cwd=self.directory.name,
+            check=True,
+        )
+
+        self.wordlist = os.path.join(self.directory.name, "words.txt")
+        with open(self.wordlist, "w") as f:
+            for n in range(5000):
+                f.write("password%d\n" % n)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+        super(TestUnzip, self).tearDown()
+
+    def test_dict(self):
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=unzip,strings
+        auto=no
+        wordlist-range=1000
+
+        [unzip]
+        dict={self.wordlist}
+        """,
+            target=os.path.join(self.directory.name, "flag.zip"),
+            correct_flag="FLAG{zipped_up_tight}",
+        )
+
+    def test_hybrid_executor(self):
+        self.katana_test(
+            config=rf"""
+        [manager]
+        flag-format=FLAG{{.*?}}
+        units=unzip,strings
+        auto=no
+        executor=hybrid
+        wordlist-range=1000
+
+        [unzip]
+        dict={self.wordlist}
+        """,
+            target=os.path.join(self.directory.name, "flag.zip"),
+            correct_flag="FLAG{zipped_up_tight}",
+        )
+
+        # The ranges were checked in the process pool, and the real unit
+        # stopped once the password was found
+        self.assertNotIn(unzip.Unit, self.manager.local_units)
+        self.assertGreater(self.manager.cases_remote, 0)
+        self.assertTrue(
+            any(
+                isinstance(unit, unzip.Unit) and unit.completed
+                for unit, _ in self.monitor.artifacts
+            )
+        )